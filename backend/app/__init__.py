@@ -0,0 +1,143 @@
+import gc
+import time
+import tempfile
+import logging
+from flask import Flask, Request, current_app, request, jsonify, g
+from flask_cors import CORS
+from dotenv import load_dotenv
+from app.config import config_from_env
+from app.pipeline import Pipeline
+from app.services.admission import AdmissionRejected
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SpooledUploadRequest(Request):
+    """Keep uploaded files in memory unless they exceed UPLOAD_SPOOL_THRESHOLD"""
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=current_app.config['UPLOAD_SPOOL_THRESHOLD'], mode='w+b')
+
+
+def create_app(config=None):
+    """Build the Flask app; ``config`` overrides settings read from the environment.
+
+    Only Flask and the light service modules are imported here. The
+    extractor, analyzer and OCR engines are built on first use, or up front
+    by ``warm_up``.
+    """
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    app = Flask(__name__)
+    app.request_class = SpooledUploadRequest
+    CORS(app)
+    app.config.update(config_from_env())
+    if config:
+        app.config.update(config)
+    if app.config['SERVING_MODE'] not in ('inline', 'pool'):
+        raise ValueError(f"Unknown SERVING_MODE: {app.config['SERVING_MODE']}")
+
+    pipeline = Pipeline(app.config)
+    app.extensions['pipeline'] = pipeline
+    metrics.registry.register_collector(pipeline.collect_metrics, key='pipeline')
+
+    from routes.status_routes import status_bp
+    from routes.upload_routes import upload_bp
+    from routes.job_routes import job_bp
+    from routes.batch_routes import batch_bp
+    from routes.analyze_routes import analyze_bp
+    from routes.chunked_upload_routes import chunked_upload_bp
+    for blueprint in (status_bp, upload_bp, job_bp, batch_bp, analyze_bp, chunked_upload_bp):
+        app.register_blueprint(blueprint)
+
+    register_request_metrics(app)
+    register_error_handlers(app)
+    register_job_workers(app)
+    return app
+
+
+def warm_up(app):
+    """Load every heavy library, model and engine the app will need, before workers fork.
+
+    Call it once in the server's master process (wsgi.py does, and
+    gunicorn.conf.py preloads wsgi.py). Forked workers then share the
+    imported modules, compiled lexicon and regexes, sentiment model and OCR
+    engine copy-on-write, and a new worker's first request pays for none
+    of them. Objects alive now are moved out of the garbage collector's
+    generations, so collections in the workers do not write to, and so
+    copy, those shared pages.
+    """
+    seconds = app.extensions['pipeline'].warm_up()
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Warm-up finished in {seconds}s")
+    return seconds
+
+
+def register_request_metrics(app):
+    def metrics_endpoint_label():
+        return request.url_rule.rule if request.url_rule else 'unmatched'
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        g.metrics_endpoint = metrics_endpoint_label()
+        metrics.requests_in_flight.inc(g.metrics_endpoint)
+
+    @app.after_request
+    def record_request_metrics(response):
+        endpoint = g.pop('metrics_endpoint', None)
+        if endpoint is not None:
+            metrics.request_seconds.observe(
+                time.perf_counter() - g.metrics_start, endpoint, request.method, response.status_code
+            )
+            # Streamed responses are still in flight until the server closes them
+            response.call_on_close(lambda: metrics.requests_in_flight.dec(endpoint))
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        # Only reached with the endpoint still set when no response was produced
+        endpoint = g.pop('metrics_endpoint', None)
+        if endpoint is not None:
+            metrics.requests_in_flight.dec(endpoint)
+
+
+def register_job_workers(app):
+    """Start this process's job workers on its first request when jobs live in SQLite.
+
+    A SQLite job outlives the process that queued it: jobs left queued by a
+    restart, or requeued when a worker process died, are only claimed if
+    every process works the queue, not just those that have had a job
+    submitted to them since they started.
+    """
+    if app.config['JOB_QUEUE_BACKEND'] != 'sqlite':
+        return
+
+    @app.before_request
+    def start_job_workers():
+        app.extensions['pipeline'].job_manager.start()
+
+
+def register_error_handlers(app):
+    @app.errorhandler(413)
+    def too_large(e):
+        # Batch, NDJSON and chunk routes raise the body limit per request; report the one that applied
+        limit = request.max_content_length or current_app.config['MAX_CONTENT_LENGTH']
+        what = 'Chunk' if request.endpoint == 'chunked_upload.append_chunk' else 'File'
+        return jsonify({'error': f'{what} too large. Maximum size is {limit / (1024 * 1024):g}MB'}), 413
+
+    @app.errorhandler(500)
+    def internal_error(e):
+        return jsonify({'error': 'Internal server error'}), 500
+
+    @app.errorhandler(AdmissionRejected)
+    def busy(e):
+        response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+
+    @app.errorhandler(404)
+    def not_found(e):
+        return jsonify({'error': 'Endpoint not found'}), 404
@@ -0,0 +1,52 @@
+import os
+
+
+def config_from_env():
+    """App settings, read from the environment when the app is created"""
+    return {
+        'MAX_CONTENT_LENGTH': 10 * 1024 * 1024,
+        'UPLOAD_FOLDER': 'uploads',
+        'UPLOAD_SPOOL_THRESHOLD': int(os.getenv('UPLOAD_SPOOL_THRESHOLD', 4 * 1024 * 1024)),
+        # Resumable uploads sent in chunks, for documents over MAX_CONTENT_LENGTH
+        'CHUNKED_UPLOAD_DIR': os.getenv('CHUNKED_UPLOAD_DIR', os.path.join('uploads', 'chunked')),
+        'CHUNKED_UPLOAD_MAX_SIZE': int(os.getenv('CHUNKED_UPLOAD_MAX_SIZE', 512 * 1024 * 1024)),
+        'CHUNKED_UPLOAD_CHUNK_SIZE': int(os.getenv('CHUNKED_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)),
+        'CHUNKED_UPLOAD_TTL': int(os.getenv('CHUNKED_UPLOAD_TTL', 24 * 3600)),
+        'RESULT_CACHE_DIR': os.getenv('RESULT_CACHE_DIR', 'cache'),
+        'RESULT_CACHE_MAX_ENTRIES': int(os.getenv('RESULT_CACHE_MAX_ENTRIES', 256)),
+        'RESULT_CACHE_MAX_BYTES': int(os.getenv('RESULT_CACHE_MAX_BYTES', 512 * 1024 * 1024)),
+        'JOB_QUEUE_BACKEND': os.getenv('JOB_QUEUE_BACKEND', 'memory'),
+        'JOB_QUEUE_PATH': os.getenv('JOB_QUEUE_PATH', 'jobs.db'),
+        'JOB_WORKERS': int(os.getenv('JOB_WORKERS', 2)),
+        'JOB_EVENTS_POLL_INTERVAL': float(os.getenv('JOB_EVENTS_POLL_INTERVAL', 0.5)),
+        # SQLite jobs whose worker stops renewing them for this long are requeued, up to JOB_MAX_ATTEMPTS claims
+        'JOB_LEASE_SECONDS': float(os.getenv('JOB_LEASE_SECONDS', 60)),
+        'JOB_MAX_ATTEMPTS': int(os.getenv('JOB_MAX_ATTEMPTS', 2)),
+        # Word budget used by ?quick=1 on long documents
+        'QUICK_ANALYSIS_MAX_WORDS': int(os.getenv('QUICK_ANALYSIS_MAX_WORDS', 3000)),
+        'MAX_BATCH_FILES': int(os.getenv('MAX_BATCH_FILES', 50)),
+        'MAX_BATCH_CONTENT_LENGTH': int(os.getenv('MAX_BATCH_CONTENT_LENGTH', 100 * 1024 * 1024)),
+        'BATCH_WORKERS': int(os.getenv('BATCH_WORKERS', 4)),
+        'ANALYZE_BATCH_SIZE': int(os.getenv('ANALYZE_BATCH_SIZE', 256)),
+        'MAX_ANALYZE_CONTENT_LENGTH': int(os.getenv('MAX_ANALYZE_CONTENT_LENGTH', 1024 * 1024 * 1024)),
+        'MAX_ANALYZE_RECORD_LENGTH': int(os.getenv('MAX_ANALYZE_RECORD_LENGTH', 1024 * 1024)),
+        # 'inline' runs extraction and analysis in the request thread, 'pool' on CPU_WORKERS processes
+        'SERVING_MODE': os.getenv('SERVING_MODE', 'inline'),
+        'CPU_WORKERS': int(os.getenv('CPU_WORKERS', 0)) or os.cpu_count() or 1,
+        'CPU_WORKER_OCR_WORKERS': int(os.getenv('CPU_WORKER_OCR_WORKERS', 1)),
+        # Documents processed at once and waiting, per lane; more than that gets a 429
+        'ADMISSION_DIRECT_CONCURRENCY': int(os.getenv('ADMISSION_DIRECT_CONCURRENCY', 8)),
+        'ADMISSION_DIRECT_QUEUE': int(os.getenv('ADMISSION_DIRECT_QUEUE', 32)),
+        'ADMISSION_OCR_CONCURRENCY': int(os.getenv('ADMISSION_OCR_CONCURRENCY', 2)),
+        'ADMISSION_OCR_QUEUE': int(os.getenv('ADMISSION_OCR_QUEUE', 8)),
+        'ADMISSION_QUEUE_TIMEOUT': float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 30)),
+        'ADMISSION_PER_CLIENT': int(os.getenv('ADMISSION_PER_CLIENT', 4)),
+        # Header naming the client for per-client limits, e.g. X-Forwarded-For; the peer address otherwise
+        'ADMISSION_CLIENT_HEADER': os.getenv('ADMISSION_CLIENT_HEADER', ''),
+        'PROFILE_ADMIN_TOKEN': os.getenv('PROFILE_ADMIN_TOKEN', ''),
+        'PROFILE_DIR': os.getenv('PROFILE_DIR', 'profiles'),
+        'PROFILE_SAMPLE_EVERY': int(os.getenv('PROFILE_SAMPLE_EVERY', 0)),
+        # tracemalloc traces every thread, slowing concurrent requests too, so sampled profiles skip it by default
+        'PROFILE_SAMPLE_MEMORY': os.getenv('PROFILE_SAMPLE_MEMORY', 'false').lower() == 'true',
+        'PROFILE_MAX_REPORTS': int(os.getenv('PROFILE_MAX_REPORTS', 100)),
+    }
@@ -0,0 +1,403 @@
+import os
+import time
+import uuid
+import queue
+import shutil
+import threading
+import multiprocessing
+import logging
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from app.services.result_cache import ResultCache
+from app.services.incremental_analyzer import IncrementalAnalyzer, finalize_all
+from app.services.job_queue import JobManager, create_job_queue
+from app.services.profiling import RequestProfiler
+from app.services.admission import AdmissionController
+from app.services.chunked_upload import ChunkedUploadStore
+from app.services.extraction_limits import ExtractionLimits
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_TEXT = (
+    "Warming up the analyzer with a short post about technology and business. "
+    "We love how simple this is, but is it fast enough? Share your thoughts!"
+)
+
+
+class lazy_service:
+    """Like cached_property, but built under the pipeline's lock so concurrent
+    first requests share one instance"""
+
+    def __init__(self, build):
+        self.build = build
+        self.name = build.__name__
+        self.__doc__ = build.__doc__
+
+    def __get__(self, pipeline, owner=None):
+        if pipeline is None:
+            return self
+        with pipeline._lock:
+            # Once built the instance attribute shadows this descriptor
+            if self.name not in pipeline.__dict__:
+                pipeline.__dict__[self.name] = self.build(pipeline)
+        return pipeline.__dict__[self.name]
+
+
+class Pipeline:
+    """The services every blueprint shares, built the first time they are used.
+
+    Building the extractor imports PyPDF2, pdf2image, PIL and the OCR
+    bindings, and the analyzer loads its lexicon and sentiment model, so a
+    worker that only answers health checks never pays for them. ``warm_up``
+    builds everything up front instead, for servers that fork workers.
+
+    With SERVING_MODE 'pool', extraction and analysis run on a pool of
+    CPU_WORKERS processes, so the web process only parses requests, hashes
+    uploads and waits; OCR and text analysis never hold its GIL.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._lock = threading.RLock()
+
+    def loaded(self, name):
+        """Whether a service has been built yet"""
+        return name in self.__dict__
+
+    @property
+    def use_process_pool(self):
+        return self.config.get('SERVING_MODE') == 'pool'
+
+    @lazy_service
+    def text_extractor(self):
+        from app.services.text_extraction import TextExtractor
+        return TextExtractor(ocr_workers=self.config.get('OCR_WORKERS'))
+
+    @lazy_service
+    def ai_analyzer(self):
+        from app.services.ai_analyzer import AIAnalyzer
+        return AIAnalyzer()
+
+    @lazy_service
+    def result_cache(self):
+        return ResultCache(
+            max_entries=self.config['RESULT_CACHE_MAX_ENTRIES'],
+            cache_dir=self.config['RESULT_CACHE_DIR'],
+            max_disk_bytes=self.config['RESULT_CACHE_MAX_BYTES']
+        )
+
+    @lazy_service
+    def request_profiler(self):
+        return RequestProfiler(
+            report_dir=self.config['PROFILE_DIR'],
+            sample_every=self.config['PROFILE_SAMPLE_EVERY'],
+            sample_memory=self.config['PROFILE_SAMPLE_MEMORY'],
+            max_reports=self.config['PROFILE_MAX_REPORTS']
+        )
+
+    @lazy_service
+    def job_manager(self):
+        backend = self.config['JOB_QUEUE_BACKEND']
+        options = {}
+        if backend == 'sqlite':
+            options = {
+                'db_path': self.config['JOB_QUEUE_PATH'],
+                'lease_seconds': self.config['JOB_LEASE_SECONDS'],
+                'max_attempts': self.config['JOB_MAX_ATTEMPTS'],
+                'on_abandoned': self.abandon_upload_job
+            }
+        return JobManager(create_job_queue(backend, **options), self.run_upload_job, workers=self.config['JOB_WORKERS'])
+
+    @lazy_service
+    def batch_executor(self):
+        return ThreadPoolExecutor(max_workers=self.config['BATCH_WORKERS'], thread_name_prefix='batch')
+
+    @lazy_service
+    def chunked_uploads(self):
+        return ChunkedUploadStore(
+            self.config['CHUNKED_UPLOAD_DIR'],
+            max_size=self.config['CHUNKED_UPLOAD_MAX_SIZE'],
+            ttl=self.config['CHUNKED_UPLOAD_TTL']
+        )
+
+    @lazy_service
+    def admission(self):
+        return AdmissionController(
+            lanes={
+                'direct': (self.config['ADMISSION_DIRECT_CONCURRENCY'], self.config['ADMISSION_DIRECT_QUEUE']),
+                'ocr': (self.config['ADMISSION_OCR_CONCURRENCY'], self.config['ADMISSION_OCR_QUEUE']),
+            },
+            per_client=self.config['ADMISSION_PER_CLIENT'],
+            queue_timeout=self.config['ADMISSION_QUEUE_TIMEOUT']
+        )
+
+    @lazy_service
+    def cpu_pool(self):
+        from app import workers
+        # Each worker OCRs its own pages inline by default; the pool is already one process per core
+        return ProcessPoolExecutor(
+            max_workers=self.config['CPU_WORKERS'],
+            initializer=workers.init_worker,
+            initargs=(self.config['CPU_WORKER_OCR_WORKERS'],)
+        )
+
+    @lazy_service
+    def event_manager(self):
+        # Carries page and progress events from pool workers back to the request thread
+        return multiprocessing.Manager()
+
+    def warm_up(self):
+        """Build the extraction and analysis services and load what they load on first use.
+
+        Imports the PDF, image and OCR libraries, compiles the sentiment
+        lexicon, loads the sentiment model and starts the OCR engine, then
+        runs one rule-based analysis so lazily compiled patterns are ready.
+        Nothing here starts a thread or a process.
+        """
+        start = time.perf_counter()
+        from app.services.ocr_engines import get_ocr_engine
+
+        analyzer = self.ai_analyzer
+        # The rule-based path touches every pattern without calling a remote model
+        analyzer._get_fallback_analysis(WARM_UP_TEXT)
+        extractor = self.text_extractor
+        # Engines are per process and per language, so the pages OCRed later reuse this one
+        engine = get_ocr_engine(extractor.ocr_backend, pool_size=extractor.ocr_engine_pool_size)
+        if hasattr(engine, 'warm_up'):
+            # Loads the engine mode image uploads ask for; PDF pages use the default mode
+            engine.warm_up(extractor.image_ocr_config)
+        return round(time.perf_counter() - start, 3)
+
+    def collect_metrics(self):
+        """Scrape-time metrics from counters the cache, analyzer and sentiment model already keep"""
+        collected = []
+        if self.loaded('result_cache'):
+            cache = self.result_cache.stats()
+            collected.append(('result_cache_lookups_total', 'counter', "Result cache lookups by outcome", {
+                ('memory',): cache['memory_hits'],
+                ('disk',): cache['disk_hits'],
+                ('coalesced',): cache['coalesced'],
+                ('miss',): cache['misses'],
+            }, ('status',)))
+        if self.loaded('ai_analyzer'):
+            sentiment = self.ai_analyzer.sentiment_stats()
+            collected.append(('sentiment_results_total', 'counter', "Document sentiment results by the source that decided them",
+                              {(source,): count for source, count in sentiment['sources'].items()}, ('source',)))
+            model = sentiment['model'] or {}
+            api_counters = {(name,): model[name] for name in ('api_calls', 'api_failures', 'short_circuited', 'fallbacks') if name in model}
+            if api_counters:
+                collected.append(('sentiment_api_events_total', 'counter', "Sentiment API calls, failures and rule fallbacks",
+                                  api_counters, ('event',)))
+        return collected
+
+    def upload_cache_signature(self):
+        """The extractor and analyzer settings that go into every upload's cache key"""
+        return self.text_extractor.config_signature(), self.ai_analyzer.config_signature()
+
+    def upload_cache_key(self, stream, file_ext, limits=None):
+        """Result cache key for an upload: its content hash plus the pipeline config"""
+        with metrics.time_stage('upload_hash'):
+            file_hash = ResultCache.hash_stream(stream)
+        return self.cache_key_for_hash(file_hash, file_ext, limits)
+
+    def cache_key_for_hash(self, file_hash, file_ext, limits=None):
+        """Result cache key for an upload whose content hash is already known"""
+        parts = [file_ext.lower(), *self.upload_cache_signature()]
+        if limits:
+            # A page range or word budget gives a different result from the whole document
+            parts.append(limits.as_dict())
+        return ResultCache.make_key(file_hash, *parts)
+
+    def save_upload(self, stream, file_ext):
+        """Save an upload stream under a unique name in the upload folder"""
+        os.makedirs(self.config['UPLOAD_FOLDER'], exist_ok=True)
+        unique_filename = f"{uuid.uuid4().hex}{file_ext}"
+        filepath = os.path.join(self.config['UPLOAD_FOLDER'], unique_filename)
+        stream.seek(0)
+        with open(filepath, 'wb') as f:
+            shutil.copyfileobj(stream, f)
+        return filepath
+
+    def remove_upload(self, filepath):
+        if os.path.exists(filepath):
+            try:
+                os.remove(filepath)
+            except Exception as e:
+                print(f"Warning: Could not delete file {filepath}: {e}")
+
+    def process_upload(self, source, filename, on_page=None, progress=None, limits=None):
+        """Extract and analyze an upload in this process, analyzing each page as it is extracted.
+
+        ``source`` is a saved file path or a seekable stream. ``on_page(page, partial)``
+        gets each page record with the running analysis so far, and
+        ``progress(pages_done, pages_total)`` is called as pages complete.
+        ``limits`` (an ExtractionLimits) restricts the pages read and the text used.
+        """
+        document, incremental = self.extract_upload(source, filename, on_page, progress, limits)
+        return self.analyze_document(document, incremental)
+
+    def extract_upload(self, source, filename, on_page=None, progress=None, limits=None):
+        """``process_upload`` up to the sentiment model call: returns the document and its finished incremental analysis"""
+        incremental = IncrementalAnalyzer(self.ai_analyzer)
+        page_callback = (lambda page: on_page(page, incremental.snapshot())) if on_page else None
+        if isinstance(source, str):
+            document = self.text_extractor.extract_document(
+                source, progress=progress, on_page=page_callback, on_text=incremental.feed, limits=limits
+            )
+        else:
+            document = self.text_extractor.extract_document_from_buffer(
+                source, filename, progress=progress, on_page=page_callback, on_text=incremental.feed, limits=limits
+            )
+        incremental.finish_text()
+        return document, incremental
+
+    @contextmanager
+    def admitted(self, source, filename, bounded=True, limits=None):
+        """Hold a slot in the OCR or direct-text admission lane, whichever the upload needs"""
+        lane = 'ocr' if self.text_extractor.needs_ocr(source, filename, limits) else 'direct'
+        with self.admission.slot(lane, bounded):
+            yield lane
+
+    def analyze_admitted(self, source, filename, bounded=True, **kwargs):
+        """analyze_upload once the upload's admission lane has a free slot; raises AdmissionRejected"""
+        with self.admitted(source, filename, bounded, kwargs.get('limits')):
+            return self.analyze_upload(source, filename, **kwargs)
+
+    def analyze_upload(self, source, filename, on_page=None, progress=None, limits=None):
+        """``process_upload``, on the CPU process pool in 'pool' serving mode.
+
+        Page and progress callbacks still run in the calling thread, relayed
+        from the worker as it reports them.
+        """
+        if not self.use_process_pool:
+            return self.process_upload(source, filename, on_page, progress, limits)
+
+        from app import workers
+        if not isinstance(source, str):
+            # Uploads are capped at MAX_CONTENT_LENGTH, so they go to the worker as bytes
+            source.seek(0)
+            source = source.read()
+        events = self.event_manager.Queue() if on_page or progress else None
+        remote_model = self.remote_sentiment_model
+        task = workers.extract_upload if remote_model else workers.process_upload
+        future = self.cpu_pool.submit(task, source, filename, events, limits)
+        if events is not None:
+            self._relay_events(future, events, on_page, progress)
+        result, telemetry = future.result()
+        self._merge_telemetry(telemetry)
+        if remote_model:
+            document, incremental = result
+            incremental.analyzer = self.ai_analyzer
+            return self.analyze_document(document, incremental)
+        return result
+
+    def analyze_texts(self, texts):
+        """``AIAnalyzer.analyze_batch``, on the CPU process pool in 'pool' serving mode"""
+        if not self.use_process_pool:
+            return self.ai_analyzer.analyze_batch(texts)
+
+        from app import workers
+        if self.remote_sentiment_model:
+            analyses, telemetry = self.cpu_pool.submit(workers.prepare_batch, texts).result()
+            self._merge_telemetry(telemetry)
+            return finalize_all(self.ai_analyzer, analyses)
+        results, telemetry = self.cpu_pool.submit(workers.analyze_batch, texts).result()
+        self._merge_telemetry(telemetry)
+        return results
+
+    @property
+    def remote_sentiment_model(self):
+        """Whether the sentiment model is a remote API.
+
+        Pool workers then stop before the model call and this process makes
+        it, from the request or job thread waiting on the result, so CPU
+        slots are never held waiting on the network.
+        """
+        return getattr(self.ai_analyzer.sentiment_model, 'remote', False)
+
+    def _relay_events(self, future, events, on_page, progress):
+        finished = False
+        while True:
+            try:
+                kind, *args = events.get(timeout=0.05)
+            except queue.Empty:
+                if finished:
+                    return
+                # Everything the task sent is queued once it is done; one more pass collects it
+                finished = future.done()
+                continue
+            if kind == 'page' and on_page:
+                on_page(*args)
+            elif kind == 'progress' and progress:
+                progress(*args)
+
+    def _merge_telemetry(self, telemetry):
+        """Count a pool worker's stage timings and sentiment sources as if the work ran here"""
+        metrics.registry.merge(telemetry['metrics'])
+        self.ai_analyzer.record_sentiment_sources(telemetry['sentiment_sources'])
+
+    def analyze_document(self, document, incremental=None):
+        """Analyze extracted text and summarise how each page was read"""
+        extracted_text = document['text']
+
+        # Analyze text with AI; pages fed to an incremental analysis only need finishing
+        if incremental is not None:
+            analysis_result = incremental.finalize()
+        else:
+            analysis_result = self.ai_analyzer.analyze_text(extracted_text)
+
+        return {
+            'extracted_text': extracted_text,
+            'pages': [
+                {
+                    'page': page['page'],
+                    'kind': page['kind'],
+                    'method': page['method'],
+                    'char_count': len(page['text']),
+                    'timings_ms': page.get('timings', {})
+                }
+                for page in document['pages']
+            ],
+            'extraction_timings_ms': document.get('timings', {}),
+            'page_count': document.get('page_count', len(document['pages'])),
+            'truncated': document.get('truncated', False),
+            'analysis': analysis_result
+        }
+
+    def run_upload_job(self, payload, progress):
+        """Background job handler: the same pipeline as /api/upload on a saved file"""
+        filepath = payload['file_path']
+        limits = ExtractionLimits(**payload['limits']) if payload.get('limits') else None
+        try:
+            result, cache_status = self.result_cache.get_or_compute(
+                payload['cache_key'],
+                # Queued jobs were already accepted, so they wait for a slot rather than being rejected
+                lambda: self.analyze_admitted(
+                    filepath, payload['original_filename'], bounded=False, progress=progress, limits=limits
+                )
+            )
+        finally:
+            self.remove_upload(filepath)
+
+        return upload_response_data(payload['original_filename'], payload['file_size'], result, cache_status)
+
+    def abandon_upload_job(self, payload):
+        """Delete the saved upload of a job the queue gave up on, as run_upload_job never will"""
+        if payload.get('file_path'):
+            self.remove_upload(payload['file_path'])
+
+
+def upload_response_data(filename, file_length, result, cache_status):
+    return {
+        'original_filename': filename,
+        'file_size': file_length,
+        'extracted_text': result['extracted_text'],
+        'pages': result['pages'],
+        'extraction_timings_ms': result.get('extraction_timings_ms', {}),
+        # Results cached before page limits existed always covered the whole document
+        'page_count': result.get('page_count', len(result['pages'])),
+        'truncated': result.get('truncated', False),
+        'analysis': result['analysis'],
+        'cache_status': cache_status
+    }
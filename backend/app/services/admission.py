@@ -0,0 +1,145 @@
+import math
+import time
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+from app.services import metrics
+
+
+class AdmissionRejected(Exception):
+    """A request turned away because a lane or a client is at its limit"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Lane:
+    def __init__(self, name, concurrency, queue_size):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.running = 0
+        self.waiters = deque()
+        # Moving average of how long one document holds a slot, for Retry-After
+        self.service_seconds = 1.0
+
+
+class AdmissionController:
+    """Bounded admission in front of extraction, so overload queues briefly and then sheds.
+
+    Documents go through one of several lanes (the cheap direct-text path
+    and the expensive OCR path). Each lane runs at most ``concurrency``
+    documents and lets at most ``queue_size`` more wait, first come first
+    served, for up to ``queue_timeout`` seconds. Anything beyond that is
+    rejected at once with a Retry-After estimate taken from the lane's
+    recent service times. Separately, each client may have at most
+    ``per_client`` requests being processed at a time.
+    """
+
+    def __init__(self, lanes, per_client=4, queue_timeout=30.0):
+        self.lanes = {name: _Lane(name, concurrency, queue_size) for name, (concurrency, queue_size) in lanes.items()}
+        self.per_client = per_client
+        self.queue_timeout = queue_timeout
+        self._clients = Counter()
+        self._lock = threading.Lock()
+        for lane in self.lanes.values():
+            self._update_gauges(lane)
+
+    @contextmanager
+    def client_slot(self, client):
+        """Count one request against a client's limit while the block runs"""
+        with self._lock:
+            if self.per_client and self._clients[client] >= self.per_client:
+                metrics.admission_rejected_total.inc('all', 'client_limit')
+                # The client's own requests free this up; there is no queue to estimate from
+                raise AdmissionRejected(f"Too many concurrent requests from this client (limit {self.per_client})", 1)
+            self._clients[client] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._clients[client] -= 1
+                if not self._clients[client]:
+                    del self._clients[client]
+
+    @contextmanager
+    def slot(self, lane_name, bounded=True):
+        """Hold a slot in a lane while the block runs.
+
+        With ``bounded`` False the caller waits however long the queue is,
+        for work that was already accepted, such as a queued job.
+        """
+        self.acquire(lane_name, bounded)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(lane_name, time.perf_counter() - start)
+
+    def acquire(self, lane_name, bounded=True):
+        lane = self.lanes[lane_name]
+        with self._lock:
+            if lane.running < lane.concurrency and not lane.waiters:
+                lane.running += 1
+                self._update_gauges(lane)
+                metrics.admission_wait_seconds.observe(0.0, lane.name)
+                return
+            if bounded and len(lane.waiters) >= lane.queue_size:
+                metrics.admission_rejected_total.inc(lane.name, 'queue_full')
+                raise AdmissionRejected(
+                    f"Server is busy ({lane.name} queue full)", self._retry_after(lane, len(lane.waiters))
+                )
+            waiter = threading.Event()
+            lane.waiters.append(waiter)
+            self._update_gauges(lane)
+
+        start = time.perf_counter()
+        waiter.wait(self.queue_timeout if bounded else None)
+        with self._lock:
+            # release() hands its slot over under the lock, so this check cannot race it
+            if not waiter.is_set():
+                lane.waiters.remove(waiter)
+                self._update_gauges(lane)
+                metrics.admission_rejected_total.inc(lane.name, 'timeout')
+                raise AdmissionRejected(
+                    f"Server is busy (waited {self.queue_timeout:g}s for the {lane.name} queue)",
+                    self._retry_after(lane, len(lane.waiters))
+                )
+        metrics.admission_wait_seconds.observe(time.perf_counter() - start, lane.name)
+
+    def release(self, lane_name, service_seconds):
+        lane = self.lanes[lane_name]
+        with self._lock:
+            lane.service_seconds = 0.8 * lane.service_seconds + 0.2 * service_seconds
+            if lane.waiters:
+                # Hand the slot straight to the next waiter, so the count never dips
+                lane.waiters.popleft().set()
+            else:
+                lane.running -= 1
+            self._update_gauges(lane)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'lanes': {
+                    lane.name: {
+                        'running': lane.running,
+                        'queued': len(lane.waiters),
+                        'concurrency': lane.concurrency,
+                        'queue_size': lane.queue_size,
+                        'avg_service_seconds': round(lane.service_seconds, 3),
+                    }
+                    for lane in self.lanes.values()
+                },
+                'clients': len(self._clients),
+                'per_client': self.per_client,
+            }
+
+    def _retry_after(self, lane, queued):
+        """Whole seconds until a request arriving now would likely get a slot; caller holds the lock"""
+        return max(1, math.ceil(lane.service_seconds * (queued + 1) / max(1, lane.concurrency)))
+
+    def _update_gauges(self, lane):
+        metrics.admission_queue_depth.set(len(lane.waiters), lane.name)
+        metrics.admission_in_progress.set(lane.running, lane.name)
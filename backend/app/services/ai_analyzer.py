@@ -1,15 +1,25 @@
 import os
-import requests
 import re
 import random
+import threading
 from collections import Counter
 import logging
+from app.services.text_document import TextDocument
+from app.services.sentiment_lexicon import SentimentLexicon
+from app.services.metrics import time_stage
 
 logger = logging.getLogger(__name__)
 
 class AIAnalyzer:
     def __init__(self):
         self.huggingface_api_key = os.getenv('HUGGINGFACE_API_TOKEN', '')
+        self.sentiment_backend = os.getenv('SENTIMENT_BACKEND', 'huggingface')
+        self.sentiment_model = self._create_sentiment_model(self.sentiment_backend)
+        # Long documents are scored in sentence-aligned chunks; the model sees at most max_chunks of them
+        self.sentiment_chunk_chars = int(os.getenv('SENTIMENT_CHUNK_CHARS', 2000))
+        self.sentiment_max_chunks = int(os.getenv('SENTIMENT_MAX_CHUNKS', 32))
+        self.sentiment_sources = Counter()
+        self._sources_lock = threading.Lock()
         
         # Enhanced dictionaries for better analysis
         self.engagement_boosters = {
@@ -43,6 +53,28 @@ class AIAnalyzer:
                 'weak': ['dislike', 'unhappy', 'concerned', 'worried', 'bother', 'trouble', 'challenge', 'hard']
             }
         }
+        self.sentiment_phrases = {
+            'negation': ['not happy', "don't like", "doesn't work", "isn't good", "no good"],
+            'emphasis': ['very happy', 'so good', 'really love', 'extremely pleased']
+        }
+
+        # Enhanced stop words, never counted as topics
+        self.topic_stop_words = {
+            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
+            'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
+            'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
+            'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those',
+            'about', 'very', 'really', 'just', 'like', 'more', 'some', 'such', 'only',
+            'also', 'than', 'then', 'when', 'where', 'why', 'how', 'what', 'which',
+            'who', 'whom', 'their', 'there', 'here', 'from', 'into', 'upon', 'your',
+            'my', 'our', 'its', 'him', 'her', 'them', 'would', 'should', 'could'
+        }
+
+        # Compile the word and phrase lists once; extra entries can come from a JSON file
+        self.sentiment_lexicon = SentimentLexicon(self.sentiment_words, self.sentiment_phrases)
+        lexicon_path = os.getenv('SENTIMENT_LEXICON_PATH')
+        if lexicon_path:
+            self.sentiment_lexicon.load(lexicon_path)
 
         # Comprehensive hashtag database by category
         self.hashtag_database = {
@@ -77,133 +109,238 @@ class AIAnalyzer:
             ]
         }
 
+    def config_signature(self):
+        """Settings that change analysis output, used in result cache keys"""
+        return {
+            'analyzer': type(self).__name__,
+            'sentiment_model': self.sentiment_model.config_signature() if self.sentiment_model else None,
+            'sentiment_chunks': [self._chunk_chars(), self.sentiment_max_chunks],
+            'lexicon': self.sentiment_lexicon.fingerprint
+        }
+
+    def sentiment_stats(self):
+        """How often each sentiment source answered, plus the model's own counters"""
+        with self._sources_lock:
+            sources = dict(self.sentiment_sources)
+        return {
+            'sources': sources,
+            'backend': self.sentiment_backend,
+            'model': self.sentiment_model.stats() if self.sentiment_model else None
+        }
+
+    def drain_sentiment_sources(self):
+        """Source counts since the last drain; pool workers hand theirs to the web process"""
+        with self._sources_lock:
+            sources, self.sentiment_sources = self.sentiment_sources, Counter()
+        return sources
+
+    def record_sentiment_sources(self, sources):
+        with self._sources_lock:
+            self.sentiment_sources.update(sources)
+
     def analyze_text(self, text):
         """Enhanced text analysis with accurate sentiment and relevant hashtags"""
-        if len(text.strip()) < 10:
-            return self._get_default_analysis()
+        return self.analyze_batch([text])[0]
+
+    def analyze_batch(self, texts):
+        """Analyze several texts at once; each result equals analyze_text on that text.
+        
+        Sentiment model inputs from every text go out as one batch, which is
+        where the per-text cost is when a model is configured.
+        """
+        with time_stage('analysis'):
+            return self._analyze_batch(texts)
+
+    def _analyze_batch(self, texts):
+        results = [None] * len(texts)
+        docs = {}
+        for index, text in enumerate(texts):
+            if len(text.strip()) < 10:
+                results[index] = self._get_default_analysis()
+            else:
+                # Clean and tokenize once; every stage below reads from this document
+                docs[index] = TextDocument(self._clean_text(text))
         
         try:
-            # Clean and preprocess text
-            cleaned_text = self._clean_text(text)
-            
-            # Get accurate sentiment analysis
-            sentiment = self._accurate_sentiment_analysis(cleaned_text)
-            
-            # Extract meaningful topics
-            topics = self._meaningful_topic_extraction(cleaned_text)
-            
-            # Generate expert-level suggestions
-            suggestions = self._expert_suggestions(cleaned_text, sentiment, topics)
-            
-            # Calculate engagement score
-            engagement_score = self._enhanced_engagement_score(cleaned_text, sentiment, topics)
-            
-            # Calculate metrics
-            metrics = self._calculate_text_metrics(cleaned_text)
-            
-            # Generate relevant hashtag strategy
-            hashtag_strategy = self._relevant_hashtag_strategy(topics, cleaned_text, sentiment)
-            
-            # Detect content type
-            content_type = self._detect_content_type(cleaned_text)
-            
-            return {
-                "sentiment": sentiment,
-                "key_topics": topics,
-                "engagement_score": engagement_score,
-                "suggestions": suggestions,
-                "hashtag_strategy": hashtag_strategy,
-                "readability_score": metrics['readability'],
-                "word_count": metrics['word_count'],
-                "sentence_count": metrics['sentence_count'],
-                "estimated_reading_time": metrics['reading_time'],
-                "content_type": content_type
-            }
-            
+            # Get accurate sentiment analysis over each whole document
+            with time_stage('sentiment'):
+                sentiments = self._documents_sentiment(list(docs.values()))
         except Exception as e:
             logger.error(f"AI analysis failed: {str(e)}")
-            return self._get_fallback_analysis(text)
+            sentiments = [None] * len(docs)
+        
+        for (index, doc), sentiment in zip(docs.items(), sentiments):
+            try:
+                if sentiment is None:
+                    raise RuntimeError("sentiment analysis unavailable")
+                results[index] = self._analyze_document(doc, *sentiment)
+            except Exception as e:
+                logger.error(f"AI analysis failed: {str(e)}")
+                results[index] = self._get_fallback_analysis(texts[index])
+        return results
 
-    def _accurate_sentiment_analysis(self, text):
-        """Highly accurate sentiment analysis using multiple methods"""
-        text_lower = text.lower()
+    def _analyze_document(self, doc, sentiment, sentiment_breakdown, topics=None):
+        """Every analysis stage after sentiment, for one document"""
+        # Extract meaningful topics, unless they were counted as the text came in
+        if topics is None:
+            with time_stage('topics'):
+                topics = self._meaningful_topic_extraction(doc)
         
-        # Method 1: Try Hugging Face API first
-        api_sentiment = self._try_huggingface_sentiment(text)
-        if api_sentiment and api_sentiment['score'] > 0.7:
-            return api_sentiment
+        # Generate expert-level suggestions
+        suggestions = self._expert_suggestions(doc, sentiment, topics)
         
-        # Method 2: Advanced rule-based sentiment with scoring
-        return self._advanced_rule_based_sentiment(text_lower)
+        # Calculate engagement score
+        engagement_score = self._enhanced_engagement_score(doc, sentiment, topics)
+        
+        # Calculate metrics
+        metrics = self._calculate_text_metrics(doc)
+        
+        # Generate relevant hashtag strategy
+        hashtag_strategy = self._relevant_hashtag_strategy(topics, doc, sentiment)
+        
+        # Detect content type
+        content_type = self._detect_content_type(doc)
+        
+        return {
+            "sentiment": sentiment,
+            "key_topics": topics,
+            "engagement_score": engagement_score,
+            "suggestions": suggestions,
+            "hashtag_strategy": hashtag_strategy,
+            "readability_score": metrics['readability'],
+            "word_count": metrics['word_count'],
+            "sentence_count": metrics['sentence_count'],
+            "estimated_reading_time": metrics['reading_time'],
+            "content_type": content_type,
+            "sentiment_breakdown": sentiment_breakdown
+        }
 
-    def _try_huggingface_sentiment(self, text):
-        """Try Hugging Face API for sentiment"""
-        try:
-            if self.huggingface_api_key:
-                API_URL = "https://api-inference.huggingface.co/models/cardiffnlp/twitter-roberta-base-sentiment-latest"
-                headers = {"Authorization": f"Bearer {self.huggingface_api_key}"}
-                
-                response = requests.post(API_URL, headers=headers, json=text[:512], timeout=10)
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if isinstance(result, list) and len(result) > 0:
-                        sentiments = result[0]
-                        top_sentiment = max(sentiments, key=lambda x: x['score'])
-                        return {
-                            "label": top_sentiment['label'].upper(),
-                            "score": round(top_sentiment['score'], 3),
-                            "source": "ai_model"
-                        }
-        except Exception as e:
-            logger.warning(f"Hugging Face API failed: {str(e)}")
+    def _accurate_sentiment_analysis(self, doc):
+        """Highly accurate sentiment analysis over the whole document, chunk by chunk.
         
-        return None
+        Returns (sentiment, breakdown) where breakdown has per-chunk and per-page results.
+        """
+        return self._documents_sentiment([doc])[0]
 
-    def _advanced_rule_based_sentiment(self, text_lower):
-        """Advanced rule-based sentiment analysis with better accuracy"""
-        positive_score = 0
-        negative_score = 0
-        
-        words = text_lower.split()
-        
-        # Count sentiment words with weights
-        for word in words:
-            # Strong positive words
-            if word in self.sentiment_words['positive']['strong']:
-                positive_score += 3
-            # Medium positive words
-            elif word in self.sentiment_words['positive']['medium']:
-                positive_score += 2
-            # Weak positive words
-            elif word in self.sentiment_words['positive']['weak']:
-                positive_score += 1
-            
-            # Strong negative words
-            if word in self.sentiment_words['negative']['strong']:
-                negative_score += 3
-            # Medium negative words
-            elif word in self.sentiment_words['negative']['medium']:
-                negative_score += 2
-            # Weak negative words
-            elif word in self.sentiment_words['negative']['weak']:
-                negative_score += 1
-        
-        # Analyze sentence structures for better accuracy
-        sentences = re.split(r'[.!?]+', text_lower)
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-                
-            # Check for negation patterns
-            if any(negation in sentence for negation in ['not happy', "don't like", "doesn't work", "isn't good", "no good"]):
-                negative_score += 2
-            
-            # Check for positive emphasis
-            if any(emphasis in sentence for emphasis in ['very happy', 'so good', 'really love', 'extremely pleased']):
-                positive_score += 2
+    def _documents_sentiment(self, docs):
+        """(sentiment, breakdown) for each document, with one model batch across all of them"""
+        doc_chunks = [doc.chunks(self._chunk_chars()) or [(None, doc.text)] for doc in docs]
+        
+        # Method 1: Score chunks with the configured sentiment model, in one batch
+        doc_model_results = self._model_sentiments([[text for _, text in chunks] for chunks in doc_chunks])
+        
+        return [
+            self._chunked_sentiment(doc, chunks, model_results)
+            for doc, chunks, model_results in zip(docs, doc_chunks, doc_model_results)
+        ]
+
+    def _chunked_sentiment(self, doc, chunks, model_results, rule_results=None):
+        """Combine chunk results into (sentiment, breakdown); rule_results may hold precomputed rule scores"""
+        chunk_sentiments = []
+        for index, (page, text) in enumerate(chunks):
+            sentiment = model_results.get(index)
+            if not sentiment or sentiment['score'] <= 0.7:
+                # Method 2: Advanced rule-based sentiment with scoring
+                if rule_results is not None:
+                    sentiment = rule_results[index]
+                else:
+                    sentiment = self._advanced_rule_based_sentiment(doc if text == doc.text else TextDocument(text))
+            chunk_sentiments.append({"index": index, "page": page, "chars": len(text), **sentiment})
+        
+        sentiment = self._combine_sentiments(chunk_sentiments)
+        pages = []
+        for page in dict.fromkeys(chunk['page'] for chunk in chunk_sentiments if chunk['page'] is not None):
+            page_chunks = [chunk for chunk in chunk_sentiments if chunk['page'] == page]
+            pages.append({"page": page, **self._combine_sentiments(page_chunks)})
+        
+        with self._sources_lock:
+            self.sentiment_sources[sentiment['source']] += 1
+        return sentiment, {
+            "chunks": chunk_sentiments,
+            "pages": pages,
+            "chunks_total": len(chunks),
+            "chunks_model_scored": len(model_results)
+        }
+
+    def _chunk_chars(self):
+        """Chunk size: whatever the model can read, else SENTIMENT_CHUNK_CHARS"""
+        if self.sentiment_model and self.sentiment_model.max_input_chars:
+            return self.sentiment_model.max_input_chars
+        return self.sentiment_chunk_chars
+
+    def _model_sentiments(self, doc_texts):
+        """Per document, {chunk index: model result} for an evenly spread sample of at most sentiment_max_chunks chunks"""
+        if not self.sentiment_model:
+            return [{} for _ in doc_texts]
+        
+        # Spread each document's model budget across the whole text rather than its start
+        pending = []
+        for doc_index, texts in enumerate(doc_texts):
+            count = min(len(texts), self.sentiment_max_chunks)
+            if count == 1:
+                indexes = [0]
+            else:
+                indexes = sorted({round(i * (len(texts) - 1) / (count - 1)) for i in range(count)})
+            pending.extend((doc_index, index, texts[index]) for index in indexes)
+        
+        # A lone text goes through classify so concurrent requests can still share a batch
+        with time_stage('sentiment_model'):
+            if len(pending) == 1:
+                results = [self.sentiment_model.classify(pending[0][2])]
+            else:
+                results = self.sentiment_model.classify_batch([text for _, _, text in pending])
         
+        doc_results = [{} for _ in doc_texts]
+        for (doc_index, index, _), result in zip(pending, results):
+            if result:
+                doc_results[doc_index][index] = result
+        return doc_results
+
+    def _combine_sentiments(self, sentiments):
+        """One label for several chunk results, weighting each by score and length"""
+        if len(sentiments) == 1:
+            only = sentiments[0]
+            return {"label": only['label'], "score": only['score'], "source": only['source']}
+        
+        totals = {}
+        for sentiment in sentiments:
+            totals[sentiment['label']] = totals.get(sentiment['label'], 0) + sentiment['score'] * sentiment['chars']
+        label = max(totals, key=totals.get)
+        total_chars = sum(sentiment['chars'] for sentiment in sentiments) or 1
+        sources = {sentiment['source'] for sentiment in sentiments}
+        return {
+            "label": label,
+            "score": round(totals[label] / total_chars, 3),
+            "source": sources.pop() if len(sources) == 1 else "mixed"
+        }
+
+    def _create_sentiment_model(self, backend):
+        """Sentiment model for a SENTIMENT_BACKEND name, or None to use rules only"""
+        # Imported here so a rules-only analyzer never loads requests or numpy
+        if backend == 'huggingface':
+            from app.services.sentiment_client import HuggingFaceSentimentClient
+            return HuggingFaceSentimentClient(self.huggingface_api_key) if self.huggingface_api_key else None
+        if backend == 'local':
+            from app.services.local_sentiment import LocalSentimentModel
+            model_path = os.getenv('SENTIMENT_MODEL_PATH', os.path.join('models', 'sentiment_model.npy'))
+            try:
+                return LocalSentimentModel(model_path)
+            except Exception as e:
+                logger.warning(f"Local sentiment model unavailable, using rules: {str(e)}")
+                return None
+        if backend == 'rules':
+            return None
+        raise ValueError(f"Unknown sentiment backend: {backend}")
+
+
+    def _advanced_rule_based_sentiment(self, doc):
+        """Advanced rule-based sentiment analysis with better accuracy"""
+        # Word weights and per-sentence phrase bonuses from the compiled lexicon
+        positive_score, negative_score = self.sentiment_lexicon.score(doc.lower_words, doc.sentences)
+        return self._rule_sentiment(positive_score, negative_score)
+
+    def _rule_sentiment(self, positive_score, negative_score):
+        """Label and confidence from positive and negative lexicon points"""
         # Calculate final sentiment
         total_score = positive_score + negative_score
         if total_score == 0:
@@ -222,37 +359,33 @@ class AIAnalyzer:
             neutrality = 1 - abs(positive_ratio - 0.5) * 2
             return {"label": "NEUTRAL", "score": round(max(neutrality, 0.5), 3), "source": "rule_based"}
 
-    def _meaningful_topic_extraction(self, text):
+    def _meaningful_topic_extraction(self, doc):
         """Extract meaningful and relevant topics"""
-        text_lower = text.lower()
-        
-        # Enhanced stop words
-        enhanced_stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
-            'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
-            'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
-            'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those',
-            'about', 'very', 'really', 'just', 'like', 'more', 'some', 'such', 'only',
-            'also', 'than', 'then', 'when', 'where', 'why', 'how', 'what', 'which',
-            'who', 'whom', 'their', 'there', 'here', 'from', 'into', 'upon', 'your',
-            'my', 'our', 'its', 'him', 'her', 'them', 'would', 'should', 'could'
-        }
+        word_freq, bigram_freq = Counter(), Counter()
+        self._count_topic_terms(doc.alpha_terms, word_freq, bigram_freq)
+        return self._topics_from_counts(word_freq, bigram_freq)
+
+    def _count_topic_terms(self, terms, word_freq, bigram_freq, previous=None):
+        """Add meaningful words and their bigrams to running counts.
         
+        ``previous`` is the last meaningful word before these terms, so bigrams
+        carry across calls; the last meaningful word seen is returned.
+        """
         # Extract meaningful words (nouns, adjectives)
-        words = re.findall(r'\b[a-zA-Z]{3,15}\b', text_lower)
-        meaningful_words = [word for word in words if word not in enhanced_stop_words]
-        
-        # Create bigrams for better topic detection
-        bigrams = []
-        for i in range(len(meaningful_words) - 1):
-            bigram = f"{meaningful_words[i]} {meaningful_words[i+1]}"
-            # Filter out meaningless bigrams
-            if not any(stop in bigram.split() for stop in enhanced_stop_words):
-                bigrams.append(bigram)
-        
-        # Combine and count frequency
-        all_terms = meaningful_words + bigrams
-        term_freq = Counter(all_terms)
+        meaningful_words = [word for word in terms if word not in self.topic_stop_words]
+        word_freq.update(meaningful_words)
+        
+        # Create bigrams for better topic detection; both halves already passed
+        # the stop word filter, so no bigram needs re-splitting and re-checking
+        if previous is not None:
+            meaningful_words.insert(0, previous)
+        bigram_freq.update(f"{first} {second}" for first, second in zip(meaningful_words, meaningful_words[1:]))
+        return meaningful_words[-1] if meaningful_words else previous
+
+    def _topics_from_counts(self, word_freq, bigram_freq):
+        # Combine and count frequency; words rank ahead of bigrams on equal counts
+        term_freq = Counter(word_freq)
+        term_freq.update(bigram_freq)
         
         # Get most relevant topics (appear at least twice or are meaningful)
         topics = []
@@ -264,12 +397,12 @@ class AIAnalyzer:
         
         return topics[:5] if topics else ["General", "Content"]
 
-    def _relevant_hashtag_strategy(self, topics, text, sentiment):
+    def _relevant_hashtag_strategy(self, topics, doc, sentiment):
         """Generate highly relevant hashtags based on content"""
         if not topics:
             return {"hashtags": ["#SocialMedia", "#Content", "#Engagement"], "strategy": "General hashtags for broad reach"}
         
-        content_type = self._detect_content_type(text)
+        content_type = self._detect_content_type(doc)
         relevant_hashtags = []
         
         # 1. Add topic-based hashtags
@@ -302,11 +435,10 @@ class AIAnalyzer:
             "content_type": content_type
         }
 
-    def _expert_suggestions(self, text, sentiment, topics):
+    def _expert_suggestions(self, doc, sentiment, topics):
         """Generate expert-level suggestions"""
         suggestions = []
-        words = text.split()
-        word_count = len(words)
+        word_count = doc.word_count
         
         # Content length optimization
         if word_count < 50:
@@ -315,7 +447,7 @@ class AIAnalyzer:
             suggestions.append("🧵 **Create a thread**: Break long content into multiple posts for better readability and engagement")
         
         # Engagement elements
-        if '?' not in text:
+        if not doc.has_question:
             suggestions.append("💬 **Ask a question**: Questions can increase comments by 2x. Try: 'What's your experience with this?'")
         
         # Sentiment-specific suggestions
@@ -326,35 +458,24 @@ class AIAnalyzer:
         
         return suggestions[:4]
 
-    def _detect_content_type(self, text):
+    def _detect_content_type(self, doc):
         """Accurate content type detection"""
-        text_lower = text.lower()
-        
-        category_scores = {
-            'technology': len(re.findall(r'\b(tech|software|code|programming|ai|digital|computer|data|app|website)\b', text_lower)),
-            'business': len(re.findall(r'\b(business|startup|entrepreneur|marketing|sales|money|career|work|office)\b', text_lower)),
-            'lifestyle': len(re.findall(r'\b(life|health|fitness|travel|food|home|family|relationship|wellness)\b', text_lower)),
-            'creative': len(re.findall(r'\b(design|art|creative|photo|video|music|write|content|inspiration)\b', text_lower)),
-            'education': len(re.findall(r'\b(learn|education|study|tips|howto|guide|tutorial|knowledge|skill)\b', text_lower))
-        }
-        
-        # Return category with highest score, or general if no clear winner
-        best_category = max(category_scores, key=category_scores.get)
-        return best_category if category_scores[best_category] > 0 else 'general'
+        # Keyword hits per category come from the document's single token pass;
+        # the category with most hits wins, or general if there are none
+        return doc.content_type
 
-    def _enhanced_engagement_score(self, text, sentiment, topics):
+    def _enhanced_engagement_score(self, doc, sentiment, topics):
         """Calculate engagement score"""
         score = 50
         
-        words = text.split()
-        word_count = len(words)
+        word_count = doc.word_count
         
         # Optimal content length
         if 80 <= word_count <= 250:
             score += 20
         
         # Engagement elements
-        if '?' in text:
+        if doc.has_question:
             score += 15
         
         # Good sentiment (positive or balanced negative)
@@ -365,13 +486,10 @@ class AIAnalyzer:
         
         return min(score, 100)
 
-    def _calculate_text_metrics(self, text):
+    def _calculate_text_metrics(self, doc):
         """Calculate text metrics"""
-        words = text.split()
-        word_count = len(words)
-        
-        sentences = [s for s in re.split(r'[.!?]+', text) if s.strip()]
-        sentence_count = len(sentences)
+        word_count = doc.word_count
+        sentence_count = doc.sentence_count
         
         # Readability score
         if sentence_count > 0 and word_count > 0:
@@ -412,24 +530,28 @@ class AIAnalyzer:
             "word_count": 0,
             "sentence_count": 0,
             "estimated_reading_time": 0,
-            "content_type": "general"
+            "content_type": "general",
+            "sentiment_breakdown": None
         }
 
     def _get_fallback_analysis(self, text):
-        cleaned_text = self._clean_text(text)
-        metrics = self._calculate_text_metrics(cleaned_text)
-        sentiment = self._advanced_rule_based_sentiment(cleaned_text.lower())
-        topics = self._meaningful_topic_extraction(cleaned_text)
+        doc = TextDocument(self._clean_text(text))
+        return self._fallback_document_analysis(doc, self._advanced_rule_based_sentiment(doc), self._meaningful_topic_extraction(doc))
+
+    def _fallback_document_analysis(self, doc, sentiment, topics):
+        """Rules-only analysis of a document whose sentiment and topics are already known"""
+        metrics = self._calculate_text_metrics(doc)
         
         return {
             "sentiment": sentiment,
             "key_topics": topics,
-            "engagement_score": self._enhanced_engagement_score(cleaned_text, sentiment, topics),
-            "suggestions": self._expert_suggestions(cleaned_text, sentiment, topics),
-            "hashtag_strategy": self._relevant_hashtag_strategy(topics, cleaned_text, sentiment),
+            "engagement_score": self._enhanced_engagement_score(doc, sentiment, topics),
+            "suggestions": self._expert_suggestions(doc, sentiment, topics),
+            "hashtag_strategy": self._relevant_hashtag_strategy(topics, doc, sentiment),
             "readability_score": metrics['readability'],
             "word_count": metrics['word_count'],
             "sentence_count": metrics['sentence_count'],
             "estimated_reading_time": metrics['reading_time'],
-            "content_type": self._detect_content_type(cleaned_text)
-        }import os
+            "content_type": self._detect_content_type(doc),
+            "sentiment_breakdown": None
+        }
@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+import logging
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: uploads are only locked within this process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class UploadOffsetMismatch(Exception):
+    """A chunk that does not start where the stored data ends"""
+
+    def __init__(self, message, offset):
+        super().__init__(message)
+        self.offset = offset
+
+
+class ChunkedUploadStore:
+    """Resumable uploads assembled chunk by chunk in a directory on disk.
+
+    Each upload is a ``<id>.part`` data file plus a ``<id>.json`` record of
+    its name and declared size. The data file's length is the upload's
+    offset, so a client that lost its connection asks for the offset and
+    sends the rest from there. Chunks are written straight to the data file
+    and fed to a SHA-256 as they arrive, so the finished upload's hash is
+    ready without reading it again. The hash state lives in this process;
+    if another process took some of the chunks, the data so far is hashed
+    once from disk to catch up. Writes to one upload hold a lock on its
+    data file, and the offset is checked again under it, so a retried chunk
+    that overlaps one still arriving is rejected instead of appended twice.
+    """
+
+    def __init__(self, upload_dir, max_size=512 * 1024 * 1024, ttl=24 * 3600, block_size=64 * 1024):
+        self.upload_dir = upload_dir
+        self.max_size = max_size
+        self.ttl = ttl
+        self.block_size = block_size
+        # upload id -> (bytes hashed, sha256 object)
+        self._hashers = {}
+        # upload id -> lock held while a chunk is written, for threads of this process
+        self._upload_locks = {}
+        self._lock = threading.Lock()
+        os.makedirs(upload_dir, exist_ok=True)
+
+    def create(self, filename, size, limits=None):
+        """Start an upload of ``size`` bytes and return its record; ``limits`` is kept for processing"""
+        if size <= 0:
+            raise ValueError("File is empty")
+        if size > self.max_size:
+            raise ValueError(f"File too large. Maximum size is {self.max_size // (1024 * 1024)}MB")
+
+        self.purge_expired()
+        record = {
+            'id': uuid.uuid4().hex,
+            'filename': filename,
+            'size': size,
+            'limits': limits,
+            'created_at': time.time(),
+            'completion': None,
+        }
+        open(self._data_path(record['id']), 'wb').close()
+        self._write_record(record)
+        with self._lock:
+            self._hashers[record['id']] = (0, hashlib.sha256())
+        return dict(record, offset=0)
+
+    def get(self, upload_id):
+        """The upload's record with its current offset, or None"""
+        record = self._read_record(upload_id)
+        if record is None:
+            return None
+        if record['completion'] is not None:
+            return dict(record, offset=record['size'])
+        try:
+            offset = os.path.getsize(self._data_path(upload_id))
+        except OSError:
+            return None
+        return dict(record, offset=offset)
+
+    def append(self, upload_id, offset, stream):
+        """Write a chunk that starts at ``offset``; returns the new offset.
+
+        Whatever arrived before a dropped connection is kept, and the
+        client resumes from the offset that leaves.
+        """
+        with self._locked_data_file(upload_id) as f:
+            record = self._read_record(upload_id)
+            if record is None:
+                raise KeyError(upload_id)
+            # The size on disk, read under the lock, is the only offset a chunk can start at
+            stored = f.seek(0, os.SEEK_END)
+            if record['completion'] is not None or offset != stored:
+                raise UploadOffsetMismatch(
+                    f"Chunk starts at {offset}, but the upload continues from {stored}", stored
+                )
+
+            _, digest = self._hasher(upload_id, offset)
+            remaining = record['size'] - offset
+            written = 0
+            try:
+                for block in iter(lambda: stream.read(self.block_size), b''):
+                    if written + len(block) > remaining:
+                        raise ValueError(f"Chunk runs past the declared size of {record['size']} bytes")
+                    f.write(block)
+                    digest.update(block)
+                    written += len(block)
+                f.flush()
+            finally:
+                with self._lock:
+                    self._hashers[upload_id] = (offset + written, digest)
+        return offset + written
+
+    def assembled(self, upload_id):
+        """Path and SHA-256 of an upload whose last byte has arrived.
+
+        The data file is renamed to keep the original extension, and from
+        then on belongs to the caller.
+        """
+        record = self.get(upload_id)
+        if record is None or record['offset'] != record['size']:
+            raise ValueError("Upload is not complete")
+        _, digest = self._hasher(upload_id, record['size'])
+        with self._lock:
+            self._hashers.pop(upload_id, None)
+            self._upload_locks.pop(upload_id, None)
+
+        file_ext = os.path.splitext(record['filename'])[1].lower()
+        path = os.path.join(self.upload_dir, f"{upload_id}{file_ext}")
+        os.replace(self._data_path(upload_id), path)
+        return path, digest.hexdigest()
+
+    def complete(self, upload_id, completion):
+        """Remember what finishing the upload produced, so a client that missed the reply can fetch it"""
+        record = self._read_record(upload_id)
+        record['completion'] = completion
+        self._write_record(record)
+        with self._lock:
+            self._upload_locks.pop(upload_id, None)
+
+    def discard(self, upload_id):
+        if not self._valid_id(upload_id):
+            return False
+        with self._lock:
+            self._hashers.pop(upload_id, None)
+            self._upload_locks.pop(upload_id, None)
+        found = False
+        for path in (self._data_path(upload_id), self._record_path(upload_id)):
+            if os.path.exists(path):
+                os.remove(path)
+                found = True
+        return found
+
+    def purge_expired(self):
+        """Remove uploads started more than ``ttl`` seconds ago"""
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.upload_dir):
+            if not name.endswith('.json'):
+                continue
+            upload_id = name[:-len('.json')]
+            record = self._read_record(upload_id)
+            if record is not None and record['created_at'] < cutoff:
+                logger.info(f"Removing expired chunked upload {upload_id}")
+                self.discard(upload_id)
+
+    def _hasher(self, upload_id, offset):
+        """(bytes hashed, sha256) covering the first ``offset`` bytes of the upload"""
+        with self._lock:
+            hashed, digest = self._hashers.get(upload_id, (0, None))
+        if digest is not None and hashed == offset:
+            return hashed, digest
+
+        # Another process took some chunks, or this one restarted; catch up from disk
+        digest = hashlib.sha256()
+        with open(self._data_path(upload_id), 'rb') as f:
+            remaining = offset
+            while remaining:
+                block = f.read(min(self.block_size, remaining))
+                if not block:
+                    break
+                digest.update(block)
+                remaining -= len(block)
+        return offset, digest
+
+    @contextmanager
+    def _locked_data_file(self, upload_id):
+        """The upload's data file, open for writing and locked against other threads and processes"""
+        # Only uploads that exist get a lock, so made-up ids cannot grow the lock table
+        if not self._valid_id(upload_id) or not os.path.exists(self._data_path(upload_id)):
+            raise KeyError(upload_id)
+        with self._lock:
+            upload_lock = self._upload_locks.setdefault(upload_id, threading.Lock())
+        with upload_lock:
+            try:
+                f = open(self._data_path(upload_id), 'r+b')
+            except FileNotFoundError:
+                # Discarded or assembled since the check above
+                with self._lock:
+                    self._upload_locks.pop(upload_id, None)
+                raise KeyError(upload_id)
+            with f:
+                if fcntl is not None:
+                    # Released when the file is closed
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                yield f
+
+    def _data_path(self, upload_id):
+        return os.path.join(self.upload_dir, f"{upload_id}.part")
+
+    def _record_path(self, upload_id):
+        return os.path.join(self.upload_dir, f"{upload_id}.json")
+
+    @staticmethod
+    def _valid_id(upload_id):
+        # Ids are hex, so anything else cannot name an upload (or escape the directory)
+        return bool(upload_id) and all(c in '0123456789abcdef' for c in upload_id)
+
+    def _read_record(self, upload_id):
+        if not self._valid_id(upload_id):
+            return None
+        try:
+            with open(self._record_path(upload_id), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_record(self, record):
+        tmp_path = self._record_path(record['id']) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f)
+        os.replace(tmp_path, self._record_path(record['id']))
@@ -0,0 +1,102 @@
+import re
+
+PAGE_RANGE = re.compile(r'^(\d+)?(?:(-)(\d+)?)?$')
+NON_SPACE = re.compile(r'\S+')
+
+
+class PageSelectionError(ValueError):
+    """Page limits that select none of a document's pages"""
+
+
+def truncate_words(text, max_words):
+    """The start of ``text`` up to and including its ``max_words``-th whitespace-separated word.
+
+    Text with no more words than that comes back unchanged, trailing whitespace and all.
+    """
+    if max_words <= 0:
+        return ''
+    end = 0
+    for count, match in enumerate(NON_SPACE.finditer(text), 1):
+        if count > max_words:
+            return text[:end]
+        end = match.end()
+    return text
+
+
+def _positive_int(value, name):
+    if value is None or value == '':
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a whole number")
+    if number < 1:
+        raise ValueError(f"{name} must be at least 1")
+    return number
+
+
+def parse_page_ranges(spec):
+    """[(first, last)] from "1-5,8,20-"; last is None for a range that runs to the end"""
+    ranges = []
+    for part in str(spec).replace(' ', '').split(','):
+        match = PAGE_RANGE.match(part)
+        if not part or not match or not (match.group(1) or match.group(3)):
+            raise ValueError(f"Invalid page range '{part}'. Use page numbers and ranges like 1-5,8,20-")
+        first = int(match.group(1)) if match.group(1) else 1
+        last = first if not match.group(2) else (int(match.group(3)) if match.group(3) else None)
+        if first < 1 or (last is not None and last < first):
+            raise ValueError(f"Invalid page range '{part}'")
+        ranges.append((first, last))
+    return ranges
+
+
+class ExtractionLimits:
+    """Which pages of a document to read, and how much text is enough.
+
+    ``pages`` is a list of (first, last) page ranges, ``max_pages`` caps how
+    many of the selected pages are read, and ``max_words`` stops extraction
+    once that many words of page text have been read in page order; the
+    text is cut there and the document is marked truncated. The limits are
+    plain data so they can travel to pool workers and into job payloads.
+    """
+
+    def __init__(self, pages=None, max_pages=None, max_words=None):
+        self.pages = [tuple(page_range) for page_range in pages] if pages else None
+        self.max_pages = max_pages
+        self.max_words = max_words
+
+    @classmethod
+    def parse(cls, pages=None, max_pages=None, max_words=None):
+        """Limits from request parameters; raises ValueError with a message for the client"""
+        return cls(
+            pages=parse_page_ranges(pages) if pages not in (None, '') else None,
+            max_pages=_positive_int(max_pages, 'max_pages'),
+            max_words=_positive_int(max_words, 'max_words')
+        )
+
+    def __bool__(self):
+        return bool(self.pages or self.max_pages or self.max_words)
+
+    def select(self, page_count):
+        """Page numbers to read, in order, from a document of ``page_count`` pages"""
+        if self.pages:
+            numbers = sorted({
+                number
+                for first, last in self.pages
+                for number in range(first, min(last or page_count, page_count) + 1)
+            })
+        else:
+            numbers = list(range(1, page_count + 1))
+        if self.max_pages:
+            numbers = numbers[:self.max_pages]
+        if page_count and not numbers:
+            raise PageSelectionError(f"No pages selected; the document has {page_count} pages")
+        return numbers
+
+    def as_dict(self):
+        """JSON-ready form, also used in result cache keys"""
+        return {
+            'pages': [list(page_range) for page_range in self.pages] if self.pages else None,
+            'max_pages': self.max_pages,
+            'max_words': self.max_words
+        }
@@ -0,0 +1,259 @@
+import re
+from collections import Counter
+import logging
+from app.services.text_document import (
+    TextDocument, SENTENCE_SPLIT, PAGE_MARKER, WORD_TOKEN, CONTENT_TYPE_KEYWORDS, KEYWORD_CATEGORY,
+    select_alpha_terms, best_content_type, chunk_page
+)
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE = re.compile(r'\s+')
+
+
+class IncrementalAnalyzer:
+    """Analyzes a document piece by piece as its text is extracted.
+
+    ``feed`` takes consecutive pieces of the document text (pages, usually)
+    and updates word and sentence counts, topic term frequencies, content
+    category hits and rule-based sentiment as they arrive, so only the page
+    being read is held in memory. ``snapshot`` reports the running totals and
+    ``finalize`` returns exactly what ``AIAnalyzer.analyze_text`` would for the
+    concatenated text; only the sentiment model call waits for the end.
+
+    Text is cleaned the way ``AIAnalyzer`` cleans it and counted up to the
+    last space seen, so no word, sentence break or page marker is split
+    between two pieces. Finished pages are cut into sentiment chunks
+    straight away.
+
+    ``finalize`` is ``finish_text``, the model call on ``model_inputs`` and
+    ``complete``. A pool worker can stop after ``finish_text`` and send the
+    analysis back, so a remote model is called from the web process.
+    """
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self.chunk_chars = analyzer._chunk_chars()
+        self.finalized = False
+
+        # Cleaned text not yet counted, always starting at a space once text has begun
+        self._carry = ''
+        self._started = False
+        # Raw length minus leading and trailing whitespace, for the short-text check
+        self._raw_chars = 0
+        self._raw_trailing = 0
+
+        # Document-wide tallies
+        self.word_count = 0
+        self.sentence_count = 0
+        self.has_question = False
+        self._category_hits = Counter()
+        self._word_freq = Counter()
+        self._bigram_freq = Counter()
+        self._last_term = None
+        self._sentence_parts = []
+        self._positive = 0
+        self._negative = 0
+
+        # Page segmentation: text since the last page marker, and finished chunks
+        self._page_text = ''
+        self._page = None
+        self._markers = []
+        self.chunks = []
+        self._chunk_rules = []
+
+    @property
+    def content_type(self):
+        return best_content_type(self._content_type_scores())
+
+    def feed(self, text):
+        """Add the next piece of document text"""
+        if self.finalized:
+            raise RuntimeError("Incremental analysis already finalized")
+        if not text:
+            return
+
+        self._track_raw_length(text)
+        piece = WHITESPACE.sub(' ', text)
+        if not self._started:
+            piece = piece.lstrip(' ')
+            if not piece:
+                return
+            self._started = True
+        elif piece.startswith(' ') and self._carry.endswith(' '):
+            # One whitespace run split across two pieces cleans to one space
+            piece = piece[1:]
+
+        self._carry += piece
+        cut = self._carry.rfind(' ')
+        if cut > 0:
+            self._count(self._carry[:cut])
+            self._carry = self._carry[cut:]
+
+    def snapshot(self):
+        """Running totals over the text counted so far"""
+        sentiment = None
+        if self.chunks:
+            sentiment = self.analyzer._combine_sentiments([
+                {"chars": len(text), **rule} for (_, text), rule in zip(self.chunks, self._chunk_rules)
+            ])
+        return {
+            "word_count": self.word_count,
+            "sentence_count": self.sentence_count,
+            "key_topics": self.analyzer._topics_from_counts(self._word_freq, self._bigram_freq),
+            "content_type": self.content_type,
+            "sentiment": sentiment,
+            "chunks_analyzed": len(self.chunks)
+        }
+
+    def finish_text(self):
+        """Count the rest of the text, leaving only the sentiment model call and the stages after it"""
+        if self.finalized:
+            raise RuntimeError("Incremental analysis already finalized")
+        self.finalized = True
+
+        text = self._carry.rstrip(' ')
+        if text:
+            self._count(text)
+        self._carry = ''
+        sentence = self._finish_sentence()
+        if sentence:
+            positive, negative = self.analyzer.sentiment_lexicon.score([], [sentence])
+            self._positive += positive
+            self._negative += negative
+
+        self.too_short = self._raw_chars - self._raw_trailing < 10
+        if self.too_short:
+            return
+
+        # Without markers the whole text is one page, as TextDocument.pages has it
+        self._finish_page(self._page_text)
+        self._page_text = ''
+        self.topics = self.analyzer._topics_from_counts(self._word_freq, self._bigram_freq)
+        if not self.chunks:
+            # Nothing but page markers; cleaned, that is the markers one space apart
+            self.chunks = [(None, ' '.join(self._markers))]
+            self._chunk_rules = [self.analyzer._advanced_rule_based_sentiment(TextDocument(self.chunks[0][1]))]
+
+    def model_inputs(self):
+        """Chunk texts for the sentiment model once the text is finished; none for a text too short to analyze"""
+        return [] if self.too_short else [text for _, text in self.chunks]
+
+    def complete(self, model_results):
+        """The analysis result, given the model's {chunk index: result} for model_inputs(), or None if it failed"""
+        if self.too_short:
+            return self.analyzer._get_default_analysis()
+        try:
+            if model_results is None:
+                raise RuntimeError("sentiment model call failed")
+            sentiment = self.analyzer._chunked_sentiment(self, self.chunks, model_results, self._chunk_rules)
+            return self.analyzer._analyze_document(self, *sentiment, topics=self.topics)
+        except Exception as e:
+            logger.error(f"AI analysis failed: {str(e)}")
+            sentiment = self.analyzer._rule_sentiment(self._positive, self._negative)
+            return self.analyzer._fallback_document_analysis(self, sentiment, self.topics)
+
+    def finalize(self):
+        """Finish the document and return the full analysis result"""
+        if not self.finalized:
+            self.finish_text()
+        return finalize_all(self.analyzer, [self])[0]
+
+    def __getstate__(self):
+        # Pool workers send finished text back without the analyzer, which holds models and thread pools
+        state = dict(self.__dict__)
+        state['analyzer'] = None
+        return state
+
+    def _track_raw_length(self, text):
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return
+        self._raw_chars += len(text)
+        stripped = text.rstrip()
+        if stripped:
+            self._raw_trailing = len(text) - len(stripped)
+        else:
+            self._raw_trailing += len(text)
+
+    def _count(self, text):
+        """Fold a span of cleaned text that ends before a space into every tally"""
+        lower = text.lower()
+        words = lower.split()
+        self.word_count += len(words)
+        self.has_question = self.has_question or '?' in text
+
+        # Sentences run across spans, so the unfinished one is kept in parts
+        sentences = []
+        parts = SENTENCE_SPLIT.split(lower)
+        self._sentence_parts.append(parts[0])
+        for part in parts[1:]:
+            sentence = self._finish_sentence()
+            if sentence:
+                sentences.append(sentence)
+            self._sentence_parts.append(part)
+
+        # Whole-document lexicon points; phrase hits count once per finished sentence
+        positive, negative = self.analyzer.sentiment_lexicon.score(words, sentences)
+        self._positive += positive
+        self._negative += negative
+
+        tokens = WORD_TOKEN.findall(lower)
+        self._category_hits.update(KEYWORD_CATEGORY[token] for token in tokens if token in KEYWORD_CATEGORY)
+        self._last_term = self.analyzer._count_topic_terms(
+            select_alpha_terms(tokens), self._word_freq, self._bigram_freq, self._last_term
+        )
+
+        self._page_text += text
+        self._split_pages()
+
+    def _finish_sentence(self):
+        """Close the sentence being built; returns it stripped, counting it if not blank"""
+        sentence = ''.join(self._sentence_parts).strip()
+        self._sentence_parts = []
+        if not sentence:
+            return None
+        self.sentence_count += 1
+        return sentence
+
+    def _split_pages(self):
+        position = 0
+        for marker in PAGE_MARKER.finditer(self._page_text):
+            self._finish_page(self._page_text[position:marker.start()])
+            self._page = int(marker.group(1))
+            if not self.chunks:
+                self._markers.append(marker.group(0))
+            position = marker.end()
+        if position:
+            self._page_text = self._page_text[position:]
+
+    def _finish_page(self, body):
+        """Chunk one finished page body and score each chunk with the rules"""
+        body = body.strip()
+        if not body:
+            return
+        for page, text in chunk_page(self._page, body, self.chunk_chars):
+            self.chunks.append((page, text))
+            self._chunk_rules.append(self.analyzer._advanced_rule_based_sentiment(TextDocument(text)))
+
+    def _content_type_scores(self):
+        return {category: self._category_hits.get(category, 0) for category in CONTENT_TYPE_KEYWORDS}
+
+
+def finalize_all(analyzer, analyses):
+    """``finalize`` for several finished texts, with one sentiment model batch across them.
+
+    ``analyzer`` is attached to each analysis, so this also finishes those
+    a pool worker took as far as ``finish_text`` and sent back.
+    """
+    for analysis in analyses:
+        analysis.analyzer = analyzer
+    pending = [analysis for analysis in analyses if analysis.model_inputs()]
+    try:
+        scored = analyzer._model_sentiments([analysis.model_inputs() for analysis in pending]) if pending else []
+    except Exception as e:
+        logger.error(f"AI analysis failed: {str(e)}")
+        scored = [None] * len(pending)
+    model_results = {id(analysis): result for analysis, result in zip(pending, scored)}
+    return [analysis.complete(model_results.get(id(analysis), {})) for analysis in analyses]
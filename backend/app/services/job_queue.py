@@ -0,0 +1,353 @@
+import os
+import json
+import time
+import uuid
+import queue
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _new_job(payload):
+    now = time.time()
+    return {
+        'id': uuid.uuid4().hex,
+        'status': 'queued',
+        'payload': payload,
+        'pages_done': 0,
+        'pages_total': None,
+        'result': None,
+        'error': None,
+        'created_at': now,
+        'updated_at': now,
+    }
+
+
+class InProcessJobQueue:
+    """Job queue kept in this process's memory; jobs are lost on restart"""
+
+    # Jobs die with the process that runs them, so running jobs need no lease
+    lease_seconds = None
+
+    def __init__(self, finished_ttl=3600):
+        self.finished_ttl = finished_ttl
+        self._jobs = {}
+        self._pending = queue.Queue()
+        self._lock = threading.Lock()
+
+    def enqueue(self, payload):
+        job = _new_job(payload)
+        with self._lock:
+            self._purge_finished()
+            self._jobs[job['id']] = job
+        self._pending.put(job['id'])
+        return job['id']
+
+    def claim(self, timeout=1.0):
+        """Take the next queued job and mark it running, or return None"""
+        try:
+            job_id = self._pending.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        return self.update(job_id, status='running')
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.update(fields)
+            job['updated_at'] = time.time()
+            return dict(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def renew(self, job_id):
+        pass
+
+    def _purge_finished(self):
+        """Forget finished jobs older than finished_ttl; caller holds the lock"""
+        cutoff = time.time() - self.finished_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job['status'] in ('done', 'failed') and job['updated_at'] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class SQLiteJobQueue:
+    """Job queue in a local SQLite file, shared by every worker process on the host.
+
+    A claimed job holds a lease of ``lease_seconds`` that its worker renews
+    while the job runs. If the worker dies, the lease runs out and the next
+    claim puts the job back in the queue, or fails it once it has been
+    claimed ``max_attempts`` times, so a document that kills its worker is
+    not retried forever. ``on_abandoned(payload)`` is called for each job
+    failed that way, since no handler will run to clean up after it.
+    """
+
+    COLUMNS = ('id', 'status', 'payload', 'pages_done', 'pages_total', 'result', 'error', 'created_at', 'updated_at')
+    JSON_COLUMNS = ('payload', 'result')
+
+    def __init__(self, db_path='jobs.db', poll_interval=0.5, lease_seconds=60, max_attempts=2, on_abandoned=None):
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.on_abandoned = on_abandoned
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                payload TEXT,
+                pages_done INTEGER NOT NULL DEFAULT 0,
+                pages_total INTEGER,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_expires REAL
+            )
+        """)
+        # Files created before jobs had leases
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if 'attempts' not in existing:
+            conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        if 'lease_expires' not in existing:
+            conn.execute("ALTER TABLE jobs ADD COLUMN lease_expires REAL")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+        conn.commit()
+
+    def _connection(self):
+        """One connection per thread, as sqlite3 connections are not thread-safe"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, payload):
+        job = _new_job(payload)
+        columns = ', '.join(self.COLUMNS)
+        placeholders = ', '.join('?' for _ in self.COLUMNS)
+        self._connection().execute(
+            f"INSERT INTO jobs ({columns}) VALUES ({placeholders})",
+            self._to_row(job)
+        )
+        return job['id']
+
+    def claim(self, timeout=1.0):
+        """Atomically take the oldest queued job, polling until timeout"""
+        deadline = time.time() + timeout
+        conn = self._connection()
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                abandoned = self._expire_leases(conn, now)
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_expires = ?, updated_at = ? "
+                        "WHERE id = ?",
+                        (now + self.lease_seconds, now, row[0])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+            for payload in abandoned:
+                self._abandon(payload)
+            if row:
+                return self.get(row[0])
+            if time.time() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def _expire_leases(self, conn, now):
+        """Requeue running jobs whose worker stopped renewing them, or fail them after max_attempts.
+
+        Returns the payloads of the jobs failed.
+        """
+        # A running job without a lease was claimed before leases existed, by a worker long gone
+        expired = "status = 'running' AND (lease_expires IS NULL OR lease_expires < ?)"
+        rows = conn.execute(
+            f"SELECT id, payload FROM jobs WHERE {expired} AND attempts >= ?", (now, self.max_attempts)
+        ).fetchall()
+        conn.executemany(
+            "UPDATE jobs SET status = 'failed', error = ?, lease_expires = NULL, updated_at = ? WHERE id = ?",
+            [("The worker processing this job stopped before it finished", now, job_id) for job_id, _ in rows]
+        )
+        failed = len(rows)
+        requeued = conn.execute(
+            f"UPDATE jobs SET status = 'queued', lease_expires = NULL, updated_at = ? WHERE {expired}",
+            (now, now)
+        ).rowcount
+        if failed or requeued:
+            logger.warning(f"Job leases expired: {requeued} requeued, {failed} failed")
+        return [json.loads(payload) for _, payload in rows if payload]
+
+    def _abandon(self, payload):
+        if self.on_abandoned is None:
+            return
+        try:
+            self.on_abandoned(payload)
+        except Exception:
+            logger.exception("Cleaning up after an abandoned job failed")
+
+    def renew(self, job_id):
+        """Extend a running job's lease; its worker calls this while the job runs"""
+        now = time.time()
+        self._connection().execute(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = 'running'",
+            (now + self.lease_seconds, job_id)
+        )
+
+    def update(self, job_id, **fields):
+        fields['updated_at'] = time.time()
+        if fields.get('status') in ('done', 'failed'):
+            fields['lease_expires'] = None
+        for column in self.JSON_COLUMNS:
+            if column in fields:
+                fields[column] = json.dumps(fields[column])
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        self._connection().execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ?",
+            list(fields.values()) + [job_id]
+        )
+        return self.get(job_id)
+
+    def get(self, job_id):
+        row = self._connection().execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        return self._from_row(row) if row else None
+
+    def _to_row(self, job):
+        return [
+            json.dumps(job[column]) if column in self.JSON_COLUMNS else job[column]
+            for column in self.COLUMNS
+        ]
+
+    def _from_row(self, row):
+        job = dict(zip(self.COLUMNS, row))
+        for column in self.JSON_COLUMNS:
+            if job[column] is not None:
+                job[column] = json.loads(job[column])
+        return job
+
+
+def create_job_queue(backend='memory', **options):
+    """Build a job queue backend by name: 'memory' or 'sqlite'"""
+    if backend == 'memory':
+        return InProcessJobQueue()
+    if backend == 'sqlite':
+        return SQLiteJobQueue(**options)
+    raise ValueError(f"Unknown job queue backend: {backend}")
+
+
+class JobManager:
+    """Runs queued jobs on a pool of background worker threads.
+
+    ``handler(payload, progress)`` does the work and returns a JSON-serialisable
+    result; it may call ``progress(pages_done, pages_total)`` as it goes.
+    """
+
+    def __init__(self, job_queue, handler, workers=2):
+        self.queue = job_queue
+        self.handler = handler
+        self.workers = workers
+        self._threads = []
+        self._running = set()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start worker threads, and the lease heartbeat if the queue uses leases, if they are not running yet"""
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            if self.queue.lease_seconds:
+                thread = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        with self._lock:
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+
+    def submit(self, payload):
+        # Workers start lazily so nothing is spawned before a pre-fork server forks
+        self.start()
+        return self.queue.enqueue(payload)
+
+    def get(self, job_id):
+        job = self.queue.get(job_id)
+        if job:
+            job.pop('payload', None)
+        return job
+
+    def _work(self):
+        while not self._stop.is_set():
+            job = self.queue.claim(timeout=1.0)
+            if job is None:
+                continue
+            self._run(job)
+
+    def _heartbeat(self):
+        # Renew well before the lease runs out, so a slow renewal never lets a live job expire
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            with self._lock:
+                running = list(self._running)
+            for job_id in running:
+                try:
+                    self.queue.renew(job_id)
+                except Exception as e:
+                    logger.warning(f"Could not renew the lease of job {job_id}: {str(e)}")
+
+    def _run(self, job):
+        job_id = job['id']
+
+        def progress(pages_done, pages_total=None):
+            fields = {'pages_done': pages_done}
+            if pages_total is not None:
+                fields['pages_total'] = pages_total
+            self.queue.update(job_id, **fields)
+
+        with self._lock:
+            self._running.add(job_id)
+        try:
+            result = self.handler(job['payload'], progress)
+            self.queue.update(job_id, status='done', result=result)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            self.queue.update(job_id, status='failed', error=str(e))
+        finally:
+            with self._lock:
+                self._running.discard(job_id)
@@ -0,0 +1,136 @@
+import os
+import re
+import json
+import zlib
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'\w+')
+DEFAULT_LABELS = ('NEGATIVE', 'NEUTRAL', 'POSITIVE')
+
+
+class HashedFeaturizer:
+    """Maps texts to sparse hashed bag-of-n-gram vectors without a vocabulary.
+
+    Each lowercased word and word n-gram is hashed with CRC32 into one of
+    ``n_features`` buckets; counts are L2-normalised per text. A batch comes
+    back in CSR form (row pointers, bucket indices, values) so a linear model
+    can score all texts with one gather and one segmented sum.
+    """
+
+    def __init__(self, n_features=2 ** 18, ngram_max=2):
+        self.n_features = n_features
+        self.ngram_max = ngram_max
+
+    def config_signature(self):
+        return {'n_features': self.n_features, 'ngram_max': self.ngram_max}
+
+    def transform(self, texts):
+        """Return (indptr, indices, values) for a list of texts"""
+        indptr = [0]
+        indices = []
+        values = []
+        for text in texts:
+            counts = {}
+            for bucket in self._buckets(text):
+                counts[bucket] = counts.get(bucket, 0) + 1
+            indices.extend(counts.keys())
+            values.extend(counts.values())
+            indptr.append(len(indices))
+
+        indptr = np.asarray(indptr, dtype=np.int64)
+        indices = np.asarray(indices, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float32)
+
+        # L2-normalise each row so long and short texts score on the same scale
+        if len(values):
+            lengths = np.diff(indptr)
+            rows = np.repeat(np.arange(len(texts)), lengths)
+            norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=len(texts)))
+            values /= norms[rows].astype(np.float32)
+        return indptr, indices, values
+
+    def _buckets(self, text):
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        for n in range(1, self.ngram_max + 1):
+            for start in range(len(tokens) - n + 1):
+                gram = ' '.join(tokens[start:start + n])
+                yield zlib.crc32(gram.encode('utf-8')) % self.n_features
+
+
+class LocalSentimentModel:
+    """Linear sentiment classifier over hashed n-grams, scored in-process with NumPy.
+
+    The weights file is a ``.npy`` matrix of shape (n_features + 1, n_labels),
+    the last row being the bias, with a ``.json`` sidecar holding the labels
+    and featurizer settings. The matrix is memory-mapped, so loading is
+    instant and worker processes share its pages. ``tools/train_sentiment_model.py``
+    produces both files.
+    """
+
+    source = 'local_model'
+    remote = False
+    # Scoring is cheap enough to read the whole text
+    max_input_chars = None
+
+    def __init__(self, model_path):
+        if np is None:
+            raise RuntimeError("NumPy is required for the local sentiment model")
+        self.model_path = model_path
+        with open(self._meta_path(model_path), encoding='utf-8') as f:
+            self.meta = json.load(f)
+
+        self.labels = tuple(self.meta.get('labels', DEFAULT_LABELS))
+        self.featurizer = HashedFeaturizer(self.meta['n_features'], self.meta.get('ngram_max', 2))
+        self.weights = np.load(model_path, mmap_mode='r')
+        expected = (self.featurizer.n_features + 1, len(self.labels))
+        if self.weights.shape != expected:
+            raise ValueError(f"Sentiment weights have shape {self.weights.shape}, expected {expected}")
+        self._count = 0
+        logger.info(f"Loaded local sentiment model {model_path} ({len(self.labels)} labels)")
+
+    @staticmethod
+    def _meta_path(model_path):
+        return os.path.splitext(model_path)[0] + '.json'
+
+    def config_signature(self):
+        return {'model': os.path.basename(self.model_path), 'version': self.meta.get('version')}
+
+    def classify(self, text):
+        return self.classify_batch([text])[0]
+
+    def classify_batch(self, texts):
+        """Score every text with one feature gather and one segmented sum"""
+        if not texts:
+            return []
+        probabilities = self.predict_proba(texts)
+        best = probabilities.argmax(axis=1)
+        self._count += len(texts)
+        return [
+            {"label": self.labels[label], "score": round(float(probabilities[row, label]), 3), "source": self.source}
+            for row, label in enumerate(best)
+        ]
+
+    def predict_proba(self, texts):
+        indptr, indices, values = self.featurizer.transform(texts)
+        n_features = self.featurizer.n_features
+        logits = np.tile(np.asarray(self.weights[n_features], dtype=np.float32), (len(texts), 1))
+
+        if len(indices):
+            contributions = np.asarray(self.weights[indices], dtype=np.float32) * values[:, None]
+            # reduceat sums each row's slice; rows without tokens keep just the bias
+            non_empty = np.flatnonzero(np.diff(indptr))
+            logits[non_empty] += np.add.reduceat(contributions, indptr[non_empty], axis=0)
+
+        logits -= logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def stats(self):
+        return {'texts': self._count, 'model': os.path.basename(self.model_path)}
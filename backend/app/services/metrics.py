@@ -0,0 +1,280 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# Seconds; wide enough for a sub-millisecond analyzer stage and a long OCR job
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Shared storage for a labelled metric: one value slot per label combination"""
+
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple(str(label) for label in labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self._lock:
+            items = sorted((key, self._copy(value)) for key, value in self._values.items())
+        lines.extend(self._render_samples(items))
+        return lines
+
+    def _copy(self, value):
+        return value
+
+    def drain(self):
+        """Take every value recorded so far and start again from empty"""
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def merge(self, values):
+        """Add values drained from the same metric in another process"""
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] = self._values.get(key, 0) + value
+
+    def _render_samples(self, items):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Counter(_Metric):
+    """A value that only goes up, such as pages OCRed or bytes received"""
+
+    metric_type = 'counter'
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, such as requests in flight"""
+
+    metric_type = 'gauge'
+
+    def set(self, value, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    @contextmanager
+    def track_inprogress(self, *labels):
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, plus their sum and count"""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        key = self._key(labels)
+        # Per-bucket counts are kept non-cumulative so an observation touches one slot
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            slot = self._values.get(key)
+            if slot is None:
+                slot = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            slot[0][index] += 1
+            slot[1] += value
+            slot[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def _copy(self, value):
+        counts, total, count = value
+        return list(counts), total, count
+
+    def merge(self, values):
+        with self._lock:
+            for key, (counts, total, count) in values.items():
+                slot = self._values.get(key)
+                if slot is None:
+                    slot = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                slot[0] = [mine + theirs for mine, theirs in zip(slot[0], counts)]
+                slot[1] += total
+                slot[2] += count
+
+    def _render_samples(self, items):
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics for one process, rendered in the Prometheus text exposition format.
+
+    Instruments update in place under a per-metric lock. Components that
+    already keep their own counters (the result cache, the sentiment client)
+    register a collector instead. A collector is called at scrape time and
+    returns ``(name, type, help, {label tuple: value}, label names)`` tuples.
+    Registering a collector under a key that is already taken replaces the
+    old one, so an app built twice in one process is reported once.
+    """
+
+    def __init__(self, namespace=''):
+        self.namespace = namespace
+        self._metrics = []
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        metric.name = f"{self.namespace}_{metric.name}" if self.namespace else metric.name
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector, key=None):
+        with self._lock:
+            self._collectors[key or collector] = collector
+
+    def drain(self):
+        """Counter and histogram values recorded since the last drain, by metric name.
+
+        Worker processes drain theirs after each task and the web process
+        merges them, so work done in a process pool still shows up here.
+        Gauges describe one process's state and are left alone.
+        """
+        with self._lock:
+            metrics = list(self._metrics)
+        return {metric.name: metric.drain() for metric in metrics if not isinstance(metric, Gauge)}
+
+    def merge(self, drained):
+        with self._lock:
+            by_name = {metric.name: metric for metric in self._metrics}
+        for name, values in drained.items():
+            if name in by_name and values:
+                by_name[name].merge(values)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, metric_type, documentation, values, labelnames in collector():
+                name = f"{self.namespace}_{name}" if self.namespace else name
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for key, value in sorted(values.items()):
+                    lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# The process-wide registry and the instruments the services share
+registry = MetricsRegistry(namespace='analyzer')
+
+stage_seconds = registry.histogram(
+    'stage_duration_seconds', "Time spent in each extraction and analysis stage", ('stage',)
+)
+pages_total = registry.counter(
+    'pages_total', "Document pages extracted, by how their text was read", ('method',)
+)
+pages_ocr_total = registry.counter('pages_ocr_total', "Pages and images sent through OCR")
+bytes_processed_total = registry.counter(
+    'bytes_processed_total', "Bytes of uploaded documents received", ('endpoint',)
+)
+requests_in_flight = registry.gauge('requests_in_flight', "API requests being handled", ('endpoint',))
+request_seconds = registry.histogram(
+    'request_duration_seconds', "API request latency until the response starts", ('endpoint', 'method', 'status')
+)
+admission_queue_depth = registry.gauge(
+    'admission_queue_depth', "Documents waiting for a processing slot", ('lane',)
+)
+admission_in_progress = registry.gauge(
+    'admission_in_progress', "Documents holding a processing slot", ('lane',)
+)
+admission_rejected_total = registry.counter(
+    'admission_rejected_total', "Requests turned away with 429", ('lane', 'reason')
+)
+admission_wait_seconds = registry.histogram(
+    'admission_wait_seconds', "Time documents waited for a processing slot", ('lane',)
+)
+
+
+def observe_stage(stage, seconds):
+    stage_seconds.observe(seconds, stage)
+
+
+def observe_stage_timings(timings_ms, prefix=''):
+    """Record a per-stage timings dict in milliseconds, as OCR and preprocessing return them"""
+    for stage, value in timings_ms.items():
+        if stage != 'dpi':
+            stage_seconds.observe(value / 1000, prefix + stage)
+
+
+def time_stage(stage):
+    """Context manager that records how long its block took under ``stage``"""
+    return stage_seconds.time(stage)
@@ -0,0 +1,147 @@
+import os
+import re
+import queue
+import threading
+import logging
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+# Set Tesseract path for Windows
+pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+
+def _parse_tesseract_config(config):
+    """Pull --oem/--psm out of a pytesseract-style config string"""
+    oem = re.search(r'--oem\s+(\d+)', config or '')
+    psm = re.search(r'--psm\s+(\d+)', config or '')
+    return (int(oem.group(1)) if oem else None, int(psm.group(1)) if psm else None)
+
+
+class PytesseractEngine:
+    """Runs the tesseract CLI once per image; always available, slowest per call"""
+    name = 'pytesseract'
+
+    def __init__(self, lang='eng'):
+        self.lang = lang
+
+    def recognize(self, image, config=''):
+        return pytesseract.image_to_string(image, lang=self.lang, config=config)
+
+
+class TesserocrEnginePool:
+    """Pool of long-lived in-process Tesseract APIs with their language models loaded.
+
+    Images are passed as PIL objects, so there is no subprocess, temp file or
+    model reload per call. Each API instance is used by one thread at a time.
+    """
+    name = 'tesserocr'
+
+    def __init__(self, lang='eng', size=1, tessdata_path=None):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+        self.lang = lang
+        self.size = size
+        self.tessdata_path = tessdata_path or os.getenv('TESSDATA_PREFIX')
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def warm_up(self, config=''):
+        """Load the models now rather than on the first image"""
+        oem, _ = _parse_tesseract_config(config)
+        self._pool_for(oem)
+
+    def recognize(self, image, config=''):
+        oem, psm = _parse_tesseract_config(config)
+        pool = self._pool_for(oem)
+        api = pool.get()
+        try:
+            api.SetPageSegMode(tesserocr.PSM.AUTO if psm is None else psm)
+            api.SetImage(image)
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+            pool.put(api)
+
+    def grow(self, size):
+        """Add APIs to every engine-mode pool until each holds ``size``"""
+        with self._lock:
+            if size <= self.size:
+                return
+            for oem, pool in self._pools.items():
+                for _ in range(size - self.size):
+                    pool.put(self._new_api(oem))
+            self.size = size
+
+    def close(self):
+        with self._lock:
+            for pool in self._pools.values():
+                while not pool.empty():
+                    pool.get().End()
+            self._pools = {}
+
+    def _pool_for(self, oem):
+        """APIs are bound to an engine mode at init, so keep one pool per mode"""
+        # No --oem means Tesseract's default mode, which shares a pool with an explicit --oem 3
+        if oem is None:
+            oem = int(tesserocr.OEM.DEFAULT)
+        with self._lock:
+            pool = self._pools.get(oem)
+            if pool is None:
+                pool = queue.Queue()
+                for _ in range(self.size):
+                    pool.put(self._new_api(oem))
+                self._pools[oem] = pool
+            return pool
+
+    def _new_api(self, oem):
+        options = {'lang': self.lang, 'oem': oem}
+        if self.tessdata_path:
+            options['path'] = self.tessdata_path
+        return tesserocr.PyTessBaseAPI(**options)
+
+
+OCR_ENGINES = {
+    'pytesseract': PytesseractEngine,
+    'tesserocr': TesserocrEnginePool,
+}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_ocr_engine(backend='auto', lang='eng', pool_size=1):
+    """Return this process's shared OCR engine for a backend name.
+
+    'auto' picks the warm tesserocr pool when it is installed and falls back to
+    pytesseract otherwise. Engines are created once per process and reused;
+    a caller asking for a larger ``pool_size`` than the engine was built
+    with grows its pool.
+    """
+    if backend == 'auto':
+        backend = 'tesserocr' if tesserocr is not None else 'pytesseract'
+
+    key = (backend, lang)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            if backend not in OCR_ENGINES:
+                raise ValueError(f"Unknown OCR backend: {backend}")
+            try:
+                if backend == 'tesserocr':
+                    engine = TesserocrEnginePool(lang=lang, size=pool_size)
+                    engine.warm_up()
+                else:
+                    engine = PytesseractEngine(lang=lang)
+            except Exception as e:
+                logger.warning(f"OCR backend {backend} unavailable, using pytesseract: {str(e)}")
+                engine = PytesseractEngine(lang=lang)
+            _engines[key] = engine
+        elif getattr(engine, 'size', pool_size) < pool_size:
+            engine.grow(pool_size)
+        return engine
@@ -0,0 +1,190 @@
+import io
+import os
+import re
+import json
+import time
+import uuid
+import pstats
+import cProfile
+import threading
+import tracemalloc
+import logging
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+REPORT_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+def current_rss_mb():
+    """Resident set size of this process now, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024, 2)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    """Highest resident set size this process has reached"""
+    if resource is None:
+        return None
+    # ru_maxrss is kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+
+
+class RequestProfiler:
+    """Runs one request's work under cProfile and tracemalloc and keeps the report.
+
+    Profiling is opt-in per request, or sampled for one request in every
+    ``sample_every``. Both profilers are process-wide, so only one request is
+    profiled at a time: a sampled request that finds the profiler busy just
+    runs unprofiled. tracemalloc also slows every other thread's allocations
+    while it runs, so sampled requests only trace memory with
+    ``sample_memory``; their reports otherwise leave the traced figures out. The CPU profile covers the request thread; pages OCRed in
+    worker processes show up as time spent waiting on them. Reports are saved
+    to ``report_dir`` as JSON plus a ``.prof`` file for pstats or snakeviz,
+    keeping the newest ``max_reports``.
+    """
+
+    def __init__(self, report_dir='profiles', sample_every=0, max_reports=100, top_functions=40,
+                 top_allocations=25, traceback_frames=10, sample_memory=False):
+        self.report_dir = report_dir
+        self.sample_every = sample_every
+        self.sample_memory = sample_memory
+        self.max_reports = max_reports
+        self.top_functions = top_functions
+        self.top_allocations = top_allocations
+        self.traceback_frames = traceback_frames
+        self._lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._requests_seen = 0
+
+    def should_sample(self):
+        """True for one request in every sample_every"""
+        if self.sample_every <= 0:
+            return False
+        with self._counter_lock:
+            self._requests_seen += 1
+            return self._requests_seen % self.sample_every == 0
+
+    def run(self, fn, label, wait=True, trace_memory=True):
+        """Return (fn(), report); report is None when wait is False and another profile is running"""
+        if not self._lock.acquire(blocking=wait):
+            return fn(), None
+        try:
+            return self._profile(fn, label, trace_memory)
+        finally:
+            self._lock.release()
+
+    def _profile(self, fn, label, trace_memory):
+        already_tracing = tracemalloc.is_tracing()
+        if already_tracing:
+            tracemalloc.reset_peak()
+        elif trace_memory:
+            tracemalloc.start(self.traceback_frames)
+        tracing = already_tracing or trace_memory
+        traced_before = tracemalloc.get_traced_memory()[0]
+        rss_before = current_rss_mb()
+        profiler = cProfile.Profile()
+
+        error = None
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        profiler.enable()
+        try:
+            result = fn()
+        except Exception as e:
+            error = e
+        finally:
+            profiler.disable()
+            wall_seconds = time.perf_counter() - start
+            cpu_seconds = time.process_time() - cpu_start
+            traced_after, traced_peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot() if tracing else None
+            if tracing and not already_tracing:
+                tracemalloc.stop()
+
+        report = {
+            'id': uuid.uuid4().hex,
+            'label': label,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'wall_seconds': round(wall_seconds, 4),
+            'cpu_seconds': round(cpu_seconds, 4),
+            'error': str(error) if error else None,
+            'memory': {
+                'traced_peak_mb': round((traced_peak - traced_before) / 1024 / 1024, 3) if tracing else None,
+                'traced_retained_mb': round((traced_after - traced_before) / 1024 / 1024, 3) if tracing else None,
+                'rss_before_mb': rss_before,
+                'rss_after_mb': current_rss_mb(),
+                'process_peak_rss_mb': peak_rss_mb(),
+                'top_allocations': self._top_allocations(snapshot) if tracing else [],
+            },
+            'cpu': self._cpu_summary(profiler),
+        }
+        self._save(report, profiler)
+        if error:
+            raise error
+        return result, report
+
+    def _top_allocations(self, snapshot):
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+        return [
+            {'location': str(stat.traceback[0]), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+            for stat in snapshot.statistics('lineno')[:self.top_allocations]
+        ]
+
+    def _cpu_summary(self, profiler):
+        """Top functions by cumulative time, as data and as pstats text"""
+        stats = pstats.Stats(profiler)
+        rows = []
+        for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({
+                'function': f"{os.path.basename(filename)}:{line}({name})",
+                'calls': calls,
+                'own_seconds': round(own, 5),
+                'cumulative_seconds': round(cumulative, 5),
+            })
+        rows.sort(key=lambda row: row['cumulative_seconds'], reverse=True)
+
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(self.top_functions)
+        return {'top_functions': rows[:self.top_functions], 'pstats': text.getvalue()}
+
+    def _save(self, report, profiler):
+        try:
+            os.makedirs(self.report_dir, exist_ok=True)
+            profiler.dump_stats(self.report_path(report['id'], 'prof'))
+            with open(self.report_path(report['id'], 'json'), 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self._prune()
+        except OSError as e:
+            logger.warning(f"Could not save profile report {report['id']}: {str(e)}")
+
+    def _prune(self):
+        reports = sorted(
+            (entry for entry in os.scandir(self.report_dir) if entry.name.endswith('.json')),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in reports[:max(0, len(reports) - self.max_reports)]:
+            report_id = entry.name[:-len('.json')]
+            for extension in ('json', 'prof'):
+                try:
+                    os.remove(self.report_path(report_id, extension))
+                except OSError:
+                    pass
+
+    def report_path(self, report_id, extension='json'):
+        """Where a report is stored; None for an id that is not one of ours"""
+        if not REPORT_ID.match(report_id) or extension not in ('json', 'prof'):
+            return None
+        return os.path.join(self.report_dir, f"{report_id}.{extension}")
@@ -0,0 +1,244 @@
+import os
+import json
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class _InFlight:
+    """A computation that other callers with the same key can wait on"""
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResultCache:
+    """Content-addressed cache for upload results.
+
+    Two tiers: a small in-memory LRU in front of an on-disk JSON store that is
+    evicted oldest-first once it grows past ``max_disk_bytes``. Concurrent
+    requests for the same key are coalesced so only one computation runs.
+    """
+
+    def __init__(self, max_entries=256, cache_dir=None, max_disk_bytes=512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory = OrderedDict()
+        self._disk_index = OrderedDict()  # key -> size in bytes, oldest first
+        self._disk_bytes = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'evictions': 0,
+            'disk_evictions': 0,
+        }
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def make_key(data_hash, *config_parts):
+        """Build a cache key from a content hash and the config that produced the result"""
+        config = json.dumps(config_parts, sort_keys=True, default=str)
+        return hashlib.sha256(f"{data_hash}:{config}".encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def hash_stream(stream, chunk_size=64 * 1024):
+        """SHA-256 of a file-like object, leaving it rewound to the start"""
+        digest = hashlib.sha256()
+        stream.seek(0)
+        for chunk in iter(lambda: stream.read(chunk_size), b''):
+            digest.update(chunk)
+        stream.seek(0)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return ``(value, tier)`` for a cached key, or ``(None, None)``"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return self._memory[key], 'memory'
+
+        value = self._read_disk(key)
+        if value is not None:
+            with self._lock:
+                self._stats['disk_hits'] += 1
+                self._remember(key, value)
+            return value, 'disk'
+
+        return None, None
+
+    def set(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+        self._write_disk(key, value)
+
+    def get_or_compute(self, key, compute):
+        """Return ``(value, status)``, running ``compute()`` at most once per key at a time.
+
+        ``status`` is ``'memory'``, ``'disk'``, ``'coalesced'`` or ``'miss'``.
+        """
+        value, tier = self.get(key)
+        if tier:
+            return value, tier
+
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = _InFlight()
+                self._inflight[key] = pending
+                owner = True
+            else:
+                self._stats['coalesced'] += 1
+                owner = False
+
+        if not owner:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value, 'coalesced'
+
+        try:
+            with self._lock:
+                self._stats['misses'] += 1
+            value = compute()
+            self.set(key, value)
+            pending.value = value
+            return value, 'miss'
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.event.set()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'memory_entries': len(self._memory),
+                'memory_max_entries': self.max_entries,
+                'disk_entries': len(self._disk_index),
+                'disk_bytes': self._disk_bytes,
+                'disk_max_bytes': self.max_disk_bytes if self.cache_dir else 0,
+                'in_flight': len(self._inflight),
+            })
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['coalesced'] + stats['misses']
+        stats['hit_ratio'] = round((lookups - stats['misses']) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            keys = list(self._disk_index)
+            self._disk_index.clear()
+            self._disk_bytes = 0
+        for key in keys:
+            self._remove_disk_file(key)
+
+    def _remember(self, key, value):
+        """Insert into the memory tier; caller holds the lock"""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load_disk_index(self):
+        """Rebuild the disk index from files left by a previous run, oldest first"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name[:-len('.json')], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._disk_index[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        with self._lock:
+            if key not in self._disk_index:
+                return None
+            self._disk_index.move_to_end(key)
+
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)
+            return value
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable cache entry {key}: {str(e)}")
+            with self._lock:
+                self._disk_bytes -= self._disk_index.pop(key, 0)
+            self._remove_disk_file(key)
+            return None
+
+    def _write_disk(self, key, value):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not write cache entry {key}: {str(e)}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self._disk_bytes -= self._disk_index.pop(key, 0)
+            self._disk_index[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def _evict_disk(self):
+        evicted = []
+        with self._lock:
+            while self._disk_bytes > self.max_disk_bytes and len(self._disk_index) > 1:
+                key, size = self._disk_index.popitem(last=False)
+                self._disk_bytes -= size
+                self._stats['disk_evictions'] += 1
+                evicted.append(key)
+        for key in evicted:
+            self._remove_disk_file(key)
+
+    def _remove_disk_file(self, key):
+        try:
+            os.remove(self._disk_path(key))
+        except OSError:
+            pass
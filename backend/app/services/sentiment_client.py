@@ -0,0 +1,217 @@
+import os
+import time
+import threading
+import logging
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = "https://api-inference.huggingface.co/models/cardiffnlp/twitter-roberta-base-sentiment-latest"
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency for a while.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    ``allow`` refuses calls for ``reset_after`` seconds. Then a single trial
+    call is let through: success closes the circuit, failure reopens it.
+    """
+
+    def __init__(self, failure_threshold=3, reset_after=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_after:
+                # Half-open: this caller gets the one trial call
+                self.state = 'half_open'
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    logger.warning(f"Sentiment API circuit opened after {self.failures} failures")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+
+class _PendingText:
+    """One caller's text waiting to be sent in the next batch"""
+
+    def __init__(self, text):
+        self.text = text
+        self.result = None
+        self.done = threading.Event()
+
+
+class HuggingFaceSentimentClient:
+    """Sentiment calls to the Hugging Face inference API over a pooled session.
+
+    Keeps TLS connections alive between requests, bounds each call by a
+    latency budget, and skips the API entirely while the circuit breaker is
+    open. Concurrent ``classify`` calls arriving within ``batch_window_ms``
+    share one inference request. Every method returns None for a text the API
+    could not score, so callers fall back to their own rules.
+    """
+
+    source = 'ai_model'
+    # Calls wait on the network rather than the CPU
+    remote = True
+    # The hosted model only sees the first 512 characters of a text
+    max_input_chars = 512
+
+    def __init__(self, api_key, api_url=None, timeout=None, batch_size=None, batch_window_ms=None,
+                 failure_threshold=None, reset_after=None, pool_size=None):
+        self.api_key = api_key
+        self.api_url = api_url or os.getenv('HUGGINGFACE_API_URL', DEFAULT_API_URL)
+        self.timeout = timeout or float(os.getenv('HUGGINGFACE_TIMEOUT', 3.0))
+        self.batch_size = batch_size or int(os.getenv('HUGGINGFACE_BATCH_SIZE', 8))
+        # API calls block on the network, so they run on their own threads
+        pool_size = pool_size or int(os.getenv('HUGGINGFACE_POOL_SIZE', 10))
+        if batch_window_ms is None:
+            batch_window_ms = float(os.getenv('HUGGINGFACE_BATCH_WINDOW_MS', 10))
+        self.batch_window = batch_window_ms / 1000.0
+        self.breaker = CircuitBreaker(
+            failure_threshold=failure_threshold or int(os.getenv('HUGGINGFACE_FAILURE_THRESHOLD', 3)),
+            reset_after=reset_after or float(os.getenv('HUGGINGFACE_RESET_AFTER', 30.0))
+        )
+
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f"Bearer {api_key}"
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # Threads start on first use, so creating this before a pre-fork is harmless
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='sentiment-api')
+
+        self._pending = []
+        self._batch_full = threading.Event()
+        self._batch_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'texts': 0,
+            'api_calls': 0,
+            'api_results': 0,
+            'api_failures': 0,
+            'short_circuited': 0,
+            'fallbacks': 0,
+        }
+
+    def classify(self, text):
+        """Score one text, batched with any concurrent callers; returns a result or None"""
+        if self.batch_window <= 0:
+            return self.classify_batch([text])[0]
+
+        slot = _PendingText(text)
+        with self._batch_lock:
+            self._pending.append(slot)
+            leader = len(self._pending) == 1
+            if len(self._pending) >= self.batch_size:
+                self._batch_full.set()
+
+        if leader:
+            # The first caller waits briefly for company, then sends for everyone
+            self._batch_full.wait(self.batch_window)
+            with self._batch_lock:
+                batch, self._pending = self._pending, []
+                self._batch_full.clear()
+            results = [None] * len(batch)
+            try:
+                results = self.classify_batch([pending.text for pending in batch])
+            finally:
+                for pending, result in zip(batch, results):
+                    pending.result = result
+                    pending.done.set()
+
+        slot.done.wait()
+        return slot.result
+
+    def classify_batch(self, texts):
+        """Score texts in concurrent inference calls of up to batch_size; one result or None per text"""
+        batches = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1:
+            results = self._post_batch(batches[0])
+        else:
+            results = [result for batch in self._executor.map(self._post_batch, batches) for result in batch]
+
+        with self._stats_lock:
+            self._stats['texts'] += len(texts)
+            self._stats['fallbacks'] += sum(1 for result in results if result is None)
+        return results
+
+    def config_signature(self):
+        return {'api_url': self.api_url}
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['circuit'] = self.breaker.state
+        stats['api_ratio'] = round(stats['api_results'] / stats['texts'], 4) if stats['texts'] else 0.0
+        return stats
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+    def _post_batch(self, texts):
+        if not self.breaker.allow():
+            self._count('short_circuited')
+            return [None] * len(texts)
+
+        self._count('api_calls')
+        try:
+            response = self.session.post(self.api_url, json={'inputs': texts}, timeout=self.timeout)
+            if response.status_code != 200:
+                raise RuntimeError(f"status {response.status_code}")
+            results = [self._parse_scores(scores) for scores in self._split_response(response.json(), len(texts))]
+        except Exception as e:
+            logger.warning(f"Hugging Face API failed: {str(e)}")
+            self.breaker.record_failure()
+            self._count('api_failures')
+            return [None] * len(texts)
+
+        self.breaker.record_success()
+        self._count('api_results', sum(1 for result in results if result is not None))
+        return results
+
+    def _split_response(self, payload, count):
+        """One list of {label, score} per input text"""
+        if not isinstance(payload, list):
+            raise RuntimeError("unexpected response shape")
+        # A single input may come back as a flat list of label scores
+        if count == 1 and payload and isinstance(payload[0], dict):
+            payload = [payload]
+        if len(payload) != count:
+            raise RuntimeError(f"expected {count} results, got {len(payload)}")
+        return payload
+
+    def _parse_scores(self, scores):
+        if not scores:
+            return None
+        top_sentiment = max(scores, key=lambda x: x['score'])
+        return {
+            "label": top_sentiment['label'].upper(),
+            "score": round(top_sentiment['score'], 3),
+            "source": self.source
+        }
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
@@ -0,0 +1,104 @@
+import re
+import json
+import bisect
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Points a word earns for its polarity; a word listed in several tiers scores the strongest
+TIER_WEIGHTS = {'strong': 3, 'medium': 2, 'weak': 1}
+
+# Phrase categories: which side they score for and how much, once per sentence
+PHRASE_RULES = {
+    'negation': ('negative', 2),
+    'emphasis': ('positive', 2),
+}
+
+
+class SentimentLexicon:
+    """Sentiment words and phrases compiled into lookup structures once, up front.
+
+    Words go into a single dict from token to (positive, negative) weight, so
+    scoring is one dict lookup per token however large the lexicon grows.
+    Each phrase category becomes one compiled alternation that is run over all
+    sentences in a single scan. ``load`` merges more entries from a JSON file
+    with the same shape as the constructor arguments.
+    """
+
+    def __init__(self, words=None, phrases=None):
+        self.words = {'positive': {}, 'negative': {}}
+        self.phrases = {}
+        self.extend(words or {}, phrases or {})
+
+    def load(self, path):
+        """Merge a JSON lexicon file: {"words": {polarity: {tier: [...]}}, "phrases": {category: [...]}}"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        self.extend(data.get('words', {}), data.get('phrases', {}))
+        logger.info(f"Loaded sentiment lexicon from {path}: {len(self.index)} words")
+
+    def extend(self, words, phrases):
+        for polarity, tiers in words.items():
+            if polarity not in self.words:
+                raise ValueError(f"Unknown sentiment polarity: {polarity}")
+            for tier, entries in tiers.items():
+                if tier not in TIER_WEIGHTS:
+                    raise ValueError(f"Unknown sentiment tier: {tier}")
+                self.words[polarity].setdefault(tier, []).extend(word.lower() for word in entries)
+        for category, entries in phrases.items():
+            if category not in PHRASE_RULES:
+                raise ValueError(f"Unknown sentiment phrase category: {category}")
+            self.phrases.setdefault(category, []).extend(phrase.lower() for phrase in entries)
+        self._compile()
+
+    def _compile(self):
+        index = {}
+        for polarity, slot in (('positive', 0), ('negative', 1)):
+            for tier, entries in self.words[polarity].items():
+                for word in entries:
+                    weights = index.setdefault(word, [0, 0])
+                    weights[slot] = max(weights[slot], TIER_WEIGHTS[tier])
+        self.index = {word: tuple(weights) for word, weights in index.items()}
+
+        # Longest first so the alternation prefers the most specific phrase
+        self.phrase_patterns = {
+            category: re.compile('|'.join(re.escape(phrase) for phrase in sorted(set(entries), key=len, reverse=True)))
+            for category, entries in self.phrases.items() if entries
+        }
+
+        content = json.dumps({'words': self.words, 'phrases': self.phrases}, sort_keys=True)
+        self.fingerprint = hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+    def score(self, words, sentences):
+        """Return (positive, negative) points for lowercased words and sentences"""
+        positive_score = 0
+        negative_score = 0
+
+        # Word weights, one lookup per token
+        index = self.index
+        for word in words:
+            weights = index.get(word)
+            if weights:
+                positive_score += weights[0]
+                negative_score += weights[1]
+
+        # Phrase hits count once per sentence; sentences are joined so each
+        # category is a single scan, and match offsets map back to sentences
+        if sentences and self.phrase_patterns:
+            joined = '\n'.join(sentences)
+            starts = []
+            offset = 0
+            for sentence in sentences:
+                starts.append(offset)
+                offset += len(sentence) + 1
+
+            for category, pattern in self.phrase_patterns.items():
+                hit_sentences = {bisect.bisect_right(starts, match.start()) - 1 for match in pattern.finditer(joined)}
+                polarity, weight = PHRASE_RULES[category]
+                if polarity == 'positive':
+                    positive_score += weight * len(hit_sentences)
+                else:
+                    negative_score += weight * len(hit_sentences)
+
+        return positive_score, negative_score
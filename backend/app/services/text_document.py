@@ -0,0 +1,142 @@
+import re
+from collections import Counter
+from functools import cached_property
+
+SENTENCE_SPLIT = re.compile(r'[.!?]+')
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+PAGE_MARKER = re.compile(r'--- Page (\d+) ---')
+WORD_TOKEN = re.compile(r'\w+')
+
+# Keywords that vote for each content category
+CONTENT_TYPE_KEYWORDS = {
+    'technology': ('tech', 'software', 'code', 'programming', 'ai', 'digital', 'computer', 'data', 'app', 'website'),
+    'business': ('business', 'startup', 'entrepreneur', 'marketing', 'sales', 'money', 'career', 'work', 'office'),
+    'lifestyle': ('life', 'health', 'fitness', 'travel', 'food', 'home', 'family', 'relationship', 'wellness'),
+    'creative': ('design', 'art', 'creative', 'photo', 'video', 'music', 'write', 'content', 'inspiration'),
+    'education': ('learn', 'education', 'study', 'tips', 'howto', 'guide', 'tutorial', 'knowledge', 'skill'),
+}
+KEYWORD_CATEGORY = {
+    keyword: category
+    for category, keywords in CONTENT_TYPE_KEYWORDS.items()
+    for keyword in keywords
+}
+
+
+def select_alpha_terms(tokens):
+    """ASCII-letter words of 3-15 characters, as ``\\b[a-zA-Z]{3,15}\\b`` would find"""
+    return [token for token in tokens if 3 <= len(token) <= 15 and token.isascii() and token.isalpha()]
+
+
+def best_content_type(scores):
+    """The category with most keyword hits, or 'general' when there are none"""
+    best_category = max(scores, key=scores.get)
+    return best_category if scores[best_category] > 0 else 'general'
+
+
+def chunk_page(page, text, max_chars):
+    """(page, text) pieces of one page's text, at most max_chars each, cut at sentence ends"""
+    chunks = []
+    current = ''
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        # A sentence longer than a chunk is cut at the last space that fits
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars + 1)
+            if cut <= 0:
+                cut = max_chars
+            if current:
+                chunks.append((page, current))
+                current = ''
+            chunks.append((page, sentence[:cut].rstrip()))
+            sentence = sentence[cut:].lstrip()
+        if not sentence:
+            continue
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append((page, current))
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append((page, current))
+    return chunks
+
+
+class TextDocument:
+    """Cleaned text tokenized once, with derived features computed on first use.
+
+    Every analyzer stage reads its words, sentences and counts from here
+    instead of re-splitting the text itself.
+    """
+
+    def __init__(self, text):
+        self.text = text
+
+    @cached_property
+    def lower(self):
+        return self.text.lower()
+
+    @cached_property
+    def words(self):
+        """Whitespace-separated tokens, as ``text.split()``"""
+        return self.text.split()
+
+    @cached_property
+    def lower_words(self):
+        return self.lower.split()
+
+    @cached_property
+    def word_count(self):
+        return len(self.words)
+
+    @cached_property
+    def sentences(self):
+        """Non-blank, stripped pieces between sentence punctuation, lowercased"""
+        return [s.strip() for s in SENTENCE_SPLIT.split(self.lower) if s.strip()]
+
+    @cached_property
+    def sentence_count(self):
+        return len(self.sentences)
+
+    @cached_property
+    def word_tokens(self):
+        """Maximal runs of word characters in the lowercased text"""
+        return WORD_TOKEN.findall(self.lower)
+
+    @cached_property
+    def alpha_terms(self):
+        return select_alpha_terms(self.word_tokens)
+
+    @cached_property
+    def has_question(self):
+        return '?' in self.text
+
+    @cached_property
+    def content_type_scores(self):
+        """Keyword hits per content category, in CONTENT_TYPE_KEYWORDS order"""
+        hits = Counter(KEYWORD_CATEGORY[token] for token in self.word_tokens if token in KEYWORD_CATEGORY)
+        return {category: hits.get(category, 0) for category in CONTENT_TYPE_KEYWORDS}
+
+    @cached_property
+    def content_type(self):
+        return best_content_type(self.content_type_scores)
+
+    @cached_property
+    def pages(self):
+        """(page number, text) segments between "--- Page N ---" markers; page is None without markers"""
+        markers = list(PAGE_MARKER.finditer(self.text))
+        if not markers:
+            return [(None, self.text)] if self.text.strip() else []
+
+        segments = []
+        leading = self.text[:markers[0].start()].strip()
+        if leading:
+            segments.append((None, leading))
+        for i, marker in enumerate(markers):
+            end = markers[i + 1].start() if i + 1 < len(markers) else len(self.text)
+            body = self.text[marker.end():end].strip()
+            if body:
+                segments.append((int(marker.group(1)), body))
+        return segments
+
+    def chunks(self, max_chars):
+        """(page, text) pieces of at most max_chars, cut at sentence ends and never across pages"""
+        return [chunk for page, text in self.pages for chunk in chunk_page(page, text, max_chars)]
@@ -1,109 +1,565 @@
 import os
+import io
+import time
+import shutil
+import tempfile
+import threading
 import PyPDF2
-import pytesseract
-from pdf2image import convert_from_path
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PIL import Image
+from app.services.ocr_engines import get_ocr_engine
+from app.services.image_preprocessing import ImagePreprocessor
+from app.services.text_regions import TextRegionDetector
+from app.services.extraction_limits import ExtractionLimits, PageSelectionError, truncate_words
+from app.services import metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Set Tesseract path for Windows
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+def _ocr_page_image(image, config='', backend='auto', preprocessor=None, pool_size=1):
+    """Preprocess and OCR a single rendered page; module-level so worker processes can run it.
+
+    Each worker process keeps its own warm engine between pages, with at
+    least ``pool_size`` APIs. Returns the text and per-stage timings in
+    milliseconds.
+    """
+    timings = {}
+    if preprocessor is not None:
+        image, timings = preprocessor.process(image)
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    
+    start = time.perf_counter()
+    text = get_ocr_engine(backend, pool_size=pool_size).recognize(image, config)
+    timings['ocr'] = round((time.perf_counter() - start) * 1000, 2)
+    return text, timings
+
+
+class _InlineFuture:
+    """Stand-in for a Future when OCR runs in the calling process"""
+    def __init__(self, value):
+        self._value = value
+
+    def result(self):
+        return self._value
+
+    def cancel(self):
+        return False
+
 
 class TextExtractor:
-    def __init__(self):
+    def __init__(self, ocr_workers=None, ocr_window=None, pdf_dpi=200):
         self.supported_formats = ['.pdf', '.png', '.jpg', '.jpeg']
+        self.pdf_dpi = pdf_dpi
+        self.image_ocr_config = r'--oem 3 --psm 6'
+
+        # Scanned PDFs are rendered a few pages at a time and OCRed on a process pool
+        self.ocr_workers = ocr_workers or int(os.getenv('OCR_WORKERS', 0)) or os.cpu_count() or 1
+        self.ocr_window = ocr_window or int(os.getenv('OCR_WINDOW', 0)) or self.ocr_workers * 2
+        self._ocr_pool = None
+
+        # OCR backend: 'tesserocr' (warm in-process engines), 'pytesseract' (CLI) or 'auto'
+        self.ocr_backend = os.getenv('OCR_BACKEND', 'auto')
+        self.ocr_engine_pool_size = int(os.getenv('OCR_ENGINE_POOL_SIZE', 2))
+
+        # Pages with less embedded text than this are treated as scanned
+        self.min_page_text_chars = int(os.getenv('MIN_PAGE_TEXT_CHARS', 20))
+        self.ocr_mixed_pages = os.getenv('OCR_MIXED_PAGES', 'true').lower() == 'true'
+
+        # Shrink images before OCR; scanned PDFs pick their render DPI from a low-res probe
+        self.preprocessor = ImagePreprocessor()
+        self.adaptive_dpi = os.getenv('OCR_ADAPTIVE_DPI', 'true').lower() == 'true'
+        self.probe_dpi = 50
+
+        # Images: OCR only the detected text blocks, in parallel, unless they cover most of the image
+        self.region_detector = TextRegionDetector()
+        self.ocr_text_regions = os.getenv('OCR_TEXT_REGIONS', 'true').lower() == 'true'
+        self.region_fallback = os.getenv('OCR_REGION_FALLBACK', 'true').lower() == 'true'
+        self.region_max_coverage = float(os.getenv('OCR_REGION_MAX_COVERAGE', 0.6))
+        self._region_pool = None
+        # The extractor is shared by request threads; only one of them may start each pool
+        self._pool_lock = threading.Lock()
+
+    def config_signature(self):
+        """Settings that change extraction output, used in result cache keys"""
+        return {
+            'pdf_dpi': self.pdf_dpi,
+            'image_ocr_config': self.image_ocr_config,
+            'ocr_backend': self.ocr_backend,
+            'min_page_text_chars': self.min_page_text_chars,
+            'ocr_mixed_pages': self.ocr_mixed_pages,
+            'preprocessing': self.preprocessor.config_signature(),
+            'adaptive_dpi': self.adaptive_dpi,
+            'text_regions': self.region_detector.config_signature() if self.ocr_text_regions else None,
+            'region_fallback': self.region_fallback
+        }
+
+    def close(self):
+        """Shut down the OCR worker pool"""
+        with self._pool_lock:
+            ocr_pool, self._ocr_pool = self._ocr_pool, None
+            region_pool, self._region_pool = self._region_pool, None
+        if ocr_pool is not None:
+            ocr_pool.shutdown(wait=True)
+        if region_pool is not None:
+            region_pool.shutdown(wait=True)
     
     def extract_text(self, file_path):
         """Extract text from file based on its type"""
+        return self.extract_document(file_path)['text']
+    
+    def extract_document(self, file_path, progress=None, on_page=None, on_text=None, limits=None):
+        """Extract text plus per-page records noting how each page was read.
+
+        ``progress(pages_done, pages_total)`` is called as pages complete, and
+        ``on_page(page)`` with each page record as soon as its text is final.
+        Pages that need no OCR are reported first, then OCRed pages in order.
+        ``on_text(text)`` receives the document text in order, a page at a time,
+        as soon as everything before it is final; the pieces join up to the
+        returned text.
+
+        ``limits`` (an ExtractionLimits) picks the pages to read and a word
+        budget. With a budget, pages are read and reported in page order and
+        extraction stops as soon as the budget is met, without reading or
+        OCRing the rest. The result's ``truncated`` says whether anything
+        selected was left out, and ``page_count`` is the document's length.
+        """
+        return self._extract_document(file_path, file_path, progress, on_page, on_text, limits)
+    
+    def extract_document_from_buffer(self, data, filename, progress=None, on_page=None, on_text=None, limits=None):
+        """Like extract_document, but reads bytes or a seekable file-like object.
+
+        ``filename`` is only used to pick the format. Digital PDFs and images are
+        read straight from memory; only pages that need OCR are handed to
+        poppler, which renders from a file.
+        """
+        stream = io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+        return self._extract_document(stream, filename, progress, on_page, on_text, limits)
+    
+    def _extract_document(self, source, filename, progress, on_page=None, on_text=None, limits=None):
+        """Dispatch on file type; source is a path or a seekable binary stream"""
+        limits = limits or ExtractionLimits()
         try:
-            file_ext = os.path.splitext(file_path)[1].lower()
+            file_ext = os.path.splitext(filename)[1].lower()
             
             if file_ext == '.pdf':
-                return self._extract_from_pdf(file_path)
+                with metrics.time_stage('extract_pdf'):
+                    return self._extract_from_pdf(source, progress, on_page, on_text, limits)
             elif file_ext in ['.png', '.jpg', '.jpeg']:
-                return self._extract_from_image(file_path)
+                with metrics.time_stage('extract_image'):
+                    text, timings = self._extract_from_image(source)
+                metrics.observe_stage_timings(timings, prefix='image_')
+                metrics.pages_total.inc('ocr')
+                metrics.pages_ocr_total.inc()
+                # An image is one page, so only the word budget applies
+                truncated = False
+                if limits.max_words:
+                    cut = truncate_words(text, limits.max_words)
+                    truncated = cut != text
+                    text = cut
+                page = {'page': 1, 'kind': 'image', 'method': 'ocr', 'text': text, 'timings': timings}
+                if on_text:
+                    on_text(text)
+                if on_page:
+                    on_page(page)
+                if progress:
+                    progress(1, 1)
+                return {'text': text, 'pages': [page], 'timings': dict(timings), 'truncated': truncated, 'page_count': 1}
             else:
                 raise ValueError(f"Unsupported file format: {file_ext}")
                 
         except Exception as e:
-            logger.error(f"Error extracting text from {file_path}: {str(e)}")
+            logger.error(f"Error extracting text from {filename}: {str(e)}")
             raise
     
-    def _extract_from_pdf(self, file_path):
-        """Extract text from PDF file"""
+    def _extract_from_pdf(self, source, progress=None, on_page=None, on_text=None, limits=None):
+        """Extract text from PDF file, OCRing only the pages that need it"""
+        limits = limits or ExtractionLimits()
+        budget = limits.max_words
         try:
-            # First try direct text extraction
-            text = self._extract_pdf_text(file_path)
+            # First read embedded text and classify the selected pages
+            pages, page_count = self._classify_pdf_pages(source, limits)
+            selected = limits.select(page_count) if pages is not None else None
             
-            # If no text found, try OCR
-            if not text or len(text.strip()) < 50:
-                text = self._extract_pdf_ocr(file_path)
-                
-            return text
+            # Then render and OCR just the image-only (and optionally mixed) pages
+            ocr_kinds = ('image', 'mixed') if self.ocr_mixed_pages else ('image',)
+            ocr_pages = {}
+            pending_ocr = set()
+            pages_final = 0
+            words_read = 0
+            truncated = False
+            
+            def finalize_in_order():
+                # Settle every page up to the first one still waiting for OCR, spending the word
+                # budget; returns True once it is spent and the pages after the cut are dropped
+                nonlocal pages_final, words_read, truncated
+                while pages_final < len(pages) and pages[pages_final]['page'] not in pending_ocr:
+                    page = pages[pages_final]
+                    pages_final += 1
+                    if budget is not None:
+                        text = truncate_words(page['text'], budget - words_read)
+                        if text != page['text']:
+                            page['text'] = text
+                            page['truncated'] = True
+                        words_read += len(text.split())
+                    if on_text:
+                        block = self._page_block(page)
+                        if block:
+                            on_text(block)
+                    if on_page and budget is not None:
+                        on_page(page)
+                    if budget is not None and words_read >= budget:
+                        truncated = page.get('truncated', False) or page['page'] != selected[-1]
+                        del pages[pages_final:]
+                        return True
+                return False
+            
+            if pages is not None:
+                ocr_pages = {page['page']: page for page in pages if page['kind'] in ocr_kinds}
+                pending_ocr = set(ocr_pages)
+                done = finalize_in_order()
+                if on_page and budget is None:
+                    for page in pages:
+                        if page['page'] not in ocr_pages:
+                            on_page(page)
+                if progress:
+                    progress(len(pages) - len(ocr_pages) if not done else len(pages), len(pages))
+                if done:
+                    ocr_pages = {}
+            
+            if pages is None or ocr_pages:
+                with self._local_pdf_path(source) as pdf_path:
+                    if pages is None:
+                        # PyPDF2 could not parse the file; fall back to OCRing every selected page
+                        page_count = pdfinfo_from_path(pdf_path)['Pages']
+                        selected = limits.select(page_count)
+                        pages = [
+                            {'page': page_num, 'kind': 'image', 'method': 'direct', 'text': ""}
+                            for page_num in selected
+                        ]
+                        ocr_pages = {page['page']: page for page in pages}
+                        pending_ocr = set(ocr_pages)
+                    pages_done = len(pages) - len(ocr_pages)
+                    
+                    for page_num, ocr_text, timings in self._iter_pdf_ocr(pdf_path, sorted(ocr_pages)):
+                        page = ocr_pages[page_num]
+                        page['timings'] = timings
+                        # OCR runs in worker processes, so their timings are recorded here
+                        metrics.observe_stage_timings(timings, prefix='pdf_')
+                        if page['kind'] == 'mixed':
+                            page['text'] = self._merge_hybrid_text(page['text'], ocr_text)
+                            page['method'] = 'hybrid'
+                        else:
+                            page['text'] = ocr_text
+                            page['method'] = 'ocr'
+                        pending_ocr.discard(page_num)
+                        done = finalize_in_order()
+                        if on_page and budget is None:
+                            on_page(page)
+                        pages_done += 1
+                        if progress:
+                            progress(len(pages) if done else pages_done, len(pages))
+                        if done:
+                            # Enough text: leave the remaining pages unrendered
+                            break
+            
+            ocr_count = sum(1 for page in pages if page['method'] != 'direct')
+            for page in pages:
+                metrics.pages_total.inc(page['method'])
+            metrics.pages_ocr_total.inc(amount=ocr_count)
+            logger.info(
+                f"PDF pages: {len(pages)} read of {page_count}, {ocr_count} OCRed "
+                f"({sum(1 for p in pages if p['kind'] == 'image')} image-only, "
+                f"{sum(1 for p in pages if p['kind'] == 'mixed')} mixed)"
+                + (", truncated at the word budget" if truncated else "")
+            )
+            
+            text = "".join(self._page_block(page) for page in pages)
+            
+            return {
+                'text': text,
+                'pages': pages,
+                'timings': self._total_timings(pages),
+                'truncated': truncated,
+                'page_count': page_count
+            }
             
         except Exception as e:
             logger.error(f"PDF extraction failed: {str(e)}")
             raise
     
-    def _extract_pdf_text(self, file_path):
-        """Extract text directly from PDF"""
-        text = ""
+    def _page_block(self, page):
+        """A page's part of the document text; empty for a page with no text that was not OCRed"""
+        if page['method'] != 'direct' or page['text']:
+            return f"--- Page {page['page']} ---\n{page['text']}\n\n"
+        return ""
+    
+    def needs_ocr(self, source, filename, limits=None):
+        """Quick guess at whether a document will be OCRed, without extracting any text.
+
+        Images always are. PDF pages are judged from their resources alone: a
+        page without fonts is scanned, and with OCR_MIXED_PAGES a page that
+        draws images is OCRed too. A PDF PyPDF2 cannot parse is OCRed whole.
+        Only the pages ``limits`` selects are looked at.
+        """
+        if os.path.splitext(filename)[1].lower() != '.pdf':
+            return True
+        limits = limits or ExtractionLimits()
         try:
-            with open(file_path, 'rb') as file:
+            with self._open_source(source) as file:
                 pdf_reader = PyPDF2.PdfReader(file)
+                for page_num in limits.select(len(pdf_reader.pages)):
+                    page = pdf_reader.pages[page_num - 1]
+                    resources = page.get('/Resources')
+                    resources = resources.get_object() if resources is not None else {}
+                    if resources.get('/Font') is None:
+                        return True
+                    if self.ocr_mixed_pages and self._page_has_images(page):
+                        return True
+            return False
+        except PageSelectionError:
+            # Extraction will reject the request without using a slot for long
+            return False
+        except Exception:
+            return True
+        finally:
+            if not isinstance(source, str):
+                source.seek(0)
+
+    def _classify_pdf_pages(self, source, limits=None):
+        """Read embedded text of the selected pages and label each page as text, image or mixed.
+
+        With a word budget, stops after the page where embedded text alone
+        meets it, as OCR can only add to that. Returns (pages, page_count),
+        or (None, None) when PyPDF2 cannot parse the document at all.
+        """
+        limits = limits or ExtractionLimits()
+        pages = []
+        words = 0
+        try:
+            with self._open_source(source) as file, metrics.time_stage('pdf_text'):
+                pdf_reader = PyPDF2.PdfReader(file)
+                page_count = len(pdf_reader.pages)
                 
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += f"--- Page {page_num + 1} ---\n{page_text}\n\n"
+                for page_num in limits.select(page_count):
+                    page = pdf_reader.pages[page_num - 1]
+                    page_text = page.extract_text() or ""
+                    
+                    if len(page_text.strip()) < self.min_page_text_chars:
+                        # Scanned or outlined text: nothing usable embedded
+                        kind = 'image'
+                    elif self._page_has_images(page):
+                        kind = 'mixed'
+                    else:
+                        kind = 'text'
+                    
+                    pages.append({'page': page_num, 'kind': kind, 'method': 'direct', 'text': page_text})
+                    
+                    # OCR replaces an image-only page's text, so only other pages count towards the budget
+                    if limits.max_words and kind != 'image':
+                        words += len(page_text.split())
+                        if words >= limits.max_words:
+                            break
                         
+        except PageSelectionError:
+            raise
         except Exception as e:
             logger.warning(f"Direct PDF text extraction failed: {str(e)}")
+            return None, None
             
-        return text
+        return pages, page_count
     
-    def _extract_pdf_ocr(self, file_path):
-        """Extract text from PDF using OCR"""
-        text = ""
+    @contextmanager
+    def _open_source(self, source):
+        """Open a path for reading, or rewind a stream we do not own"""
+        if isinstance(source, str):
+            with open(source, 'rb') as file:
+                yield file
+        else:
+            source.seek(0)
+            yield source
+    
+    @contextmanager
+    def _local_pdf_path(self, source):
+        """Path poppler can render from; an in-memory PDF is written out once for all windows"""
+        if isinstance(source, str):
+            yield source
+            return
+        
+        source.seek(0)
+        tmp = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
         try:
-            # Convert PDF to images
-            images = convert_from_path(file_path, dpi=200)
-            
-            for i, image in enumerate(images):
-                # Convert PIL image to RGB if needed
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
+            with tmp:
+                shutil.copyfileobj(source, tmp)
+            yield tmp.name
+        finally:
+            os.remove(tmp.name)
+    
+    def _page_has_images(self, page):
+        """Whether a PyPDF2 page draws any raster images"""
+        try:
+            resources = page.get('/Resources')
+            if resources is None:
+                return False
+            xobjects = resources.get_object().get('/XObject')
+            if xobjects is None:
+                return False
+            xobjects = xobjects.get_object()
+            return any(xobjects[name].get_object().get('/Subtype') == '/Image' for name in xobjects)
+        except Exception:
+            return False
+    
+    def _merge_hybrid_text(self, direct_text, ocr_text):
+        """Keep embedded text and append OCR lines it does not already contain"""
+        seen = {' '.join(line.lower().split()) for line in direct_text.splitlines()}
+        extra_lines = [
+            line for line in ocr_text.splitlines()
+            if line.strip() and ' '.join(line.lower().split()) not in seen
+        ]
+        if not extra_lines:
+            return direct_text
+        return direct_text.rstrip() + "\n" + "\n".join(extra_lines)
+    
+    def _iter_pdf_ocr(self, file_path, page_numbers):
+        """Yield (page_num, text, timings) in page order, rendering at most one window of pages at a time"""
+        page_numbers = list(page_numbers)
+        if not page_numbers:
+            return
+        
+        pool = self._get_ocr_pool()
+        pending = deque()
+        grayscale = self.preprocessor.grayscale
+        dpi = self._choose_render_dpi(file_path, page_numbers[0])
+        
+        try:
+            for first_page, last_page in self._page_windows(page_numbers):
+                start = time.perf_counter()
+                images = convert_from_path(
+                    file_path, dpi=dpi, first_page=first_page, last_page=last_page, grayscale=grayscale
+                )
+                render_ms = round((time.perf_counter() - start) * 1000 / max(len(images), 1), 2)
                 
-                # Perform OCR
-                page_text = pytesseract.image_to_string(image)
-                text += f"--- Page {i + 1} ---\n{page_text}\n\n"
+                for page_num, image in zip(range(first_page, last_page + 1), images):
+                    args = (image, '', self.ocr_backend, self.preprocessor, self.ocr_engine_pool_size)
+                    if pool is not None:
+                        future = pool.submit(_ocr_page_image, *args)
+                    else:
+                        future = _InlineFuture(_ocr_page_image(*args))
+                    pending.append((page_num, future, {'render': render_ms, 'dpi': dpi}))
+                del images
                 
-        except Exception as e:
-            logger.error(f"PDF OCR failed: {str(e)}")
-            raise
+                # Keep at most one window queued ahead of the results we hand back
+                while len(pending) > self.ocr_window:
+                    yield self._finish_ocr_page(pending.popleft())
             
-        return text
+            while pending:
+                yield self._finish_ocr_page(pending.popleft())
+        finally:
+            # The caller stopped early (a word budget was met): drop OCR that has not started
+            for _, future, _ in pending:
+                future.cancel()
+    
+    def _finish_ocr_page(self, entry):
+        page_num, future, render_timings = entry
+        text, timings = future.result()
+        return page_num, text, dict(render_timings, **timings)
+    
+    def _choose_render_dpi(self, file_path, probe_page):
+        """Render one page at low DPI and size the real render to the text on it"""
+        if not self.adaptive_dpi:
+            return self.pdf_dpi
+        try:
+            with metrics.time_stage('pdf_dpi_probe'):
+                probe = convert_from_path(
+                    file_path, dpi=self.probe_dpi, first_page=probe_page, last_page=probe_page, grayscale=True
+                )
+            if probe:
+                return self.preprocessor.choose_dpi(probe[0], self.probe_dpi, default_dpi=self.pdf_dpi)
+        except Exception as e:
+            logger.warning(f"DPI probe failed, using {self.pdf_dpi} DPI: {str(e)}")
+        return self.pdf_dpi
     
-    def _extract_from_image(self, file_path):
+    def _total_timings(self, pages):
+        """Sum per-stage milliseconds over all OCRed pages"""
+        totals = {}
+        for page in pages:
+            for stage, value in page.get('timings', {}).items():
+                if stage != 'dpi':
+                    totals[stage] = round(totals.get(stage, 0) + value, 2)
+        return totals
+    
+    def _page_windows(self, page_numbers):
+        """Group page numbers into contiguous (first, last) runs of at most ocr_window pages"""
+        run = []
+        for page_num in page_numbers:
+            if run and (page_num != run[-1] + 1 or len(run) >= self.ocr_window):
+                yield run[0], run[-1]
+                run = []
+            run.append(page_num)
+        if run:
+            yield run[0], run[-1]
+    
+    def _get_ocr_pool(self):
+        """Lazily start the OCR process pool; None means OCR runs inline"""
+        if self.ocr_workers <= 1:
+            return None
+        with self._pool_lock:
+            if self._ocr_pool is None:
+                try:
+                    self._ocr_pool = ProcessPoolExecutor(max_workers=self.ocr_workers)
+                except (OSError, NotImplementedError) as e:
+                    logger.warning(f"OCR process pool unavailable, running inline: {str(e)}")
+                    self.ocr_workers = 1
+                    return None
+            return self._ocr_pool
+    
+    def _extract_from_image(self, source):
         """Extract text from image using OCR"""
         try:
             # Open and preprocess image
-            image = Image.open(file_path)
+            if not isinstance(source, str):
+                source.seek(0)
+            image = Image.open(source)
             
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
+            # Grayscale, crop, rescale and deskew before OCR
+            image, timings = self.preprocessor.process(image)
             
-            # Configure Tesseract for better accuracy
-            custom_config = r'--oem 3 --psm 6'
+            # Find the text blocks so photos and empty areas are not OCRed
+            regions = []
+            if self.ocr_text_regions:
+                start = time.perf_counter()
+                regions = self.region_detector.detect(image)
+                timings['regions'] = round((time.perf_counter() - start) * 1000, 2)
             
-            # Perform OCR
-            text = pytesseract.image_to_string(image, config=custom_config)
+            # Perform OCR on a warm engine shared by this process
+            start = time.perf_counter()
+            engine = get_ocr_engine(self.ocr_backend, pool_size=self.ocr_engine_pool_size)
+            if regions and self.region_detector.coverage(regions, image) <= self.region_max_coverage:
+                text = self._ocr_regions(engine, image, regions)
+            elif self.ocr_text_regions and not regions and not self.region_fallback:
+                text = ""
+            else:
+                text = engine.recognize(image, config=self.image_ocr_config)
+            timings['ocr'] = round((time.perf_counter() - start) * 1000, 2)
             
-            return text if text.strip() else "No text could be extracted from this image."
+            return (text if text.strip() else "No text could be extracted from this image."), timings
             
         except Exception as e:
+            # Raised rather than returned as text, so a passing OCR failure is never cached as the result
             logger.error(f"Image OCR failed: {str(e)}")
-            return f"OCR processing error: {str(e)}"
\ No newline at end of file
+            raise
+    
+    def _ocr_regions(self, engine, image, regions):
+        """OCR each text block in parallel and stitch the results in reading order"""
+        with self._pool_lock:
+            if self._region_pool is None:
+                self._region_pool = ThreadPoolExecutor(
+                    max_workers=self.ocr_engine_pool_size, thread_name_prefix='ocr-region'
+                )
+            region_pool = self._region_pool
+        crops = [image.crop(box) for box in regions]
+        texts = region_pool.map(lambda crop: engine.recognize(crop, config=self.image_ocr_config), crops)
+        return "\n".join(text.strip() for text in texts if text.strip())
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""Tasks for the CPU process pool used in the 'pool' serving mode.
+
+Each worker process builds its own pipeline once and keeps it warm between
+tasks. Tasks return their result together with the stage timings and
+sentiment source counts they recorded, which the web process merges into
+its own metrics.
+"""
+import io
+from app.pipeline import Pipeline
+from app.services import metrics
+from app.services.incremental_analyzer import IncrementalAnalyzer
+
+_pipeline = None
+
+
+def init_worker(ocr_workers):
+    global _pipeline
+    # Values inherited from the web process at fork time were already counted there
+    metrics.registry.drain()
+    _pipeline = Pipeline({'OCR_WORKERS': ocr_workers})
+    _pipeline.warm_up()
+
+
+def _telemetry():
+    return {
+        'metrics': metrics.registry.drain(),
+        'sentiment_sources': _pipeline.ai_analyzer.drain_sentiment_sources(),
+    }
+
+
+def _upload_arguments(source, events):
+    on_page = progress = None
+    if events is not None:
+        on_page = lambda page, partial: events.put(('page', page, partial))
+        progress = lambda pages_done, pages_total=None: events.put(('progress', pages_done, pages_total))
+    if not isinstance(source, str):
+        source = io.BytesIO(source)
+    return source, on_page, progress
+
+
+def process_upload(source, filename, events=None, limits=None):
+    """Extract and analyze a saved file path or upload bytes, sending events to ``events`` if given"""
+    source, on_page, progress = _upload_arguments(source, events)
+    result = _pipeline.process_upload(source, filename, on_page=on_page, progress=progress, limits=limits)
+    return result, _telemetry()
+
+
+def extract_upload(source, filename, events=None, limits=None):
+    """``process_upload`` up to the sentiment model call; returns the document and its finished analysis"""
+    source, on_page, progress = _upload_arguments(source, events)
+    extracted = _pipeline.extract_upload(source, filename, on_page=on_page, progress=progress, limits=limits)
+    return extracted, _telemetry()
+
+
+def analyze_batch(texts):
+    return _pipeline.ai_analyzer.analyze_batch(texts), _telemetry()
+
+
+def prepare_batch(texts):
+    """``analyze_batch`` up to the sentiment model call; returns each text's finished analysis"""
+    analyses = []
+    with metrics.time_stage('analysis'):
+        for text in texts:
+            analysis = IncrementalAnalyzer(_pipeline.ai_analyzer)
+            analysis.feed(text)
+            analysis.finish_text()
+            analyses.append(analysis)
+    return analyses, _telemetry()
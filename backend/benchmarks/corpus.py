@@ -0,0 +1,232 @@
+"""Generate the reproducible benchmark corpus: PDFs, screenshots and post texts.
+
+Run from the backend directory to write the corpus out for inspection:
+
+    python -m benchmarks.corpus /tmp/bench-corpus --seed 0
+
+Everything is drawn from a seeded random generator with no network or
+font downloads, so the same seed always gives the same files. PDFs are
+written directly (Helvetica text and JPEG images), so no PDF library is
+needed to build them.
+"""
+import argparse
+import io
+import json
+import os
+import random
+from PIL import Image, ImageDraw, ImageFont
+
+POSITIVE_WORDS = ['love', 'amazing', 'great', 'excellent', 'happy', 'brilliant', 'nice', 'awesome']
+NEGATIVE_WORDS = ['bad', 'terrible', 'problem', 'issue', 'frustrated', 'awful', 'difficult', 'worried']
+TOPIC_WORDS = [
+    'software', 'startup', 'marketing', 'fitness', 'travel', 'design', 'tutorial', 'data',
+    'product', 'launch', 'customers', 'team', 'strategy', 'content', 'learning', 'community',
+]
+FILLER_WORDS = [
+    'the', 'our', 'this', 'new', 'with', 'for', 'and', 'today', 'every', 'week', 'really',
+    'about', 'your', 'first', 'more', 'from', 'after', 'making', 'building', 'sharing',
+]
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+SCAN_DPI = 150
+
+# Documents per kind at scale 1; pages per document cycle through PAGE_COUNTS
+DOCUMENT_COUNTS = {'digital_pdf': 4, 'scanned_pdf': 2, 'mixed_pdf': 2, 'screenshot': 4}
+PAGE_COUNTS = (1, 3, 10, 25)
+POST_COUNTS = {'short': 200, 'long': 20}
+
+
+def sentence(rng):
+    """One sentence of filler, topic and sentiment words, sometimes a question"""
+    words = [rng.choice(FILLER_WORDS + TOPIC_WORDS) for _ in range(rng.randint(6, 16))]
+    for _ in range(rng.randint(0, 2)):
+        words.insert(rng.randrange(len(words)), rng.choice(POSITIVE_WORDS + NEGATIVE_WORDS))
+    text = ' '.join(words).capitalize()
+    return text + ('?' if rng.random() < 0.15 else '.')
+
+
+def post_text(rng, sentences):
+    return ' '.join(sentence(rng) for _ in range(sentences))
+
+
+def page_lines(rng, count):
+    """Lines of roughly 70 characters for one page of text"""
+    words = post_text(rng, count * 2).split()
+    lines, current = [], ''
+    for word in words:
+        if current and len(current) + 1 + len(word) > 70:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines[:count]
+
+
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def text_image(lines, width, height, font_size, margin=40, background='white'):
+    """Dark text on a light background, one entry of ``lines`` per row"""
+    image = Image.new('RGB', (width, height), background)
+    draw = ImageDraw.Draw(image)
+    font = _font(font_size)
+    for row, line in enumerate(lines):
+        y = margin + row * int(font_size * 1.5)
+        if y + font_size > height - margin:
+            break
+        draw.text((margin, y), line, fill='black', font=font)
+    return image
+
+
+def scanned_page(rng):
+    """A full page of text rendered at SCAN_DPI, slightly grey like a scan"""
+    width, height = PAGE_WIDTH * SCAN_DPI // 72, PAGE_HEIGHT * SCAN_DPI // 72
+    return text_image(page_lines(rng, 40), width, height, font_size=26, margin=90, background=(246, 246, 242))
+
+
+def screenshot(rng, width=1080, height=1920):
+    """A phone screenshot: coloured app bar, then a post's text in large type"""
+    image = text_image(page_lines(rng, 22), width, height, font_size=40, margin=60)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, width, 40), fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    return image
+
+
+def _pdf_string(text):
+    return '(' + text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+
+def write_pdf(path, pages):
+    """Write a PDF whose pages each have optional text ``lines`` and an optional ``image``.
+
+    Text is set in the standard Helvetica font so PDF readers can extract it;
+    images are embedded as JPEG and drawn across the rest of the page.
+    """
+    objects = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page in pages:
+        commands = []
+        resources = "/Font << /F1 3 0 R >>"
+        lines = page.get('lines') or []
+        if lines:
+            commands.append(f"BT /F1 11 Tf 14 TL 50 {PAGE_HEIGHT - 60} Td")
+            commands.extend(f"{_pdf_string(line)} Tj T*" for line in lines)
+            commands.append("ET")
+
+        image = page.get('image')
+        if image is not None:
+            buffer = io.BytesIO()
+            image.convert('RGB').save(buffer, format='JPEG', quality=80)
+            data = buffer.getvalue()
+            objects.append(
+                f"<< /Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} "
+                f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /DCTDecode /Length {len(data)} >>\nstream\n".encode()
+                + data + b"\nendstream"
+            )
+            resources += f" /XObject << /Im1 {len(objects)} 0 R >>"
+            # Below any text, keeping the image's aspect ratio
+            top = PAGE_HEIGHT - 80 - len(lines) * 14 if lines else PAGE_HEIGHT
+            width = PAGE_WIDTH if not lines else PAGE_WIDTH - 100
+            height = min(top, width * image.height / image.width)
+            width = height * image.width / image.height
+            left = (PAGE_WIDTH - width) / 2
+            commands.append(f"q {width:.2f} 0 0 {height:.2f} {left:.2f} {top - height:.2f} cm /Im1 Do Q")
+
+        content = "\n".join(commands).encode('latin-1')
+        objects.append(f"<< /Length {len(content)} >>\nstream\n".encode() + content + b"\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << {resources} >> /Contents {len(objects)} 0 R >>".encode()
+        )
+        page_ids.append(len(objects))
+
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = ' '.join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    output += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, 'wb') as f:
+        f.write(output)
+
+
+def build_corpus(output_dir, seed=0, scale=1):
+    """Write the corpus into output_dir and return its manifest.
+
+    The manifest lists every file with its kind and page count, plus the
+    short and long post texts, and is also saved as manifest.json.
+    """
+    rng = random.Random(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    files = []
+
+    def add_pdf(kind, index, pages):
+        path = os.path.join(output_dir, f"{kind}_{index:02d}.pdf")
+        write_pdf(path, pages)
+        files.append({'kind': kind, 'path': path, 'pages': len(pages)})
+
+    for index in range(DOCUMENT_COUNTS['digital_pdf'] * scale):
+        page_count = PAGE_COUNTS[index % len(PAGE_COUNTS)]
+        add_pdf('digital_pdf', index, [{'lines': page_lines(rng, 45)} for _ in range(page_count)])
+
+    for index in range(DOCUMENT_COUNTS['scanned_pdf'] * scale):
+        page_count = PAGE_COUNTS[index % 2]
+        add_pdf('scanned_pdf', index, [{'image': scanned_page(rng)} for _ in range(page_count)])
+
+    for index in range(DOCUMENT_COUNTS['mixed_pdf'] * scale):
+        # Text pages, screenshot-bearing pages and fully scanned pages interleaved
+        pages = []
+        for page_num in range(PAGE_COUNTS[1 + index % 2]):
+            if page_num % 3 == 0:
+                pages.append({'lines': page_lines(rng, 45)})
+            elif page_num % 3 == 1:
+                pages.append({'lines': page_lines(rng, 8), 'image': screenshot(rng, 540, 960)})
+            else:
+                pages.append({'image': scanned_page(rng)})
+        add_pdf('mixed_pdf', index, pages)
+
+    for index in range(DOCUMENT_COUNTS['screenshot'] * scale):
+        path = os.path.join(output_dir, f"screenshot_{index:02d}.png")
+        screenshot(rng).save(path)
+        files.append({'kind': 'screenshot', 'path': path, 'pages': 1})
+
+    posts = {
+        'short': [post_text(rng, rng.randint(2, 5)) for _ in range(POST_COUNTS['short'] * scale)],
+        'long': [post_text(rng, rng.randint(150, 400)) for _ in range(POST_COUNTS['long'] * scale)],
+    }
+
+    manifest = {'seed': seed, 'scale': scale, 'files': files, 'posts': posts}
+    with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output_dir')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scale', type=int, default=1, help="Multiply the number of documents and posts")
+    args = parser.parse_args()
+
+    manifest = build_corpus(args.output_dir, args.seed, args.scale)
+    for kind in DOCUMENT_COUNTS:
+        entries = [entry for entry in manifest['files'] if entry['kind'] == kind]
+        print(f"{kind:<12} {len(entries):3d} files {sum(entry['pages'] for entry in entries):4d} pages")
+    print(f"posts        {len(manifest['posts']['short'])} short, {len(manifest['posts']['long'])} long")
+
+
+if __name__ == '__main__':
+    main()
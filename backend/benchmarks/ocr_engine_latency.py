@@ -0,0 +1,82 @@
+"""Compare per-image OCR latency of the pytesseract CLI and the warm tesserocr pool.
+
+Run from the backend directory:
+
+    python -m benchmarks.ocr_engine_latency --images 20 --repeat 3
+"""
+import argparse
+import statistics
+import time
+from PIL import Image, ImageDraw, ImageFont
+
+from app.services.ocr_engines import PytesseractEngine, TesserocrEnginePool, tesserocr
+
+SAMPLE_LINES = [
+    "Big news! Our summer sale starts Friday.",
+    "Tag a friend who needs this #deal",
+    "Free shipping on orders over $50",
+    "What's your favourite product? Comment below!",
+]
+
+
+def make_screenshot(index, width=1080, height=360):
+    """A phone-width image with a few lines of dark text on a light background"""
+    image = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=36)
+    except TypeError:
+        font = ImageFont.load_default()
+    for line_num in range(3):
+        text = SAMPLE_LINES[(index + line_num) % len(SAMPLE_LINES)]
+        draw.text((40, 40 + line_num * 100), text, fill='black', font=font)
+    return image
+
+
+def time_engine(engine, images, repeat, config):
+    timings = []
+    for _ in range(repeat):
+        for image in images:
+            start = time.perf_counter()
+            engine.recognize(image, config)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(name, timings):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{name:<12} n={len(timings):<4} mean={statistics.mean(timings):8.1f}ms "
+          f"p50={statistics.median(timings):8.1f}ms p95={p95:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--images', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--config', default='--oem 3 --psm 6')
+    args = parser.parse_args()
+
+    images = [make_screenshot(i) for i in range(args.images)]
+    engines = [PytesseractEngine()]
+    if tesserocr is not None:
+        pool = TesserocrEnginePool(size=1)
+        pool.warm_up(args.config)
+        engines.append(pool)
+    else:
+        print("tesserocr is not installed; only the pytesseract backend will be measured")
+
+    results = {}
+    for engine in engines:
+        # One untimed call so both backends start from a warm disk cache
+        engine.recognize(images[0], args.config)
+        results[engine.name] = time_engine(engine, images, args.repeat, args.config)
+        summarize(engine.name, results[engine.name])
+
+    if len(results) == 2:
+        speedup = statistics.mean(results['pytesseract']) / statistics.mean(results['tesserocr'])
+        print(f"tesserocr is {speedup:.1f}x faster per image")
+
+
+if __name__ == '__main__':
+    main()
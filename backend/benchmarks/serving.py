@@ -0,0 +1,204 @@
+"""Upload throughput and health-check latency under mixed small and large uploads.
+
+Run from the backend directory:
+
+    python -m benchmarks.serving                        # inline vs pool serving mode
+    python -m benchmarks.serving --mode pool --clients 16 --duration 30
+
+Each mode gets its own server process (a threaded WSGI server over
+create_app(), warmed up first). Client threads keep posting uploads for
+``--duration`` seconds: mostly one-page PDFs, with a share of 25-page ones.
+A prober calls /api/health throughout, to show whether the web layer stays
+responsive while documents are processed. Every upload is made unique so
+the result cache never answers. ``--ocr`` adds scanned PDFs and
+screenshots, which need poppler and Tesseract.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from benchmarks.corpus import build_corpus
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 1)
+
+
+def serve(port, mode, cpu_workers, cache_dir):
+    """Run the app on a threaded WSGI server until killed"""
+    from werkzeug.serving import make_server
+    from app import create_app, warm_up
+
+    app = create_app({
+        'SERVING_MODE': mode,
+        'CPU_WORKERS': cpu_workers,
+        'RESULT_CACHE_DIR': cache_dir,
+    })
+    warm_up(app)
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, cpu_workers, workdir):
+    port = free_port()
+    cache_dir = os.path.join(workdir, f'cache-{mode}')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.serving', '--serve', str(port), '--mode', mode,
+         '--cpu-workers', str(cpu_workers), '--cache-dir', cache_dir],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            requests.get(f'{url}/api/health', timeout=1)
+            return process, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+def unique_upload(path):
+    """The file's bytes plus a trailing comment, so no two uploads share a cache key"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return data + f"\n% {random.getrandbits(64):016x}\n".encode()
+
+
+def run_load(url, files, clients, duration, large_share, seed):
+    """Post uploads from ``clients`` threads for ``duration`` seconds while probing /api/health"""
+    samples = {'small': [], 'large': [], 'health': []}
+    counts = {'uploads': 0, 'pages': 0, 'errors': 0}
+    lock = threading.Lock()
+    stop = time.time() + duration
+
+    def client(index):
+        rng = random.Random(seed + index)
+        session = requests.Session()
+        while time.time() < stop:
+            size = 'large' if rng.random() < large_share else 'small'
+            path, pages = rng.choice(files[size])
+            start = time.perf_counter()
+            try:
+                response = session.post(f'{url}/api/upload',
+                                        files={'file': (os.path.basename(path), unique_upload(path))}, timeout=300)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if ok:
+                    samples[size].append(elapsed)
+                    counts['uploads'] += 1
+                    counts['pages'] += pages
+                else:
+                    counts['errors'] += 1
+
+    def prober():
+        session = requests.Session()
+        while time.time() < stop:
+            start = time.perf_counter()
+            try:
+                session.get(f'{url}/api/health', timeout=30)
+                samples['health'].append((time.perf_counter() - start) * 1000)
+            except requests.RequestException:
+                counts['errors'] += 1
+            time.sleep(0.1)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    threads.append(threading.Thread(target=prober))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'uploads': counts['uploads'],
+        'errors': counts['errors'],
+        'uploads_per_s': round(counts['uploads'] / elapsed, 2),
+        'pages_per_s': round(counts['pages'] / elapsed, 1),
+        **{f'{kind}_{name}_ms': percentile(samples[kind], fraction)
+           for kind in ('small', 'large', 'health') for name, fraction in (('p50', 0.5), ('p95', 0.95))},
+        'health_max_ms': round(max(samples['health']), 1) if samples['health'] else None,
+    }
+
+
+def pick_files(manifest, ocr):
+    small_kinds = ('digital_pdf', 'screenshot') if ocr else ('digital_pdf',)
+    large_kinds = ('digital_pdf', 'scanned_pdf', 'mixed_pdf') if ocr else ('digital_pdf',)
+    entries = manifest['files']
+    return {
+        'small': [(e['path'], e['pages']) for e in entries if e['kind'] in small_kinds and e['pages'] == 1],
+        'large': [(e['path'], e['pages']) for e in entries if e['kind'] in large_kinds and e['pages'] >= 10],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', action='append', choices=('inline', 'pool'),
+                        help="Serving mode to measure (repeatable; default both)")
+    parser.add_argument('--clients', type=int, default=8, help="Concurrent upload clients")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds of load per mode")
+    parser.add_argument('--large-share', type=float, default=0.25, help="Fraction of uploads that are large")
+    parser.add_argument('--cpu-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ocr', action='store_true', help="Include scanned PDFs and screenshots")
+    parser.add_argument('--json', help="Also write the results to this file")
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--cache-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        os.environ.setdefault('SENTIMENT_BACKEND', 'rules')
+        serve(args.serve, args.mode[0], args.cpu_workers, args.cache_dir)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='serving-') as workdir:
+        manifest = build_corpus(os.path.join(workdir, 'corpus'), args.seed)
+        files = pick_files(manifest, args.ocr)
+        for mode in args.mode or ['inline', 'pool']:
+            process, url = start_server(mode, args.cpu_workers, workdir)
+            try:
+                results[mode] = run_load(url, files, args.clients, args.duration, args.large_share, args.seed)
+            finally:
+                process.kill()
+                process.wait()
+
+    columns = ['uploads_per_s', 'pages_per_s', 'small_p50_ms', 'small_p95_ms', 'large_p50_ms', 'large_p95_ms',
+               'health_p50_ms', 'health_p95_ms', 'health_max_ms', 'errors']
+    print(f"{'mode':<8}" + ''.join(f"{column:>15}" for column in columns))
+    for mode, result in results.items():
+        print(f"{mode:<8}" + ''.join(f"{str(result[column]):>15}" for column in columns))
+
+    if args.json:
+        report = {'clients': args.clients, 'duration': args.duration, 'large_share': args.large_share,
+                  'cpu_workers': args.cpu_workers, 'ocr': args.ocr, 'modes': results}
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,300 @@
+"""Benchmark every extraction and analysis stage and gate on stored baselines.
+
+Run from the backend directory:
+
+    python -m benchmarks.suite                      # measure and print
+    python -m benchmarks.suite --save-baseline      # record benchmarks/baselines.json
+    python -m benchmarks.suite --check              # exit 1 on a regression, 2 without a baseline
+
+Each stage runs over a generated corpus (see benchmarks/corpus.py) and
+reports throughput, p50/p95 latency per call and the peak Python memory of
+one traced pass. Stages that need poppler or Tesseract are skipped when
+those are not installed. Baselines are machine specific: record them on
+the machine that runs the check.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Benchmarks stay offline and deterministic unless the caller picks a backend
+os.environ.setdefault('SENTIMENT_BACKEND', 'rules')
+
+from pdf2image import convert_from_path
+from PIL import Image
+
+from app import create_app
+from app.services.ai_analyzer import AIAnalyzer
+from app.services.ocr_engines import get_ocr_engine
+from app.services.text_document import TextDocument
+from app.services.text_extraction import TextExtractor, _ocr_page_image
+from benchmarks.corpus import build_corpus
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, 'benchmarks', 'baselines.json')
+
+# Relative slowdown or growth tolerated before a stage counts as regressed
+DEFAULT_TOLERANCE = {'latency': 0.3, 'throughput': 0.3, 'memory': 0.25}
+# Differences smaller than these are timer and allocator noise
+MIN_LATENCY_DELTA_MS = 1.0
+MIN_MEMORY_DELTA_MB = 1.0
+
+
+class StageSkipped(Exception):
+    """A stage cannot run on this machine, e.g. a missing system binary"""
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def measure(items, run, repeat):
+    """Time ``run(payload)`` for every (payload, units) item, then trace one pass for peak memory.
+
+    The first item runs once untimed so imports, engine start-up and caches
+    do not land in the numbers; its failure skips the stage.
+    """
+    try:
+        run(items[0][0])
+    except StageSkipped:
+        raise
+    except Exception as e:
+        raise StageSkipped(f"{type(e).__name__}: {e}")
+
+    timings = []
+    units = 0
+    for _ in range(repeat):
+        for payload, count in items:
+            start = time.perf_counter()
+            run(payload)
+            timings.append((time.perf_counter() - start) * 1000)
+            units += count
+
+    tracemalloc.start()
+    try:
+        for payload, _ in items:
+            run(payload)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'calls': len(timings),
+        'units': units,
+        'p50_ms': round(percentile(timings, 0.5), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'throughput': round(units / (sum(timings) / 1000), 2) if sum(timings) else 0.0,
+        'peak_mb': round(peak / 1024 / 1024, 2),
+    }
+
+
+def build_stages(manifest, cache_dir):
+    """(name, unit, items, run) for each stage; items are (payload, units)"""
+    extractor = TextExtractor(ocr_workers=1)
+    analyzer = AIAnalyzer()
+    files = manifest['files']
+
+    def of_kind(kind):
+        return [(entry['path'], entry['pages']) for entry in files if entry['kind'] in kind]
+
+    screenshots = [(Image.open(path).convert('RGB'), 1) for path, _ in of_kind(('screenshot',))]
+    first_scanned = [(path, 1) for path, _ in of_kind(('scanned_pdf',))]
+    posts = {size: [(TextDocument(analyzer._clean_text(text)), 1) for text in texts]
+             for size, texts in manifest['posts'].items()}
+    raw_posts = {size: [(text, 1) for text in texts] for size, texts in manifest['posts'].items()}
+
+    def render_first_page(path):
+        convert_from_path(path, dpi=extractor.pdf_dpi, first_page=1, last_page=1,
+                          grayscale=extractor.preprocessor.grayscale)
+
+    def ocr(image):
+        _ocr_page_image(image, extractor.image_ocr_config, extractor.ocr_backend, extractor.preprocessor,
+                        extractor.ocr_engine_pool_size)
+
+    stages = [
+        ('direct_pdf_text', 'pages', of_kind(('digital_pdf',)), extractor._classify_pdf_pages),
+        ('render', 'pages', first_scanned, render_first_page),
+        ('preprocess', 'images', screenshots, extractor.preprocessor.process),
+        ('ocr', 'images', screenshots, ocr),
+    ]
+    for size in ('short', 'long'):
+        stages.extend([
+            (f'sentiment_{size}', 'texts', posts[size], analyzer._accurate_sentiment_analysis),
+            (f'topics_{size}', 'texts', posts[size], analyzer._meaningful_topic_extraction),
+            (f'analyze_{size}', 'texts', raw_posts[size], analyzer.analyze_text),
+        ])
+
+    app_state = {}
+
+    def upload(path):
+        # The app loads on the stage's untimed first call
+        if not app_state:
+            app = create_app({'RESULT_CACHE_DIR': cache_dir})
+            app_state.update(pipeline=app.extensions['pipeline'], client=app.test_client())
+        # Every call must miss the result cache to measure the pipeline
+        app_state['pipeline'].result_cache.clear()
+        with open(path, 'rb') as f:
+            response = app_state['client'].post('/api/upload', data={'file': (f, os.path.basename(path))})
+        if response.status_code != 200:
+            # Includes an OCR failure, which the upload reports as an error
+            raise StageSkipped(f"upload returned {response.status_code}: {response.get_json()}")
+
+    for kind in ('digital_pdf', 'scanned_pdf', 'mixed_pdf', 'screenshot'):
+        stages.append((f'upload_{kind}', 'pages', of_kind((kind,)), upload))
+    return stages
+
+
+def check_engine_available():
+    """Raise StageSkipped early when Tesseract cannot run at all"""
+    try:
+        get_ocr_engine('auto').recognize(Image.new('RGB', (32, 32), 'white'))
+    except Exception as e:
+        raise StageSkipped(f"{type(e).__name__}: {e}")
+
+
+def run_suite(manifest, repeat, cache_dir, only=None):
+    results = {}
+    try:
+        check_engine_available()
+        ocr_error = None
+    except StageSkipped as e:
+        ocr_error = str(e)
+
+    for name, unit, items, run in build_stages(manifest, cache_dir):
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        if not items:
+            continue
+        needs_ocr = name in ('ocr', 'upload_scanned_pdf', 'upload_mixed_pdf', 'upload_screenshot')
+        try:
+            if needs_ocr and ocr_error:
+                raise StageSkipped(ocr_error)
+            results[name] = dict(unit=unit, **measure(items, run, repeat))
+        except StageSkipped as e:
+            results[name] = {'skipped': str(e).splitlines()[0][:200]}
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Regression messages for every stage that got slower or bigger than its baseline"""
+    regressions = []
+    for name, base in baseline.get('stages', {}).items():
+        current = results.get(name)
+        if not current or 'skipped' in current or 'skipped' in base:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            limit = max(base[metric] * (1 + tolerance['latency']), base[metric] + MIN_LATENCY_DELTA_MS)
+            if current[metric] > limit:
+                regressions.append(f"{name}: {metric} {current[metric]} > {limit:.3f} (baseline {base[metric]})")
+        limit = base['throughput'] / (1 + tolerance['throughput'])
+        if current['throughput'] < limit:
+            regressions.append(f"{name}: throughput {current['throughput']} < {limit:.2f} (baseline {base['throughput']})")
+        limit = max(base['peak_mb'] * (1 + tolerance['memory']), base['peak_mb'] + MIN_MEMORY_DELTA_MB)
+        if current['peak_mb'] > limit:
+            regressions.append(f"{name}: peak_mb {current['peak_mb']} > {limit:.2f} (baseline {base['peak_mb']})")
+    return regressions
+
+
+def uncovered(results, baseline, only=None):
+    """Stages the check cannot compare, which would otherwise pass without being checked"""
+    stages = baseline.get('stages', {})
+    problems = []
+    for name, current in results.items():
+        if 'skipped' in current:
+            if name in stages and 'skipped' not in stages[name]:
+                problems.append(f"{name}: has a baseline but was skipped: {current['skipped']}")
+        elif name not in stages:
+            problems.append(f"{name}: no baseline")
+    for name in stages:
+        selected = not only or any(name.startswith(prefix) for prefix in only)
+        if selected and name not in results:
+            problems.append(f"{name}: has a baseline but was not run")
+    return problems
+
+
+def print_report(results):
+    print(f"{'stage':<22} {'unit':<7} {'calls':>5} {'p50 ms':>10} {'p95 ms':>10} {'per s':>10} {'peak MB':>8}")
+    for name, result in results.items():
+        if 'skipped' in result:
+            print(f"{name:<22} skipped: {result['skipped']}")
+            continue
+        print(f"{name:<22} {result['unit']:<7} {result['calls']:>5} {result['p50_ms']:>10.2f} "
+              f"{result['p95_ms']:>10.2f} {result['throughput']:>10.1f} {result['peak_mb']:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help="Timed passes over each stage's inputs")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scale', type=int, default=1)
+    parser.add_argument('--corpus-dir', help="Build the corpus here instead of a temporary directory")
+    parser.add_argument('--stage', action='append', help="Only run stages starting with this name (repeatable)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Write these results as the new baseline")
+    parser.add_argument('--check', action='store_true', help="Exit 1 when a stage regressed past the baseline")
+    parser.add_argument('--latency-tolerance', type=float, default=DEFAULT_TOLERANCE['latency'])
+    parser.add_argument('--throughput-tolerance', type=float, default=DEFAULT_TOLERANCE['throughput'])
+    parser.add_argument('--memory-tolerance', type=float, default=DEFAULT_TOLERANCE['memory'])
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench-') as workdir:
+        corpus_dir = args.corpus_dir or os.path.join(workdir, 'corpus')
+        manifest = build_corpus(corpus_dir, args.seed, args.scale)
+        results = run_suite(manifest, args.repeat, os.path.join(workdir, 'cache'), args.stage)
+
+    print_report(results)
+    report = {
+        'meta': {
+            'seed': args.seed,
+            'scale': args.scale,
+            'repeat': args.repeat,
+            'sentiment_backend': os.environ['SENTIMENT_BACKEND'],
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'stages': results,
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"no baseline at {args.baseline}; record one with --save-baseline")
+            sys.exit(2)
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        problems = uncovered(results, baseline, args.stage)
+        if problems:
+            print(f"baseline {args.baseline} does not cover this run; record it again with --save-baseline:")
+            for message in problems:
+                print(f"  {message}")
+            sys.exit(2)
+        tolerance = {
+            'latency': args.latency_tolerance,
+            'throughput': args.throughput_tolerance,
+            'memory': args.memory_tolerance,
+        }
+        regressions = compare(results, baseline, tolerance)
+        if regressions:
+            print("regressions:")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+        print("no regressions against baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,22 @@
+# gunicorn -c gunicorn.conf.py wsgi:app
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+threads = int(os.getenv('WEB_THREADS', 8))
+timeout = int(os.getenv('WEB_TIMEOUT', 120))
+
+# Web workers only accept requests and wait; extraction and analysis run on
+# each worker's CPU process pool, sized so all pools together fill the cores
+os.environ.setdefault('SERVING_MODE', 'pool')
+os.environ.setdefault('CPU_WORKERS', str(max(1, (os.cpu_count() or 1) // workers)))
+
+# Job status and events requests can land on any worker, so jobs are kept
+# where every worker sees them; the in-memory queue only works with one
+os.environ.setdefault('JOB_QUEUE_BACKEND', 'sqlite')
+if workers > 1 and os.environ['JOB_QUEUE_BACKEND'] == 'memory':
+    raise RuntimeError("JOB_QUEUE_BACKEND=memory keeps jobs in one worker; use sqlite with WEB_CONCURRENCY > 1")
+
+# Import wsgi.py, and so run warm_up, once in the master; workers fork with
+# every library, model and OCR engine already loaded and shared copy-on-write
+preload_app = True
@@ -0,0 +1,101 @@
+import json
+import time
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from routes.common import get_pipeline
+
+analyze_bp = Blueprint('analyze', __name__)
+
+
+def parse_analyze_record(record):
+    """(id, text) from a bulk-analysis record: a string or an object with a "text" field"""
+    if isinstance(record, str):
+        return None, record
+    if isinstance(record, dict) and isinstance(record.get('text'), str):
+        return record.get('id'), record['text']
+    raise ValueError('Each record must be a string or an object with a "text" field')
+
+
+def iter_ndjson_records(stream, max_length):
+    """Yield parsed records, or ValueError instances for bad lines, one line at a time"""
+    while True:
+        line = stream.readline(max_length + 1)
+        if not line:
+            return
+        if len(line) > max_length and not line.endswith(b"\n"):
+            # Skip the rest of an oversized line without holding it in memory
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(max_length + 1)
+            yield ValueError(f"Record longer than {max_length} bytes")
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Invalid JSON: {str(e)}")
+
+
+def iter_batches(records, batch_size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Bulk text analysis: JSON array or NDJSON in, NDJSON out
+@analyze_bp.route('/api/analyze', methods=['POST'])
+def analyze_texts():
+    """Analyze posts that are already text, in batches, streaming one line per record"""
+    if request.mimetype == 'application/json':
+        # A JSON array has to be parsed whole, so it keeps the normal body limit
+        records = request.get_json(silent=True)
+        if not isinstance(records, list):
+            return jsonify({'error': 'Expected a JSON array of texts, or an NDJSON body'}), 400
+    else:
+        # NDJSON is read line by line as it arrives, so it may be much larger
+        request.max_content_length = current_app.config['MAX_ANALYZE_CONTENT_LENGTH']
+        records = iter_ndjson_records(request.stream, current_app.config['MAX_ANALYZE_RECORD_LENGTH'])
+
+    pipeline = get_pipeline()
+    batch_size = current_app.config['ANALYZE_BATCH_SIZE']
+
+    def generate():
+        start = time.perf_counter()
+        summary = {'type': 'summary', 'total': 0, 'succeeded': 0, 'failed': 0}
+        index = 0
+
+        for batch in iter_batches(records, batch_size):
+            lines = []
+            texts = []
+            for record in batch:
+                line = {'type': 'result', 'index': index}
+                index += 1
+                try:
+                    if isinstance(record, ValueError):
+                        raise record
+                    record_id, text = parse_analyze_record(record)
+                    if record_id is not None:
+                        line['id'] = record_id
+                    texts.append(text)
+                except ValueError as e:
+                    line.update({'status': 'error', 'error': str(e)})
+                lines.append(line)
+
+            analyses = iter(pipeline.analyze_texts(texts))
+            for line in lines:
+                if 'error' in line:
+                    summary['failed'] += 1
+                else:
+                    line.update({'status': 'success', 'analysis': next(analyses)})
+                    summary['succeeded'] += 1
+                yield json.dumps(line) + "\n"
+
+        summary['total'] = index
+        summary['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        yield json.dumps(summary) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
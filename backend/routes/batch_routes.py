@@ -0,0 +1,127 @@
+import os
+import json
+import zipfile
+import logging
+from contextlib import ExitStack
+from concurrent.futures import as_completed
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from app.pipeline import upload_response_data
+from app.services.admission import AdmissionRejected
+from routes.common import client_id, extraction_limits, get_pipeline, stage_upload
+
+logger = logging.getLogger(__name__)
+
+batch_bp = Blueprint('batch', __name__)
+
+
+def collect_batch_items(limits):
+    """Stage every document from 'files' fields, expanding any ZIP archives"""
+    max_files = current_app.config['MAX_BATCH_FILES']
+    items = []
+    try:
+        for file in request.files.getlist('files') + request.files.getlist('file'):
+            if not file or file.filename == '':
+                continue
+
+            if file.filename.lower().endswith('.zip'):
+                with zipfile.ZipFile(file.stream) as archive:
+                    for member in archive.infolist():
+                        name = member.filename
+                        # Skip folders and OS metadata such as __MACOSX/ and .DS_Store
+                        if member.is_dir() or os.path.basename(name).startswith('.') or '__MACOSX' in name:
+                            continue
+                        if member.file_size > current_app.config['MAX_CONTENT_LENGTH']:
+                            items.append({'filename': name, 'error': 'File too large. Maximum size is 10MB'})
+                        else:
+                            with archive.open(member) as member_stream:
+                                items.append(stage_upload(name, member_stream, limits))
+
+                        if len(items) > max_files:
+                            break
+            else:
+                items.append(stage_upload(file.filename, file.stream, limits))
+
+            if len(items) > max_files:
+                raise ValueError(f"Too many files. Maximum per batch is {max_files}")
+    except Exception:
+        for item in items:
+            if 'buffer' in item:
+                item['buffer'].close()
+        raise
+
+    return items
+
+
+def process_batch_item(pipeline, item, limits=None):
+    """Run one staged batch document through the cached upload pipeline"""
+    try:
+        result, cache_status = pipeline.result_cache.get_or_compute(
+            item['cache_key'],
+            lambda: pipeline.analyze_admitted(item['buffer'], item['filename'], limits=limits)
+        )
+    finally:
+        item['buffer'].close()
+    return upload_response_data(item['filename'], item['file_size'], result, cache_status)
+
+
+# Batch upload: many files or a ZIP, results streamed back as NDJSON as each finishes
+@batch_bp.route('/api/batch', methods=['POST'])
+def batch_upload():
+    # Batches get a larger body limit than single uploads; set before the form is parsed
+    request.max_content_length = current_app.config['MAX_BATCH_CONTENT_LENGTH']
+
+    try:
+        # The same page selection and word budget apply to every document
+        limits = extraction_limits(request.args)
+        items = collect_batch_items(limits)
+    except zipfile.BadZipFile:
+        return jsonify({'error': 'Invalid ZIP archive'}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if not items:
+        return jsonify({'error': 'No files provided'}), 400
+
+    pipeline = get_pipeline()
+    # The whole batch counts as one of the client's requests until the response is closed
+    slots = ExitStack()
+    try:
+        slots.enter_context(pipeline.admission.client_slot(client_id()))
+    except AdmissionRejected:
+        for item in items:
+            if 'buffer' in item:
+                item['buffer'].close()
+        raise
+
+    def generate():
+        futures = {}
+        summary = {'type': 'summary', 'total': len(items), 'succeeded': 0, 'failed': 0}
+
+        for index, item in enumerate(items):
+            if 'error' in item:
+                summary['failed'] += 1
+                yield json.dumps({'type': 'file', 'index': index, 'filename': item['filename'], 'status': 'error', 'error': item['error']}) + "\n"
+            else:
+                futures[pipeline.batch_executor.submit(process_batch_item, pipeline, item, limits)] = (index, item['filename'])
+
+        # One bad document only fails its own line
+        for future in as_completed(futures):
+            index, filename = futures[future]
+            try:
+                line = {'type': 'file', 'index': index, 'filename': filename, 'status': 'success', 'data': future.result()}
+                summary['succeeded'] += 1
+            except AdmissionRejected as e:
+                # Only this document was shed; the client can resend it after retry_after seconds
+                line = {'type': 'file', 'index': index, 'filename': filename, 'status': 'error', 'error': str(e), 'retry_after': e.retry_after}
+                summary['failed'] += 1
+            except Exception as e:
+                logger.error(f"Batch item {filename} failed: {str(e)}")
+                line = {'type': 'file', 'index': index, 'filename': filename, 'status': 'error', 'error': f'Processing failed: {str(e)}'}
+                summary['failed'] += 1
+            yield json.dumps(line) + "\n"
+
+        yield json.dumps(summary) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.call_on_close(slots.close)
+    return response
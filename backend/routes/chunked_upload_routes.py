@@ -0,0 +1,166 @@
+import os
+import logging
+from flask import Blueprint, current_app, request, jsonify
+from app.pipeline import upload_response_data
+from app.services import metrics
+from app.services.chunked_upload import UploadOffsetMismatch
+from app.services.extraction_limits import ExtractionLimits
+from routes.common import allowed_file, extraction_limits, get_pipeline
+
+logger = logging.getLogger(__name__)
+
+chunked_upload_bp = Blueprint('chunked_upload', __name__)
+
+
+def upload_status(record):
+    return {
+        'upload_id': record['id'],
+        'filename': record['filename'],
+        'size': record['size'],
+        'offset': record['offset'],
+        'upload_url': f"/api/uploads/{record['id']}",
+        'chunk_size': current_app.config['CHUNKED_UPLOAD_CHUNK_SIZE']
+    }
+
+
+def with_offset(response, record):
+    response.headers['Upload-Offset'] = str(record['offset'])
+    return response
+
+
+def finish_upload(pipeline, record):
+    """Look the assembled file up in the result cache, and queue it as a job if it is new"""
+    path, file_hash = pipeline.chunked_uploads.assembled(record['id'])
+    file_ext = os.path.splitext(record['filename'])[1]
+    limits = ExtractionLimits(**record['limits']) if record.get('limits') else None
+    cache_key = pipeline.cache_key_for_hash(file_hash, file_ext, limits)
+
+    cached, tier = pipeline.result_cache.get(cache_key)
+    if cached is not None:
+        # A document we have already analyzed; nothing to process
+        pipeline.remove_upload(path)
+        completion = {'cache_key': cache_key}
+    else:
+        # The job reads the assembled file from disk, so a large document is never held in memory
+        job_id = pipeline.job_manager.submit({
+            'file_path': path,
+            'original_filename': record['filename'],
+            'file_size': record['size'],
+            'cache_key': cache_key,
+            'limits': record.get('limits')
+        })
+        completion = {'job_id': job_id}
+
+    pipeline.chunked_uploads.complete(record['id'], completion)
+    return completion_response(pipeline, dict(record, completion=completion))
+
+
+def completion_response(pipeline, record):
+    completion = record['completion']
+    if 'job_id' in completion:
+        job_id = completion['job_id']
+        return jsonify({
+            'status': 'accepted',
+            'message': 'File queued for processing',
+            'data': {
+                **upload_status(record),
+                'job_id': job_id,
+                'status_url': f"/api/jobs/{job_id}",
+                'events_url': f"/api/jobs/{job_id}/events"
+            }
+        }), 202
+
+    result, tier = pipeline.result_cache.get(completion['cache_key'])
+    if result is None:
+        return jsonify({'error': 'The result for this upload is no longer cached. Please upload the file again'}), 410
+    return jsonify({
+        'status': 'success',
+        'message': 'File processed and analyzed successfully',
+        'data': {**upload_status(record), **upload_response_data(record['filename'], record['size'], result, tier)}
+    }), 200
+
+
+# Start a resumable upload: {"filename": ..., "size": ...}, optionally with pages, max_pages, max_words or quick
+@chunked_upload_bp.route('/api/uploads', methods=['POST'])
+def create_upload():
+    body = request.get_json(silent=True) or {}
+    filename = body.get('filename')
+    size = body.get('size')
+
+    if not filename or not allowed_file(filename):
+        return jsonify({'error': 'Invalid file type. Allowed: PDF, PNG, JPG, JPEG'}), 400
+    if not isinstance(size, int) or isinstance(size, bool):
+        return jsonify({'error': 'size must be the file length in bytes'}), 400
+
+    try:
+        limits = extraction_limits(body)
+        record = get_pipeline().chunked_uploads.create(
+            os.path.basename(filename), size, limits.as_dict() if limits else None
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return with_offset(jsonify({'status': 'created', 'data': upload_status(record)}), record), 201
+
+
+# Upload progress; clients resume from the returned offset. Once complete, the job or result
+@chunked_upload_bp.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    pipeline = get_pipeline()
+    record = pipeline.chunked_uploads.get(upload_id)
+    if record is None:
+        return jsonify({'error': 'Upload not found'}), 404
+
+    if record['completion'] is not None:
+        response, status = completion_response(pipeline, record)
+        return with_offset(response, record), status
+    return with_offset(jsonify({'status': 'success', 'data': upload_status(record)}), record)
+
+
+# Append one chunk, sent as the raw request body starting at the Upload-Offset header
+@chunked_upload_bp.route('/api/uploads/<upload_id>', methods=['PATCH'])
+def append_chunk(upload_id):
+    chunk_limit = current_app.config['CHUNKED_UPLOAD_CHUNK_SIZE']
+    # Chunks get their own body limit; nothing here goes through the form parser
+    request.max_content_length = chunk_limit
+    if request.content_length is not None and request.content_length > chunk_limit:
+        return jsonify({'error': f'Chunk too large. Maximum chunk size is {chunk_limit} bytes'}), 413
+
+    offset = request.headers.get('Upload-Offset', request.args.get('offset'))
+    try:
+        offset = int(offset)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Upload-Offset header must give the byte offset of this chunk'}), 400
+
+    pipeline = get_pipeline()
+    uploads = pipeline.chunked_uploads
+    try:
+        new_offset = uploads.append(upload_id, offset, request.stream)
+    except KeyError:
+        return jsonify({'error': 'Upload not found'}), 404
+    except UploadOffsetMismatch as e:
+        response = jsonify({'error': str(e), 'offset': e.offset})
+        response.headers['Upload-Offset'] = str(e.offset)
+        return response, 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    metrics.bytes_processed_total.inc(request.endpoint, amount=new_offset - offset)
+    record = uploads.get(upload_id)
+    if record['offset'] < record['size']:
+        return with_offset(jsonify({'status': 'success', 'data': upload_status(record)}), record)
+
+    # The last chunk is in: processing starts now, without waiting for another request
+    try:
+        response, status = finish_upload(pipeline, record)
+    except Exception as e:
+        logger.error(f"Could not finish chunked upload {upload_id}: {str(e)}")
+        return jsonify({'error': f'Could not queue file: {str(e)}'}), 500
+    return with_offset(response, record), status
+
+
+@chunked_upload_bp.route('/api/uploads/<upload_id>', methods=['DELETE'])
+def delete_upload(upload_id):
+    if not get_pipeline().chunked_uploads.discard(upload_id):
+        return jsonify({'error': 'Upload not found'}), 404
+    return jsonify({'status': 'success', 'message': 'Upload discarded'})
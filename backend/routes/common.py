@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+from flask import current_app, request, jsonify
+from app.services import metrics
+from app.services.extraction_limits import ExtractionLimits
+
+ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'}
+
+
+def get_pipeline():
+    """The app's shared extraction and analysis services"""
+    return current_app.extensions['pipeline']
+
+
+def client_id():
+    """Who a request counts against for per-client admission limits"""
+    header = current_app.config['ADMISSION_CLIENT_HEADER']
+    if header and request.headers.get(header):
+        # Proxies append to X-Forwarded-For; the first entry is the original client
+        return request.headers[header].split(',')[0].strip()
+    return request.remote_addr
+
+
+def extraction_limits(params):
+    """Page selection and word budget from ``pages``, ``max_pages`` and ``max_words`` parameters.
+
+    ``quick`` asks for a fast read of a long document: a QUICK_ANALYSIS_MAX_WORDS
+    budget unless max_words is given. Raises ValueError for bad values.
+    """
+    max_words = params.get('max_words')
+    if max_words in (None, '') and str(params.get('quick', '')).lower() in ('1', 'true', 'yes'):
+        max_words = current_app.config['QUICK_ANALYSIS_MAX_WORDS']
+    return ExtractionLimits.parse(params.get('pages'), params.get('max_pages'), max_words)
+
+
+def allowed_file(filename):
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def get_uploaded_file():
+    """Validate the multipart 'file' field; returns (file, size, error_response)"""
+    # Check if file is present
+    if 'file' not in request.files:
+        return None, 0, (jsonify({'error': 'No file provided'}), 400)
+
+    file = request.files['file']
+
+    # Check if file is selected
+    if file.filename == '':
+        return None, 0, (jsonify({'error': 'No file selected'}), 400)
+
+    # Validate file type
+    if not (file and allowed_file(file.filename)):
+        return None, 0, (jsonify({'error': 'Invalid file type. Allowed: PDF, PNG, JPG, JPEG'}), 400)
+
+    # Validate file size
+    file.seek(0, os.SEEK_END)
+    file_length = file.tell()
+    file.seek(0)
+
+    if file_length > current_app.config['MAX_CONTENT_LENGTH']:
+        return None, 0, (jsonify({'error': 'File too large. Maximum size is 10MB'}), 400)
+
+    if file_length == 0:
+        return None, 0, (jsonify({'error': 'File is empty'}), 400)
+
+    metrics.bytes_processed_total.inc(request.endpoint, amount=file_length)
+    return file, file_length, None
+
+
+def stage_upload(filename, stream, limits=None):
+    """Validate one document and copy it into a buffer we own.
+
+    Request file streams are closed once the view returns, so documents are
+    staged before results start streaming back. Buffers stay in memory
+    unless the document is larger than UPLOAD_SPOOL_THRESHOLD.
+    """
+    if not allowed_file(os.path.basename(filename)):
+        return {'filename': filename, 'error': 'Invalid file type. Allowed: PDF, PNG, JPG, JPEG'}
+
+    buffer = tempfile.SpooledTemporaryFile(max_size=current_app.config['UPLOAD_SPOOL_THRESHOLD'], mode='w+b')
+    shutil.copyfileobj(stream, buffer)
+    file_length = buffer.tell()
+
+    error = None
+    if file_length > current_app.config['MAX_CONTENT_LENGTH']:
+        error = 'File too large. Maximum size is 10MB'
+    elif file_length == 0:
+        error = 'File is empty'
+    if error:
+        buffer.close()
+        return {'filename': filename, 'error': error}
+
+    metrics.bytes_processed_total.inc(request.endpoint, amount=file_length)
+    file_ext = os.path.splitext(filename)[1]
+    cache_key = get_pipeline().upload_cache_key(buffer, file_ext, limits)
+
+    return {'filename': filename, 'buffer': buffer, 'file_size': file_length, 'cache_key': cache_key}
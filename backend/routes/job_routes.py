@@ -0,0 +1,95 @@
+import os
+import json
+import time
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from routes.common import extraction_limits, get_pipeline, get_uploaded_file
+
+job_bp = Blueprint('jobs', __name__)
+
+
+# Asynchronous upload: returns a job id straight away
+@job_bp.route('/api/jobs', methods=['POST'])
+def create_job():
+    try:
+        file, file_length, error_response = get_uploaded_file()
+        if error_response:
+            return error_response
+
+        try:
+            limits = extraction_limits(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        pipeline = get_pipeline()
+        file_ext = os.path.splitext(file.filename)[1]
+        cache_key = pipeline.upload_cache_key(file.stream, file_ext, limits)
+        filepath = pipeline.save_upload(file.stream, file_ext)
+
+        job_id = pipeline.job_manager.submit({
+            'file_path': filepath,
+            'original_filename': file.filename,
+            'file_size': file_length,
+            'cache_key': cache_key,
+            'limits': limits.as_dict() if limits else None
+        })
+
+        return jsonify({
+            'status': 'accepted',
+            'message': 'File queued for processing',
+            'data': {
+                'job_id': job_id,
+                'status_url': f"/api/jobs/{job_id}",
+                'events_url': f"/api/jobs/{job_id}/events"
+            }
+        }), 202
+
+    except Exception as e:
+        return jsonify({'error': f'Could not queue file: {str(e)}'}), 500
+
+
+# Job status, progress and result
+@job_bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = get_pipeline().job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    return jsonify({
+        'status': 'success',
+        'data': job
+    })
+
+
+# Live job progress as Server-Sent Events
+@job_bp.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    job_manager = get_pipeline().job_manager
+    if job_manager.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    poll_interval = current_app.config['JOB_EVENTS_POLL_INTERVAL']
+
+    def generate():
+        last_state = None
+        while True:
+            job = job_manager.get(job_id)
+            if job is None:
+                break
+
+            state = (job['status'], job['pages_done'], job['pages_total'])
+            if state != last_state:
+                last_state = state
+                event = 'result' if job['status'] in ('done', 'failed') else 'progress'
+                if event == 'progress':
+                    job.pop('result', None)
+                yield f"event: {event}\ndata: {json.dumps(job)}\n\n"
+
+            if job['status'] in ('done', 'failed'):
+                break
+            time.sleep(poll_interval)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
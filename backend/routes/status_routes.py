@@ -0,0 +1,67 @@
+from flask import Blueprint, Response, jsonify
+from app.services import metrics
+from routes.common import get_pipeline
+
+status_bp = Blueprint('status', __name__)
+
+
+# Health check route; never builds the extraction or analysis services
+@status_bp.route('/api/health', methods=['GET'])
+def health_check():
+    return jsonify({
+        'status': 'healthy',
+        'message': 'Backend is running',
+        'service': 'Social Media Content Analyzer'
+    })
+
+
+# Test analysis route
+@status_bp.route('/api/test-analysis', methods=['GET'])
+def test_analysis():
+    """Test endpoint to check AI analysis without file upload"""
+    test_text = "This is a sample social media post about technology and innovation. What do you think about the future of AI? Let's discuss in the comments!"
+
+    try:
+        analysis_result = get_pipeline().ai_analyzer.analyze_text(test_text)
+
+        return jsonify({
+            'status': 'success',
+            'test_text': test_text,
+            'data': {
+                'analysis': analysis_result
+            }
+        })
+    except Exception as e:
+        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
+
+
+# Result cache statistics
+@status_bp.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        'status': 'success',
+        'data': get_pipeline().result_cache.stats()
+    })
+
+
+# Admission lanes: documents running and queued, and the limits they run under
+@status_bp.route('/api/admission/stats', methods=['GET'])
+def admission_stats():
+    return jsonify({
+        'status': 'success',
+        'data': get_pipeline().admission.stats()
+    })
+
+
+@status_bp.route('/api/sentiment/stats', methods=['GET'])
+def sentiment_stats():
+    return jsonify({
+        'status': 'success',
+        'data': get_pipeline().ai_analyzer.sentiment_stats()
+    })
+
+
+# Prometheus scrape endpoint
+@status_bp.route('/api/metrics', methods=['GET'])
+def metrics_export():
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
@@ -1,69 +1,253 @@
-from flask import Blueprint, request, jsonify
 import os
-from werkzeug.utils import secure_filename
-from app.services.text_extraction import TextExtractionService
+import hmac
+import json
+import queue
+import logging
+from contextlib import ExitStack
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context, send_file, url_for
+from werkzeug.exceptions import RequestEntityTooLarge
+from app.pipeline import upload_response_data
+from app.services.admission import AdmissionRejected
+from app.services.extraction_limits import PageSelectionError
+from app.services.text_document import PAGE_MARKER
+from routes.common import client_id, extraction_limits, get_pipeline, get_uploaded_file, stage_upload
+
+logger = logging.getLogger(__name__)
 
 upload_bp = Blueprint('upload', __name__)
 
-ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'}
 
-def allowed_file(filename):
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+def page_record(page, partial=None):
+    """Stream record for one extracted page, with the running analysis when there is one"""
+    record = {
+        'type': 'page',
+        'page': page['page'],
+        'kind': page['kind'],
+        'method': page['method'],
+        'text': page['text'],
+        'char_count': len(page['text']),
+        'timings_ms': page.get('timings', {})
+    }
+    if partial is not None:
+        record['partial_analysis'] = partial
+    return record
+
+
+def split_page_texts(extracted_text):
+    """{page number: text}, undoing the "--- Page N ---" framing the extractor adds"""
+    parts = PAGE_MARKER.split(extracted_text)
+    if len(parts) == 1:
+        return {1: extracted_text}
+    # Each page is framed as "--- Page N ---\n{text}\n\n"
+    return {int(number): body[1:-2] for number, body in zip(parts[1::2], parts[2::2])}
+
+
+def format_stream_record(record, stream_format):
+    if stream_format == 'sse':
+        return f"event: {record['type']}\ndata: {json.dumps(record)}\n\n"
+    return json.dumps(record) + "\n"
+
+
+def stream_upload(file, stream_format, limits):
+    """Respond with each page as soon as it is extracted, then the analysis"""
+    item = stage_upload(file.filename, file.stream, limits)
+    if 'error' in item:
+        return jsonify({'error': item['error']}), 400
+
+    pipeline = get_pipeline()
+    events = queue.Queue()
+
+    slots = ExitStack()
+    try:
+        slots.enter_context(pipeline.admission.client_slot(client_id()))
+    except AdmissionRejected:
+        item['buffer'].close()
+        raise
+
+    def analyze():
+        # Cache hits never get here, so only uploads that need processing take a lane slot
+        with pipeline.admitted(item['buffer'], item['filename'], limits=limits):
+            events.put(('admitted', None))
+            return pipeline.analyze_upload(item['buffer'], item['filename'], on_page=lambda page, partial: events.put(('page', page_record(page, partial))), limits=limits)
+
+    def run():
+        try:
+            result, cache_status = pipeline.result_cache.get_or_compute(item['cache_key'], analyze)
+            events.put(('done', (result, cache_status)))
+        except AdmissionRejected as e:
+            events.put(('rejected', e))
+        except Exception as e:
+            logger.error(f"Streaming upload {item['filename']} failed: {str(e)}")
+            events.put(('error', str(e)))
+        finally:
+            slots.close()
+            item['buffer'].close()
+
+    pipeline.batch_executor.submit(run)
+
+    # Wait for a lane slot, or the finished result, before the response starts, so a busy server can still answer 429
+    first = events.get()
+    if first[0] == 'rejected':
+        raise first[1]
+    if first[0] != 'admitted':
+        # A cache hit or an error is the only event that will come
+        events.put(first)
 
-def get_file_type(filename):
-    return filename.rsplit('.', 1)[1].lower()
+    def generate():
+        pages_streamed = 0
+        while True:
+            kind, payload = events.get()
+            if kind == 'page':
+                pages_streamed += 1
+                yield format_stream_record(payload, stream_format)
+            elif kind == 'error':
+                yield format_stream_record({'type': 'error', 'error': f'Processing failed: {payload}'}, stream_format)
+                break
+            else:
+                result, cache_status = payload
+                # Cache hits and coalesced requests never ran extraction here; replay their pages
+                if not pages_streamed:
+                    texts = split_page_texts(result['extracted_text'])
+                    for page in result['pages']:
+                        yield format_stream_record({
+                            'type': 'page',
+                            'page': page['page'],
+                            'kind': page['kind'],
+                            'method': page['method'],
+                            'text': texts.get(page['page'], ''),
+                            'char_count': page['char_count'],
+                            'timings_ms': page.get('timings_ms', {})
+                        }, stream_format)
 
+                # The pages already carried the text, so the final record leaves it out
+                data = upload_response_data(item['filename'], item['file_size'], result, cache_status)
+                data.pop('extracted_text')
+                yield format_stream_record({'type': 'result', 'data': data}, stream_format)
+                break
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if stream_format == 'sse' else 'application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+# File upload and analysis route
 @upload_bp.route('/api/upload', methods=['POST'])
 def upload_file():
     try:
-        # Check if file is present
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
-        
-        file = request.files['file']
-        
-        # Check if file is selected
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        # Validate file type
-        if file and allowed_file(file.filename):
-            # Secure filename and save
-            filename = secure_filename(file.filename)
-            filepath = os.path.join('uploads', filename)
-            file.save(filepath)
-            
-            # Extract text based on file type
-            file_type = get_file_type(filename)
-            extraction_result = TextExtractionService.extract_text(filepath, file_type)
-            
-            if 'error' in extraction_result:
-                return jsonify({
-                    'status': 'error',
-                    'message': 'File uploaded but text extraction failed',
-                    'filename': filename,
-                    'error': extraction_result['error']
-                }), 200
-            
-            return jsonify({
-                'status': 'success',
-                'message': 'File uploaded and processed successfully',
-                'filename': filename,
-                'file_type': file_type,
-                'extraction_method': extraction_result.get('method', 'unknown'),
-                'extracted_text': extraction_result.get('text', ''),
-                'text_length': len(extraction_result.get('text', ''))
-            }), 200
-        else:
-            allowed_types = ', '.join(ALLOWED_EXTENSIONS)
-            return jsonify({
-                'error': f'Invalid file type. Allowed types: {allowed_types}'
-            }), 400
-            
+        # ?profile=1 or X-Profile: 1 returns a CPU and memory profile of this request
+        profile = profiling_requested()
+        if profile and not is_profile_admin():
+            return jsonify({'error': 'Profiling requires a valid X-Admin-Token header'}), 403
+
+        file, file_length, error_response = get_uploaded_file()
+        if error_response:
+            return error_response
+
+        # ?pages=1-5,8, ?max_pages=N and ?max_words=N (or ?quick=1) read only part of a long document
+        try:
+            limits = extraction_limits(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # ?stream=ndjson or ?stream=sse sends pages as they are extracted
+        stream_format = request.args.get('stream')
+        if stream_format:
+            if stream_format not in ('ndjson', 'sse'):
+                return jsonify({'error': 'stream must be ndjson or sse'}), 400
+            if profile:
+                return jsonify({'error': 'Profiling is not available for streamed uploads'}), 400
+            return stream_upload(file, stream_format, limits)
+
+        pipeline = get_pipeline()
+
+        def handle():
+            # Reuse the result of an identical earlier upload if we have one
+            file_ext = os.path.splitext(file.filename)[1]
+            cache_key = pipeline.upload_cache_key(file.stream, file_ext, limits)
+            if profile:
+                # A profile of a cache hit would show nothing, so always do the work, in this
+                # thread even in pool serving mode so the profile sees it
+                with pipeline.admitted(file.stream, file.filename, limits=limits):
+                    result = pipeline.process_upload(file.stream, file.filename, limits=limits)
+                pipeline.result_cache.set(cache_key, result)
+                return result, 'bypass'
+            # Cache hits skip admission; only uploads that need processing take a slot
+            return pipeline.result_cache.get_or_compute(cache_key, lambda: pipeline.analyze_admitted(file.stream, file.filename, limits=limits))
+
+        profiler = pipeline.request_profiler
+        profile_report = None
+        with pipeline.admission.client_slot(client_id()):
+            if profile:
+                (result, cache_status), profile_report = profiler.run(handle, label=file.filename)
+            elif profiler.should_sample():
+                # Sampled reports only go to PROFILE_DIR; skip the sample if a profile is already running
+                (result, cache_status), _ = profiler.run(
+                    handle, label=file.filename, wait=False, trace_memory=profiler.sample_memory
+                )
+            else:
+                result, cache_status = handle()
+
+        data = upload_response_data(file.filename, file_length, result, cache_status)
+        if profile_report:
+            data['profile'] = profile_summary(profile_report)
+
+        return jsonify({
+            'status': 'success',
+            'message': 'File processed and analyzed successfully',
+            'data': data
+        }), 200
+
+    except (AdmissionRejected, RequestEntityTooLarge):
+        # Answered with 429 and Retry-After, or 413 and the size limit, by the app's error handlers
+        raise
+    except PageSelectionError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return jsonify({'error': f'Processing failed: {str(e)}'}), 500
+
+
+def profiling_requested():
+    flag = request.headers.get('X-Profile') or request.args.get('profile')
+    return flag is not None and flag.lower() in ('1', 'true', 'yes')
+
+
+def is_profile_admin():
+    """Whether the request carries PROFILE_ADMIN_TOKEN; profiling is off while no token is configured"""
+    token = current_app.config['PROFILE_ADMIN_TOKEN']
+    supplied = request.headers.get('X-Admin-Token', '')
+    return bool(token) and hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+
+
+def profile_summary(report):
+    """The headline numbers of a profile report, with links to download the full report"""
+    return {
+        'id': report['id'],
+        'wall_seconds': report['wall_seconds'],
+        'cpu_seconds': report['cpu_seconds'],
+        'memory': {key: value for key, value in report['memory'].items() if key != 'top_allocations'},
+        'top_functions': report['cpu']['top_functions'][:10],
+        'top_allocations': report['memory']['top_allocations'][:10],
+        'report_url': url_for('upload.download_profile', report_id=report['id']),
+        'pstats_url': url_for('upload.download_profile', report_id=report['id'], format='pstats')
+    }
+
+
+@upload_bp.route('/api/profiles/<report_id>', methods=['GET'])
+def download_profile(report_id):
+    """Full profile report as JSON, or the raw cProfile data with ?format=pstats"""
+    if not is_profile_admin():
+        return jsonify({'error': 'Profile reports require a valid X-Admin-Token header'}), 403
+
+    extension = 'prof' if request.args.get('format') == 'pstats' else 'json'
+    path = get_pipeline().request_profiler.report_path(report_id, extension)
+    if path is None or not os.path.exists(path):
+        return jsonify({'error': 'Profile report not found'}), 404
 
-@upload_bp.route('/api/test', methods=['GET'])
-def test_route():
-    return jsonify({'message': 'Backend is working!'})
\ No newline at end of file
+    return send_file(
+        os.path.abspath(path),
+        mimetype='application/octet-stream' if extension == 'prof' else 'application/json',
+        as_attachment=True,
+        download_name=f"profile-{report_id}.{extension}"
+    )
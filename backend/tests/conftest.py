@@ -0,0 +1,55 @@
+import io
+import os
+import pytest
+from benchmarks.corpus import write_pdf
+from app import create_app
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Build an app whose caches, uploads and profiles live under the test's temporary directory"""
+    def make(**config):
+        return create_app({
+            'RESULT_CACHE_DIR': str(tmp_path / 'cache'),
+            'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+            'CHUNKED_UPLOAD_DIR': str(tmp_path / 'uploads' / 'chunked'),
+            'PROFILE_DIR': str(tmp_path / 'profiles'),
+            'JOB_QUEUE_BACKEND': 'memory',
+            'SERVING_MODE': 'inline',
+            **config
+        })
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def pipeline(app):
+    return app.extensions['pipeline']
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Bytes of a digital PDF with one page per list of text lines"""
+    def make(*pages):
+        path = os.path.join(tmp_path, 'document.pdf')
+        write_pdf(path, [{'lines': lines} for lines in pages])
+        with open(path, 'rb') as f:
+            return f.read()
+    return make
+
+
+@pytest.fixture
+def upload(client):
+    """POST a document to /api/upload"""
+    def post(data, filename='document.pdf', query=''):
+        return client.post(f'/api/upload{query}', data={'file': (io.BytesIO(data), filename)})
+    return post
@@ -0,0 +1,128 @@
+import io
+import json
+import threading
+import time
+import pytest
+from app.services.admission import AdmissionController, AdmissionRejected
+
+
+def make_controller(concurrency=1, queue_size=1, per_client=2, queue_timeout=5.0):
+    return AdmissionController(
+        lanes={'direct': (concurrency, queue_size), 'ocr': (1, 0)},
+        per_client=per_client,
+        queue_timeout=queue_timeout
+    )
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+
+def test_client_slots_are_capped_per_client():
+    controller = make_controller(per_client=2)
+    with controller.client_slot('a'), controller.client_slot('a'):
+        with pytest.raises(AdmissionRejected) as rejected:
+            with controller.client_slot('a'):
+                pass
+        assert rejected.value.retry_after == 1
+        # Another client is not affected
+        with controller.client_slot('b'):
+            assert controller.stats()['clients'] == 2
+    assert controller.stats()['clients'] == 0
+    with controller.client_slot('a'):
+        pass
+
+
+def test_full_lane_queues_then_sheds():
+    controller = make_controller(concurrency=1, queue_size=1)
+    controller.acquire('direct')
+
+    admitted = threading.Event()
+
+    def waiter():
+        with controller.slot('direct'):
+            admitted.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    wait_for(lambda: controller.stats()['lanes']['direct']['queued'] == 1)
+
+    # Running and queue are both full
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire('direct')
+    assert 'queue full' in str(rejected.value)
+    assert rejected.value.retry_after >= 1
+
+    # Releasing hands the slot straight to the waiter
+    controller.release('direct', 0.1)
+    thread.join(5)
+    assert admitted.is_set()
+    assert controller.stats()['lanes']['direct']['running'] == 0
+
+
+def test_lanes_are_independent():
+    controller = make_controller(concurrency=1, queue_size=0)
+    controller.acquire('direct')
+    with controller.slot('ocr'):
+        assert controller.stats()['lanes']['ocr']['running'] == 1
+
+
+def test_queued_request_times_out():
+    controller = make_controller(concurrency=1, queue_size=1, queue_timeout=0.05)
+    controller.acquire('direct')
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire('direct')
+    assert 'waited' in str(rejected.value)
+    assert controller.stats()['lanes']['direct']['queued'] == 0
+
+
+def test_unbounded_acquire_waits_past_the_queue_size():
+    controller = make_controller(concurrency=1, queue_size=0, queue_timeout=0.01)
+    controller.acquire('direct')
+    thread = threading.Thread(target=controller.acquire, args=('direct', False))
+    thread.start()
+    wait_for(lambda: controller.stats()['lanes']['direct']['queued'] == 1)
+    time.sleep(0.05)
+    assert thread.is_alive()
+    controller.release('direct', 0.1)
+    thread.join(5)
+    assert controller.stats()['lanes']['direct']['running'] == 1
+
+
+def test_client_over_its_limit_gets_429(make_app, make_pdf):
+    app = make_app(ADMISSION_PER_CLIENT=1)
+    pipeline = app.extensions['pipeline']
+    data = make_pdf(['A short post about a product launch'])
+    # The test client's requests come from 127.0.0.1
+    with pipeline.admission.client_slot('127.0.0.1'):
+        response = app.test_client().post('/api/upload', data={'file': (io.BytesIO(data), 'post.pdf')})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    assert response.get_json()['retry_after'] == 1
+
+
+@pytest.mark.parametrize('query', ['', '?stream=ndjson'])
+def test_cache_hits_skip_a_full_lane(make_app, make_pdf, query):
+    app = make_app(ADMISSION_DIRECT_CONCURRENCY=1, ADMISSION_DIRECT_QUEUE=0)
+    client = app.test_client()
+    pipeline = app.extensions['pipeline']
+    cached = make_pdf(['An announcement everyone already read'])
+    assert client.post('/api/upload', data={'file': (io.BytesIO(cached), 'cached.pdf')}).status_code == 200
+    fresh = make_pdf(['A new announcement nobody has seen'])
+
+    with pipeline.admission.slot('direct'):
+        response = client.post(f'/api/upload{query}', data={'file': (io.BytesIO(fresh), 'fresh.pdf')})
+        assert response.status_code == 429
+        assert int(response.headers['Retry-After']) >= 1
+
+        response = client.post(f'/api/upload{query}', data={'file': (io.BytesIO(cached), 'cached.pdf')})
+        assert response.status_code == 200
+        if query:
+            records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+            assert records[-1]['type'] == 'result'
+            assert records[-1]['data']['cache_status'] == 'memory'
+        else:
+            assert response.get_json()['data']['cache_status'] == 'memory'
@@ -0,0 +1,197 @@
+import hashlib
+import io
+import os
+import threading
+import time
+import pytest
+from app.services.chunked_upload import ChunkedUploadStore, UploadOffsetMismatch
+
+
+class SlowStream(io.BytesIO):
+    """A request body that arrives a little at a time"""
+
+    def read(self, size=-1):
+        time.sleep(0.02)
+        return super().read(size)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ChunkedUploadStore(str(tmp_path / 'chunked'), max_size=1024, block_size=4)
+
+
+def test_chunks_resume_from_the_stored_offset(store):
+    record = store.create('report.pdf', 12)
+    assert store.append(record['id'], 0, io.BytesIO(b'abcd')) == 4
+    assert store.get(record['id'])['offset'] == 4
+    assert store.append(record['id'], 4, io.BytesIO(b'efghijkl')) == 12
+
+    path, file_hash = store.assembled(record['id'])
+    assert path.endswith('.pdf')
+    with open(path, 'rb') as f:
+        assert f.read() == b'abcdefghijkl'
+    assert file_hash == hashlib.sha256(b'abcdefghijkl').hexdigest()
+
+
+def test_chunk_at_the_wrong_offset_is_rejected(store):
+    record = store.create('report.pdf', 8)
+    store.append(record['id'], 0, io.BytesIO(b'abcd'))
+    with pytest.raises(UploadOffsetMismatch) as mismatch:
+        store.append(record['id'], 0, io.BytesIO(b'abcd'))
+    assert mismatch.value.offset == 4
+    assert store.get(record['id'])['offset'] == 4
+
+
+def test_chunk_past_the_declared_size_is_rejected(store):
+    record = store.create('report.pdf', 6)
+    with pytest.raises(ValueError):
+        store.append(record['id'], 0, io.BytesIO(b'abcdefgh'))
+    # Whole blocks that fit are kept, so the client can resume after them
+    assert store.get(record['id'])['offset'] == 4
+
+
+def test_create_checks_the_declared_size(store):
+    with pytest.raises(ValueError):
+        store.create('report.pdf', 0)
+    with pytest.raises(ValueError, match='Maximum size'):
+        store.create('report.pdf', 4096)
+
+
+def test_hash_catches_up_after_another_process_took_chunks(store, tmp_path):
+    record = store.create('report.pdf', 8)
+    store.append(record['id'], 0, io.BytesIO(b'abcd'))
+    # A second store on the same directory stands in for another worker process
+    other = ChunkedUploadStore(str(tmp_path / 'chunked'), block_size=4)
+    other.append(record['id'], 4, io.BytesIO(b'efgh'))
+    _, file_hash = store.assembled(record['id'])
+    assert file_hash == hashlib.sha256(b'abcdefgh').hexdigest()
+
+
+def test_retried_chunk_overlapping_one_in_progress_is_not_appended_twice(store):
+    record = store.create('report.pdf', 16)
+    outcomes = []
+
+    def send():
+        try:
+            outcomes.append(store.append(record['id'], 0, SlowStream(b'x' * 8)))
+        except UploadOffsetMismatch as e:
+            outcomes.append(('mismatch', e.offset))
+
+    threads = [threading.Thread(target=send) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(outcomes) == 2 and 8 in outcomes and ('mismatch', 8) in outcomes
+    store.append(record['id'], 8, io.BytesIO(b'y' * 8))
+    path, file_hash = store.assembled(record['id'])
+    with open(path, 'rb') as f:
+        assert f.read() == b'x' * 8 + b'y' * 8
+    assert file_hash == hashlib.sha256(b'x' * 8 + b'y' * 8).hexdigest()
+
+
+def test_discard_and_expiry(store):
+    record = store.create('report.pdf', 8)
+    assert store.discard(record['id'])
+    assert store.get(record['id']) is None
+    assert not store.discard(record['id'])
+    with pytest.raises(KeyError):
+        store.append(record['id'], 0, io.BytesIO(b'abcd'))
+
+    store.ttl = 0
+    record = store.create('report.pdf', 8)
+    time.sleep(0.01)
+    store.purge_expired()
+    assert store.get(record['id']) is None
+
+
+def test_ids_that_are_not_hex_name_no_upload(store):
+    assert store.get('../../etc/passwd') is None
+    assert not store.discard('../secret')
+
+
+def test_upload_locks_are_only_held_for_live_uploads(store):
+    for upload_id in ('../secret', 'abc123', 'f' * 32):
+        with pytest.raises(KeyError):
+            store.append(upload_id, 0, io.BytesIO(b'abcd'))
+    assert store._upload_locks == {}
+
+    record = store.create('report.pdf', 4)
+    store.append(record['id'], 0, io.BytesIO(b'abcd'))
+    store.assembled(record['id'])
+    store.complete(record['id'], {'job_id': 'job'})
+    assert store._upload_locks == {}
+
+
+def send_in_chunks(client, upload_id, data, chunk_size):
+    response = None
+    for offset in range(0, len(data), chunk_size):
+        response = client.patch(
+            f'/api/uploads/{upload_id}', data=data[offset:offset + chunk_size], headers={'Upload-Offset': str(offset)}
+        )
+    return response
+
+
+def start_upload(client, filename, size, **options):
+    response = client.post('/api/uploads', json={'filename': filename, 'size': size, **options})
+    assert response.status_code == 201
+    return response.get_json()['data']['upload_id']
+
+
+def test_chunked_upload_queues_a_job(make_app, make_pdf):
+    app = make_app(CHUNKED_UPLOAD_CHUNK_SIZE=256)
+    client = app.test_client()
+    data = make_pdf(['Our annual report shows record growth'] * 20, ['Customers are delighted'] * 20)
+    upload_id = start_upload(client, 'annual.pdf', len(data))
+
+    response = send_in_chunks(client, upload_id, data, 256)
+    assert response.status_code == 202
+    job_id = response.get_json()['data']['job_id']
+    assert response.headers['Upload-Offset'] == str(len(data))
+
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        job = client.get(f'/api/jobs/{job_id}').get_json()['data']
+        if job['status'] in ('done', 'failed'):
+            break
+        time.sleep(0.05)
+    assert job['status'] == 'done'
+    assert job['result']['page_count'] == 2
+
+    # A client that missed the reply gets it again
+    assert client.get(f'/api/uploads/{upload_id}').get_json()['data']['job_id'] == job_id
+
+
+def test_chunked_upload_of_a_cached_document_returns_the_result(make_app, make_pdf):
+    app = make_app(CHUNKED_UPLOAD_CHUNK_SIZE=256)
+    client = app.test_client()
+    data = make_pdf(['A document that was analyzed before'] * 10)
+    assert client.post('/api/upload', data={'file': (io.BytesIO(data), 'seen.pdf')}).status_code == 200
+
+    upload_id = start_upload(client, 'seen.pdf', len(data))
+    response = send_in_chunks(client, upload_id, data, 256)
+    assert response.status_code == 200
+    assert response.get_json()['data']['cache_status'] in ('memory', 'disk')
+
+
+def test_chunk_errors(make_app):
+    app = make_app(CHUNKED_UPLOAD_CHUNK_SIZE=16)
+    client = app.test_client()
+    upload_id = start_upload(client, 'report.pdf', 40)
+
+    response = client.patch(f'/api/uploads/{upload_id}', data=b'x' * 17, headers={'Upload-Offset': '0'})
+    assert response.status_code == 413
+    assert '16' in response.get_json()['error']
+
+    client.patch(f'/api/uploads/{upload_id}', data=b'x' * 16, headers={'Upload-Offset': '0'})
+    response = client.patch(f'/api/uploads/{upload_id}', data=b'x' * 16, headers={'Upload-Offset': '0'})
+    assert response.status_code == 409
+    assert response.headers['Upload-Offset'] == '16'
+
+    response = client.patch(f'/api/uploads/{upload_id}', data=b'x', headers={})
+    assert response.status_code == 400
+    assert client.patch('/api/uploads/abc123', data=b'x', headers={'Upload-Offset': '0'}).status_code == 404
+    assert client.post('/api/uploads', json={'filename': 'notes.txt', 'size': 10}).status_code == 400
+    assert client.delete(f'/api/uploads/{upload_id}').status_code == 200
+    assert client.get(f'/api/uploads/{upload_id}').status_code == 404
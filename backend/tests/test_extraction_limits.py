@@ -0,0 +1,148 @@
+import io
+import pytest
+from PIL import Image
+from benchmarks.corpus import write_pdf
+from app.services.extraction_limits import ExtractionLimits, PageSelectionError, parse_page_ranges, truncate_words
+from app.services.text_extraction import TextExtractor
+
+
+def numbered_pages(count, words_per_page=10):
+    """Text pages whose words say which page they are on"""
+    return [[' '.join(f'p{page}w{word}' for word in range(words_per_page))] for page in range(1, count + 1)]
+
+
+@pytest.fixture
+def extractor():
+    return TextExtractor(ocr_workers=1)
+
+
+def test_parse_page_ranges():
+    assert parse_page_ranges('1-3, 5,8-') == [(1, 3), (5, 5), (8, None)]
+    assert parse_page_ranges('-2') == [(1, 2)]
+    for spec in ('', 'a', '3-1', '0', '1,,2', '-'):
+        with pytest.raises(ValueError):
+            parse_page_ranges(spec)
+
+
+def test_parse_rejects_bad_numbers():
+    for options in ({'max_pages': '0'}, {'max_words': 'many'}, {'max_pages': '-1'}):
+        with pytest.raises(ValueError):
+            ExtractionLimits.parse(**options)
+    assert not ExtractionLimits.parse(pages='', max_pages='', max_words=None)
+
+
+def test_select_pages():
+    assert ExtractionLimits(pages=[(2, 3), (8, None)]).select(9) == [2, 3, 8, 9]
+    assert ExtractionLimits(pages=[(3, 3), (1, 2)], max_pages=2).select(5) == [1, 2]
+    # Ranges past the end are clipped, and a selection with no pages at all is an error
+    assert ExtractionLimits(pages=[(4, 10)]).select(5) == [4, 5]
+    with pytest.raises(PageSelectionError):
+        ExtractionLimits(pages=[(7, 9)]).select(5)
+
+
+def test_limits_round_trip_as_plain_data():
+    limits = ExtractionLimits.parse('1-2,5', '3', '100')
+    assert ExtractionLimits(**limits.as_dict()).as_dict() == limits.as_dict() == {
+        'pages': [[1, 2], [5, 5]], 'max_pages': 3, 'max_words': 100
+    }
+
+
+def test_truncate_words_keeps_whitespace_up_to_the_cut():
+    assert truncate_words('one  two\nthree four', 3) == 'one  two\nthree'
+    assert truncate_words('one two', 5) == 'one two'
+    assert truncate_words('one two', 0) == ''
+
+
+def test_page_selection_reads_only_those_pages(extractor, make_pdf):
+    data = make_pdf(*numbered_pages(6))
+    pages_seen = []
+    document = extractor.extract_document_from_buffer(
+        data, 'report.pdf', on_page=lambda page: pages_seen.append(page['page']),
+        limits=ExtractionLimits(pages=[(2, 3), (6, None)])
+    )
+    assert [page['page'] for page in document['pages']] == [2, 3, 6]
+    assert pages_seen == [2, 3, 6]
+    assert document['page_count'] == 6
+    assert 'p4w0' not in document['text'] and 'p6w0' in document['text']
+    assert not document['truncated']
+
+
+def test_word_budget_stops_in_page_order(extractor, make_pdf):
+    data = make_pdf(*numbered_pages(5))
+    texts = []
+    document = extractor.extract_document_from_buffer(
+        data, 'report.pdf', on_text=texts.append, limits=ExtractionLimits(max_words=25)
+    )
+    assert [page['page'] for page in document['pages']] == [1, 2, 3]
+    assert document['pages'][-1]['truncated']
+    assert document['pages'][-1]['text'].split() == [f'p3w{word}' for word in range(5)]
+    assert document['truncated']
+    assert ''.join(texts) == document['text']
+
+
+def test_budget_that_covers_the_selection_is_not_truncated(extractor, make_pdf):
+    data = make_pdf(*numbered_pages(3))
+    document = extractor.extract_document_from_buffer(data, 'report.pdf', limits=ExtractionLimits(max_words=30))
+    assert len(document['pages']) == 3
+    assert not document['truncated']
+
+
+def test_word_budget_stops_ocr_early(extractor, tmp_path, monkeypatch):
+    scan = Image.new('RGB', (60, 60), 'white')
+    path = str(tmp_path / 'scanned.pdf')
+    write_pdf(path, [{'image': scan} for _ in range(6)])
+    ocred = []
+
+    def fake_ocr(pdf_path, page_numbers):
+        for page_num in page_numbers:
+            ocred.append(page_num)
+            yield page_num, ' '.join(f'p{page_num}w{word}' for word in range(10)), {}
+
+    monkeypatch.setattr(extractor, '_iter_pdf_ocr', fake_ocr)
+    document = extractor.extract_document(path, limits=ExtractionLimits(max_words=15))
+    assert ocred == [1, 2]
+    assert [page['method'] for page in document['pages']] == ['ocr', 'ocr']
+    assert document['truncated']
+    assert document['page_count'] == 6
+
+
+def test_needs_ocr_only_looks_at_selected_pages(extractor, tmp_path):
+    path = str(tmp_path / 'mixed.pdf')
+    write_pdf(path, [{'lines': ['Typed text on the first page']}, {'image': Image.new('RGB', (60, 60), 'white')}])
+    assert extractor.needs_ocr(path, 'mixed.pdf')
+    assert not extractor.needs_ocr(path, 'mixed.pdf', ExtractionLimits(pages=[(1, 1)]))
+
+
+def test_upload_with_limits(make_pdf, upload):
+    data = make_pdf(*numbered_pages(4))
+    response = upload(data, query='?pages=2-3')
+    assert response.status_code == 200
+    result = response.get_json()['data']
+    assert [page['page'] for page in result['pages']] == [2, 3]
+    assert result['page_count'] == 4
+    assert not result['truncated']
+
+    # The same file with other limits, or none, is not answered from that result
+    quick = upload(data, query='?max_words=5').get_json()['data']
+    assert quick['cache_status'] == 'miss'
+    assert quick['truncated']
+    full = upload(data).get_json()['data']
+    assert full['cache_status'] == 'miss'
+    assert len(full['pages']) == 4
+
+
+def test_upload_with_bad_limits_is_a_client_error(make_pdf, upload):
+    data = make_pdf(*numbered_pages(2))
+    for query in ('?pages=5-9', '?pages=x', '?max_words=0'):
+        response = upload(data, query=query)
+        assert response.status_code == 400, query
+        assert 'error' in response.get_json()
+
+
+def test_quick_uses_the_configured_budget(make_app, make_pdf):
+    app = make_app(QUICK_ANALYSIS_MAX_WORDS=12)
+    data = make_pdf(*numbered_pages(3))
+    response = app.test_client().post('/api/upload?quick=1', data={'file': (io.BytesIO(data), 'report.pdf')})
+    result = response.get_json()['data']
+    assert len(result['pages']) == 2
+    assert result['truncated']
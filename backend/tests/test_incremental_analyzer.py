@@ -0,0 +1,71 @@
+import pickle
+import random
+import pytest
+from benchmarks.corpus import post_text
+from app.services.ai_analyzer import AIAnalyzer
+from app.services.incremental_analyzer import IncrementalAnalyzer, finalize_all
+
+
+class FakeRemoteModel:
+    """Labels a text by its length, recording each call's texts"""
+    source = 'ai_model'
+    remote = True
+    max_input_chars = 512
+
+    def __init__(self):
+        self.calls = []
+
+    def classify(self, text):
+        return self.classify_batch([text])[0]
+
+    def classify_batch(self, texts):
+        self.calls.append(list(texts))
+        return [{'label': 'POSITIVE' if len(text) % 2 else 'NEGATIVE', 'score': 0.9, 'source': self.source}
+                for text in texts]
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    monkeypatch.setenv('SENTIMENT_BACKEND', 'rules')
+    monkeypatch.setenv('SENTIMENT_CHUNK_CHARS', '400')
+    analyzer = AIAnalyzer()
+    analyzer.sentiment_model = FakeRemoteModel()
+    return analyzer
+
+
+def texts():
+    rng = random.Random(7)
+    pages = '\n\n'.join(f"--- Page {page} ---\n{post_text(rng, 12)}" for page in range(1, 4))
+    return [post_text(rng, 3), 'too short', post_text(rng, 40), pages]
+
+
+def test_worker_finished_analyses_match_analyze_batch(analyzer):
+    # Category hashtags are a random sample
+    random.seed(0)
+    expected = analyzer.analyze_batch(texts())
+    analyzer.sentiment_model.calls.clear()
+
+    # As a pool worker does: count the text, then send the analysis to the web process
+    analyses = []
+    for text in texts():
+        analysis = IncrementalAnalyzer(analyzer)
+        analysis.feed(text)
+        analysis.finish_text()
+        analyses.append(pickle.loads(pickle.dumps(analysis)))
+    assert all(analysis.analyzer is None for analysis in analyses)
+
+    random.seed(0)
+    assert finalize_all(analyzer, analyses) == expected
+    # One model batch across every text, as analyze_batch sends
+    assert len(analyzer.sentiment_model.calls) == 1
+
+
+def test_failed_model_call_falls_back_to_rules(analyzer):
+    def fail(texts):
+        raise RuntimeError("API down")
+    analyzer.sentiment_model.classify_batch = fail
+    analysis = IncrementalAnalyzer(analyzer)
+    analysis.feed(texts()[2])
+    result = analysis.finalize()
+    assert result['sentiment']['source'] != 'ai_model'
+    assert result['word_count'] > 0
@@ -0,0 +1,94 @@
+import sqlite3
+import time
+from app.services.job_queue import JobManager, SQLiteJobQueue
+
+
+def wait_for_status(manager, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.02)
+    return manager.get(job_id)
+
+
+def test_job_runs_and_reports_progress(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / 'jobs.db'), poll_interval=0.01)
+
+    def handler(payload, progress):
+        progress(1, 2)
+        return {'doubled': payload['n'] * 2}
+
+    manager = JobManager(queue, handler, workers=1)
+    job_id = manager.submit({'n': 21})
+    job = wait_for_status(manager, job_id)
+    manager.stop()
+    assert job['status'] == 'done'
+    assert job['result'] == {'doubled': 42}
+    assert job['pages_total'] == 2
+    assert 'payload' not in job
+
+
+def test_failed_handler_marks_the_job_failed(tmp_path):
+    def handler(payload, progress):
+        raise RuntimeError("unreadable PDF")
+
+    manager = JobManager(SQLiteJobQueue(str(tmp_path / 'jobs.db'), poll_interval=0.01), handler, workers=1)
+    job = wait_for_status(manager, manager.submit({}))
+    manager.stop()
+    assert job['status'] == 'failed'
+    assert job['error'] == 'unreadable PDF'
+
+
+def test_job_of_a_dead_worker_is_requeued_then_failed(tmp_path):
+    abandoned = []
+    queue = SQLiteJobQueue(
+        str(tmp_path / 'jobs.db'), poll_interval=0.01, lease_seconds=0.1, max_attempts=2, on_abandoned=abandoned.append
+    )
+    job_id = queue.enqueue({'file_path': 'upload.pdf'})
+    # Claimed by workers that never finish or renew it
+    assert queue.claim(timeout=0)['id'] == job_id
+    time.sleep(0.15)
+    assert queue.claim(timeout=0)['id'] == job_id
+    time.sleep(0.15)
+    assert queue.claim(timeout=0) is None
+    job = queue.get(job_id)
+    assert job['status'] == 'failed'
+    assert 'stopped' in job['error']
+    assert abandoned == [{'file_path': 'upload.pdf'}]
+
+
+def test_heartbeat_keeps_a_slow_job_leased(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / 'jobs.db'), poll_interval=0.01, lease_seconds=0.15, max_attempts=1)
+    manager = JobManager(queue, lambda payload, progress: time.sleep(0.6) or 'ok', workers=1)
+    job = wait_for_status(manager, manager.submit({}))
+    manager.stop()
+    assert job['status'] == 'done'
+    assert job['result'] == 'ok'
+
+
+def test_older_job_files_gain_lease_columns(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT, "
+        "pages_done INTEGER NOT NULL DEFAULT 0, pages_total INTEGER, result TEXT, error TEXT, "
+        "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+    )
+    # Left running by a worker from before leases existed
+    conn.execute("INSERT INTO jobs VALUES ('old', 'running', '{}', 0, NULL, NULL, NULL, 1, 1)")
+    conn.commit()
+    conn.close()
+
+    queue = SQLiteJobQueue(path, poll_interval=0.01)
+    assert queue.claim(timeout=0)['id'] == 'old'
+
+
+def test_each_process_works_a_sqlite_queue_from_its_first_request(make_app, tmp_path):
+    app = make_app(JOB_QUEUE_BACKEND='sqlite', JOB_QUEUE_PATH=str(tmp_path / 'jobs.db'))
+    manager = app.extensions['pipeline'].job_manager
+    assert not manager._threads
+    app.test_client().get('/api/health')
+    assert manager._threads
+    manager.stop()
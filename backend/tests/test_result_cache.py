@@ -0,0 +1,103 @@
+import io
+import threading
+import time
+import pytest
+from PIL import Image
+from app.services import text_extraction
+from app.services.result_cache import ResultCache
+
+
+def test_get_misses_then_hits_memory(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path))
+    assert cache.get('a') == (None, None)
+    cache.set('a', {'value': 1})
+    assert cache.get('a') == ({'value': 1}, 'memory')
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    ResultCache(cache_dir=str(tmp_path)).set('a', {'value': 1})
+    assert ResultCache(cache_dir=str(tmp_path)).get('a') == ({'value': 1}, 'disk')
+
+
+def test_memory_tier_is_lru_bounded():
+    cache = ResultCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') == (None, None)
+    assert cache.get('a') == (1, 'memory')
+    assert cache.stats()['evictions'] == 1
+
+
+def test_make_key_depends_on_config():
+    assert ResultCache.make_key('hash', '.pdf', {'dpi': 200}) == ResultCache.make_key('hash', '.pdf', {'dpi': 200})
+    assert ResultCache.make_key('hash', '.pdf', {'dpi': 200}) != ResultCache.make_key('hash', '.pdf', {'dpi': 300})
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResultCache()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'value': 1}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('a', compute))) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # Let the followers reach the in-flight computation before it finishes
+    deadline = time.time() + 5
+    while cache.stats()['coalesced'] < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(status for _, status in results) == ['coalesced', 'coalesced', 'coalesced', 'miss']
+    assert all(value == {'value': 1} for value, _ in results)
+
+
+def test_compute_errors_reach_waiters_and_are_not_cached():
+    cache = ResultCache()
+
+    def fail():
+        raise RuntimeError("OCR failed")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute('a', fail)
+    assert cache.get('a') == (None, None)
+    assert cache.stats()['in_flight'] == 0
+    assert cache.get_or_compute('a', lambda: 2) == (2, 'miss')
+
+
+def test_upload_is_served_from_cache(make_pdf, upload):
+    data = make_pdf(['Quarterly results were strong and customers love the product'])
+    first = upload(data).get_json()['data']
+    second = upload(data).get_json()['data']
+    assert first['cache_status'] == 'miss'
+    assert second['cache_status'] == 'memory'
+    assert second['extracted_text'] == first['extracted_text']
+
+
+def test_failed_image_ocr_is_not_cached(monkeypatch, upload, pipeline):
+    class BrokenEngine:
+        def recognize(self, image, config=''):
+            raise RuntimeError("tesseract crashed")
+
+    monkeypatch.setattr(text_extraction, 'get_ocr_engine', lambda *args, **kwargs: BrokenEngine())
+    buffer = io.BytesIO()
+    Image.new('RGB', (200, 100), 'white').save(buffer, format='PNG')
+
+    response = upload(buffer.getvalue(), filename='post.png')
+    assert response.status_code == 500
+    assert 'tesseract crashed' in response.get_json()['error']
+    assert pipeline.result_cache.stats()['memory_entries'] == 0
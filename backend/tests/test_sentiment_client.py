@@ -0,0 +1,125 @@
+import threading
+import time
+from app.services.sentiment_client import CircuitBreaker, HuggingFaceSentimentClient
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self.payload
+
+
+def scores(label):
+    return [{'label': label, 'score': 0.9}, {'label': 'neutral', 'score': 0.1}]
+
+
+def make_client(post, **options):
+    options.setdefault('batch_window_ms', 0)
+    client = HuggingFaceSentimentClient('token', api_url='http://sentiment.test', **options)
+    client.session.post = post
+    return client
+
+
+def echo_labels(calls):
+    """A fake API that labels each text with itself, recording the batches it gets"""
+    def post(url, json, timeout):
+        calls.append(list(json['inputs']))
+        return FakeResponse([scores(text) for text in json['inputs']])
+    return post
+
+
+def test_breaker_opens_after_threshold_and_half_opens():
+    breaker = CircuitBreaker(failure_threshold=2, reset_after=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    # One trial call, and nothing else until it reports back
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+
+def test_breaker_reopens_when_the_trial_call_fails():
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+
+def test_open_circuit_skips_the_api():
+    calls = []
+
+    def failing(url, json, timeout):
+        calls.append(json)
+        return FakeResponse({'error': 'loading'}, status_code=503)
+
+    client = make_client(failing, failure_threshold=2, reset_after=60)
+    assert client.classify('one') is None
+    assert client.classify('two') is None
+    assert client.classify('three') is None
+
+    assert len(calls) == 2
+    stats = client.stats()
+    assert stats['circuit'] == 'open'
+    assert stats['api_failures'] == 2
+    assert stats['short_circuited'] == 1
+    assert stats['fallbacks'] == 3
+
+
+def test_unexpected_response_counts_as_a_failure():
+    client = make_client(lambda url, json, timeout: FakeResponse([scores('positive')]), failure_threshold=1)
+    assert client.classify_batch(['a', 'b']) == [None, None]
+    assert client.breaker.state == 'open'
+
+
+def test_classify_batch_splits_into_batch_size_calls():
+    calls = []
+    client = make_client(echo_labels(calls), batch_size=2)
+    results = client.classify_batch(['a', 'b', 'c'])
+    assert [result['label'] for result in results] == ['A', 'B', 'C']
+    assert sorted(map(len, calls)) == [1, 2]
+
+
+def test_concurrent_classify_calls_share_one_request():
+    calls = []
+    client = make_client(echo_labels(calls), batch_window_ms=200, batch_size=4)
+    results = {}
+    texts = ['a', 'b', 'c', 'd']
+    threads = [threading.Thread(target=lambda t=text: results.update({t: client.classify(t)})) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    # A full batch is sent without waiting out the window, and every caller gets its own result
+    assert len(calls) == 1
+    assert sorted(calls[0]) == texts
+    assert {text: result['label'] for text, result in results.items()} == {'a': 'A', 'b': 'B', 'c': 'C', 'd': 'D'}
+
+
+def test_followers_are_released_when_the_leaders_call_fails():
+    def broken(url, json, timeout):
+        raise ConnectionError("connection reset")
+
+    client = make_client(broken, batch_window_ms=200, batch_size=3)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.classify('text'))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [None, None, None]
+    assert client.stats()['api_failures'] == 1
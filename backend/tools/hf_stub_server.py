@@ -0,0 +1,92 @@
+"""Local stand-in for the Hugging Face sentiment inference API, for offline testing.
+
+Run from the backend directory:
+
+    python -m tools.hf_stub_server --port 8081 --latency-ms 50 --fail-rate 0.1
+
+then point the backend at it with HUGGINGFACE_API_URL=http://127.0.0.1:8081/
+and any HUGGINGFACE_API_TOKEN. Answers the same JSON shapes as the real
+endpoint, scoring texts with a tiny keyword rule.
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+POSITIVE_WORDS = {'love', 'great', 'good', 'amazing', 'happy', 'excellent', 'awesome'}
+NEGATIVE_WORDS = {'hate', 'bad', 'terrible', 'awful', 'sad', 'angry', 'problem'}
+
+
+def score_text(text):
+    words = set(text.lower().split())
+    positive = len(words & POSITIVE_WORDS)
+    negative = len(words & NEGATIVE_WORDS)
+    total = positive + negative + 1
+    scores = {
+        'positive': positive / total,
+        'negative': negative / total,
+        'neutral': 1 / total,
+    }
+    return [{'label': label, 'score': round(score, 4)} for label, score in scores.items()]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail_rate = 0.0
+    calls = 0
+
+    def do_POST(self):
+        StubHandler.calls += 1
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.latency)
+
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            return self._reply(401, {'error': 'Authorization header is required'})
+        if random.random() < self.fail_rate:
+            return self._reply(503, {'error': 'Model is currently loading'})
+
+        payload = json.loads(body or b'null')
+        inputs = payload.get('inputs') if isinstance(payload, dict) else payload
+        if isinstance(inputs, list):
+            return self._reply(200, [score_text(text) for text in inputs])
+        return self._reply(200, [score_text(inputs or '')])
+
+    def _reply(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting, which is what --latency-ms is for
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Delay added to every response")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="Fraction of calls answered with 503")
+    args = parser.parse_args()
+
+    StubHandler.latency = args.latency_ms / 1000.0
+    StubHandler.fail_rate = args.fail_rate
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"Sentiment stub listening on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
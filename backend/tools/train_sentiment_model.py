@@ -0,0 +1,139 @@
+"""Train the local hashed n-gram sentiment model and export its weights.
+
+Run from the backend directory with a labelled CSV (text,label columns) or
+JSON Lines file ({"text": ..., "label": ...} per line):
+
+    python -m tools.train_sentiment_model data/sentiment.csv --output models/sentiment_model.npy
+
+Writes the memory-mappable weights matrix and its .json sidecar, which
+SENTIMENT_BACKEND=local loads from SENTIMENT_MODEL_PATH.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+from app.services.local_sentiment import HashedFeaturizer, LocalSentimentModel
+
+
+def load_examples(path):
+    """(texts, labels) from a CSV with text/label columns or a JSON Lines file"""
+    texts, labels = [], []
+    with open(path, encoding='utf-8', newline='') as f:
+        if path.endswith(('.jsonl', '.ndjson')):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for row in rows:
+            texts.append(row['text'])
+            labels.append(str(row['label']).strip().upper())
+    return texts, labels
+
+
+def train(texts, label_ids, n_labels, featurizer, epochs, batch_size, learning_rate, l2):
+    """Multinomial logistic regression by mini-batch AdaGrad on sparse hashed features"""
+    n_features = featurizer.n_features
+    weights = np.zeros((n_features + 1, n_labels), dtype=np.float32)
+    grad_squares = np.full_like(weights, 1e-8)
+    indptr, indices, values = featurizer.transform(texts)
+    label_ids = np.asarray(label_ids)
+    rng = np.random.default_rng(0)
+
+    for epoch in range(epochs):
+        order = rng.permutation(len(texts))
+        total_loss = 0.0
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            # Gather this batch's rows out of the CSR arrays
+            lengths = indptr[batch + 1] - indptr[batch]
+            rows = np.repeat(np.arange(len(batch)), lengths)
+            positions = np.concatenate([np.arange(indptr[i], indptr[i + 1]) for i in batch]) if lengths.sum() else np.zeros(0, dtype=np.int64)
+            batch_indices = indices[positions]
+            batch_values = values[positions]
+
+            logits = np.tile(weights[n_features], (len(batch), 1))
+            np.add.at(logits, rows, weights[batch_indices] * batch_values[:, None])
+            logits -= logits.max(axis=1, keepdims=True)
+            probabilities = np.exp(logits)
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            total_loss -= np.log(probabilities[np.arange(len(batch)), label_ids[batch]] + 1e-12).sum()
+
+            errors = probabilities
+            errors[np.arange(len(batch)), label_ids[batch]] -= 1.0
+            errors /= len(batch)
+
+            gradient = np.zeros_like(weights)
+            np.add.at(gradient, batch_indices, batch_values[:, None] * errors[rows])
+            gradient[n_features] = errors.sum(axis=0)
+            touched = np.unique(np.append(batch_indices, n_features))
+            gradient[touched] += l2 * weights[touched]
+
+            grad_squares[touched] += gradient[touched] ** 2
+            weights[touched] -= learning_rate * gradient[touched] / np.sqrt(grad_squares[touched])
+
+        print(f"epoch {epoch + 1}/{epochs}: loss {total_loss / len(texts):.4f}")
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('data', help="Labelled CSV or JSON Lines file")
+    parser.add_argument('--output', default=os.path.join('models', 'sentiment_model.npy'))
+    parser.add_argument('--labels', default='NEGATIVE,NEUTRAL,POSITIVE')
+    parser.add_argument('--n-features', type=int, default=2 ** 18)
+    parser.add_argument('--ngram-max', type=int, default=2)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--learning-rate', type=float, default=0.5)
+    parser.add_argument('--l2', type=float, default=1e-6)
+    parser.add_argument('--dtype', choices=['float16', 'float32'], default='float16',
+                        help="Storage precision of the exported weights")
+    parser.add_argument('--holdout', type=float, default=0.1, help="Fraction of examples kept back for accuracy")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the shuffle before the holdout split")
+    args = parser.parse_args()
+
+    labels = [label.strip().upper() for label in args.labels.split(',')]
+    texts, raw_labels = load_examples(args.data)
+    unknown = set(raw_labels) - set(labels)
+    if unknown:
+        parser.error(f"labels not in --labels: {', '.join(sorted(unknown))}")
+    label_ids = [labels.index(label) for label in raw_labels]
+
+    # Shuffle before splitting, so the holdout is not whatever the file happens to end with
+    order = np.random.default_rng(args.seed).permutation(len(texts))
+    texts = [texts[i] for i in order]
+    raw_labels = [raw_labels[i] for i in order]
+    label_ids = [label_ids[i] for i in order]
+
+    split = int(len(texts) * (1 - args.holdout))
+    featurizer = HashedFeaturizer(args.n_features, args.ngram_max)
+    start = time.perf_counter()
+    weights = train(texts[:split], label_ids[:split], len(labels), featurizer,
+                    args.epochs, args.batch_size, args.learning_rate, args.l2)
+    print(f"trained on {split} examples in {time.perf_counter() - start:.1f}s")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    np.save(args.output, weights.astype(args.dtype))
+    meta = {
+        'labels': labels,
+        'n_features': args.n_features,
+        'ngram_max': args.ngram_max,
+        'version': time.strftime('%Y%m%d%H%M%S'),
+        'examples': split,
+    }
+    with open(LocalSentimentModel._meta_path(args.output), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    print(f"wrote {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB)")
+
+    if split < len(texts):
+        model = LocalSentimentModel(args.output)
+        predictions = [result['label'] for result in model.classify_batch(texts[split:])]
+        correct = sum(1 for predicted, actual in zip(predictions, raw_labels[split:]) if predicted == actual)
+        print(f"holdout accuracy: {correct / len(predictions):.3f} on {len(predictions)} examples")
+
+
+if __name__ == '__main__':
+    main()
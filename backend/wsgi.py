@@ -0,0 +1,8 @@
+"""WSGI entry point: builds the app and warms it up before any worker forks.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from app import create_app, warm_up
+
+app = create_app()
+warm_up(app)
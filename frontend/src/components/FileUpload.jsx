@@ -2,8 +2,17 @@ import React, { useState } from 'react';
 import { useDropzone } from 'react-dropzone';
 import axios from 'axios';
 
+const API_URL = 'http://localhost:5000';
+// Larger files go through the resumable chunked upload API
+const DIRECT_UPLOAD_LIMIT = 10 * 1024 * 1024;
+const MAX_FILE_SIZE = 512 * 1024 * 1024;
+const CHUNK_RETRIES = 5;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
 const FileUpload = () => {
     const [uploading, setUploading] = useState(false);
+    const [progress, setProgress] = useState(null);
     const [result, setResult] = useState(null);
     const [error, setError] = useState(null);
 
@@ -12,7 +21,7 @@ const FileUpload = () => {
             'application/pdf': ['.pdf'],
             'image/*': ['.png', '.jpg', '.jpeg']
         },
-        maxSize: 10 * 1024 * 1024, // 10MB
+        maxSize: MAX_FILE_SIZE,
         multiple: false,
         onDrop: async (acceptedFiles) => {
             if (acceptedFiles.length > 0) {
@@ -21,16 +30,79 @@ const FileUpload = () => {
         }
     });
 
+    const waitForJob = async (statusUrl) => {
+        while (true) {
+            const { data } = await axios.get(`${API_URL}${statusUrl}`);
+            const job = data.data;
+            if (job.status === 'done') {
+                return { message: 'File processed and analyzed successfully', data: job.result };
+            }
+            if (job.status === 'failed') {
+                throw new Error(job.error || 'Processing failed');
+            }
+            setProgress(job.pages_total ? `Analyzing page ${job.pages_done} of ${job.pages_total}...` : 'Waiting to be processed...');
+            await sleep(1000);
+        }
+    };
+
+    const uploadInChunks = async (file) => {
+        const { data: created } = await axios.post(`${API_URL}/api/uploads`, { filename: file.name, size: file.size });
+        const { upload_id: uploadId, chunk_size: chunkSize } = created.data;
+        let offset = 0;
+        let failures = 0;
+
+        while (true) {
+            setProgress(`Uploading... ${Math.floor((offset / file.size) * 100)}%`);
+            let response;
+            try {
+                response = await axios.patch(`${API_URL}/api/uploads/${uploadId}`, file.slice(offset, offset + chunkSize), {
+                    headers: {
+                        'Content-Type': 'application/offset+octet-stream',
+                        'Upload-Offset': offset,
+                    },
+                });
+                failures = 0;
+            } catch (err) {
+                // Dropped connection or a chunk the server already had: ask where to resume from
+                const status = err.response?.status;
+                if (status !== undefined && status !== 409 && status < 500) throw err;
+                if (++failures > CHUNK_RETRIES) throw err;
+                await sleep(1000 * failures);
+                const { data } = await axios.get(`${API_URL}/api/uploads/${uploadId}`);
+                if (data.data.offset >= file.size) {
+                    response = { status: data.data.job_id ? 202 : 200, data };
+                } else {
+                    offset = data.data.offset;
+                    continue;
+                }
+            }
+
+            const upload = response.data.data;
+            if (upload.offset < file.size) {
+                offset = upload.offset;
+                continue;
+            }
+            // A file analyzed before comes back straight away; a new one is queued as a job
+            return response.status === 202 ? waitForJob(upload.status_url) : response.data;
+        }
+    };
+
     const handleFileUpload = async (file) => {
         setUploading(true);
+        setProgress(null);
         setError(null);
         setResult(null);
 
-        const formData = new FormData();
-        formData.append('file', file);
-
         try {
-            const response = await axios.post('http://localhost:5000/api/upload', formData, {
+            if (file.size > DIRECT_UPLOAD_LIMIT) {
+                setResult(await uploadInChunks(file));
+                return;
+            }
+
+            const formData = new FormData();
+            formData.append('file', file);
+
+            const response = await axios.post(`${API_URL}/api/upload`, formData, {
                 headers: {
                     'Content-Type': 'multipart/form-data',
                 },
@@ -39,9 +111,10 @@ const FileUpload = () => {
 
             setResult(response.data);
         } catch (err) {
-            setError(err.response?.data?.error || 'Upload failed. Please try again.');
+            setError(err.response?.data?.error || err.message || 'Upload failed. Please try again.');
         } finally {
             setUploading(false);
+            setProgress(null);
         }
     };
 
@@ -134,7 +207,7 @@ const FileUpload = () => {
                             {uploading ? (
                                 <div className="space-y-4">
                                     <div className="animate-spin rounded-full h-12 w-12 border-b-2 border-indigo-600 mx-auto"></div>
-                                    <p className="text-gray-600">Processing your file...</p>
+                                    <p className="text-gray-600">{progress || 'Processing your file...'}</p>
                                     <p className="text-xs text-gray-500">Extracting text and analyzing content...</p>
                                 </div>
                             ) : (
@@ -149,7 +222,7 @@ const FileUpload = () => {
                                         <p className="text-gray-500 mt-1">or</p>
                                     </div>
                                     <p className="text-xs text-gray-500">
-                                        PDF, PNG, JPG up to 10MB
+                                        PDF, PNG, JPG up to 512MB
                                     </p>
                                 </div>
                             )}